@@ -38,6 +38,7 @@ class FeatureExtractionParameters(ArgSchema):
     qc_fig_dir = OutputFile(description="output qc figure directory", required=False)
     sweep_features = Nested(FxSweepFeatures, many=True)
     cell_features = Nested(CellFeatures, required=True)
+    prefetch = Integer(description="number of upcoming sweeps read in the background while a sweep is analyzed", default=1)
 
 class SweepExtractionParameters(ArgSchema):
     input_nwb_file = InputFile(description="input nwb file", required=True)
@@ -46,6 +47,7 @@ class SweepExtractionParameters(ArgSchema):
     manual_seal_gohm = Float(description="blah")
     manual_initial_access_resistance_mohm = Float(description="blah")
     manual_initial_input_mohm = Float(description="blah")
+    prefetch = Integer(description="number of upcoming sweeps read in the background while a sweep is analyzed", default=1)
 
 class QcCriteria(DefaultSchema):
     pre_noise_rms_mv_max = Float(description="blash")
@@ -78,6 +80,7 @@ class PipelineParameters(ArgSchema):
     qc_fig_dir = OutputFile(description="output qc figure directory", required=False)
     qc_criteria = Nested(QcCriteria, required=True)
     manual_sweep_states = Nested(ManualSweepState, required=False, many=True)
+    prefetch = Integer(description="number of upcoming sweeps read in the background while a sweep is analyzed", default=1)
 
 
 class OutputSchema(DefaultSchema):
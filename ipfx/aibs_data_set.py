@@ -10,10 +10,17 @@ from ipfx.py2to3 import to_str
 
 class AibsDataSet(EphysDataSet):
     def __init__(self, sweep_info=None, nwb_file=None, h5_file=None,
-                 ontology=None, api_sweeps=True, validate_stim=True):
+                 ontology=None, api_sweeps=True, validate_stim=True, sweep_map=None, sweep_index=None):
         super(AibsDataSet, self).__init__(ontology, validate_stim)
 
-        self._nwb_data = nwb_reader.create_nwb_reader(nwb_file)
+        self._nwb_data = nwb_reader.create_nwb_reader(nwb_file, sweep_map)
+        self._nwb_file = nwb_file
+        self._h5_file = h5_file
+        self._notebook = None
+
+        if sweep_index is not None:
+            self.build_sweep_table_from_index(sweep_index)
+            return
 
         if sweep_info:
             sweep_info = sp.modify_sweep_info_keys(sweep_info) if api_sweeps else sweep_info
@@ -22,7 +29,6 @@ class AibsDataSet(EphysDataSet):
             sweep_numbers_in_map = self.nwb_data.sweep_map_table["sweep_number"].tolist()
             sweep_info = [si for si in sweep_info if si["sweep_number"] in sweep_numbers_in_map]
         else:
-            self.notebook = lab_notebook_reader.create_lab_notebook_reader(nwb_file, h5_file)
             sweep_info = self.extract_sweep_stim_info()
 
         self.build_sweep_table(sweep_info)
@@ -31,6 +37,13 @@ class AibsDataSet(EphysDataSet):
     def nwb_data(self):
         return self._nwb_data
 
+    @property
+    def notebook(self):
+        """Lab notebook reader of the file, created on first use"""
+        if self._notebook is None:
+            self._notebook = lab_notebook_reader.create_lab_notebook_reader(self._nwb_file, self._h5_file)
+        return self._notebook
+
     def extract_sweep_stim_info(self):
         """
 
@@ -40,24 +53,25 @@ class AibsDataSet(EphysDataSet):
             where each dict includes sweep properties
         """
         sweep_info = []
-        for index, sweep_map in self.nwb_data.sweep_map_table.iterrows():
-            sweep_record = {}
-            sweep_num = sweep_map["sweep_number"]
-            sweep_record['sweep_number'] = sweep_num
+        sweep_nums = self.nwb_data.sweep_map_table["sweep_number"].tolist()
 
-            sweep_record['stimulus_units'] = self.get_stimulus_units(sweep_num)
+        # bridge balance
+        bridge_balances = self.notebook.get_values("Bridge Bal Value", sweep_nums, None)
 
-            # bridge balance
-            sweep_record["bridge_balance_mohm"] = self.notebook.get_value(
-                "Bridge Bal Value", sweep_num, None)
+        # leak_pa (bias current)
+        leaks = self.notebook.get_values("I-Clamp Holding Level", sweep_nums, None)
 
-            # leak_pa (bias current)
-            sweep_record["leak_pa"] = self.notebook.get_value(
-                "I-Clamp Holding Level", sweep_num, None)
+        # ephys stim info
+        scale_factors = self.notebook.get_values("Scale Factor", sweep_nums, None)
 
-            # ephys stim info
-            sweep_record["stimulus_scale_factor"] = self.notebook.get_value(
-                "Scale Factor", sweep_num, None)
+        for sweep_num, bridge_balance, leak, scale_factor in zip(sweep_nums, bridge_balances, leaks, scale_factors):
+            sweep_record = {}
+            sweep_record['sweep_number'] = sweep_num
+
+            sweep_record['stimulus_units'] = self.get_stimulus_units(sweep_num)
+            sweep_record["bridge_balance_mohm"] = bridge_balance
+            sweep_record["leak_pa"] = leak
+            sweep_record["stimulus_scale_factor"] = scale_factor
 
             stim_code = self.get_stimulus_code(sweep_num)
             stim_code_ext = self.get_stimulus_code_ext(stim_code, sweep_num)
@@ -0,0 +1,129 @@
+#!/bin/env python
+
+"""
+Measure the memory used by the data path of ABFConverter with and without streaming.
+
+ABFConverter only accepts ABF v2 files and pyabf can only write ABF v1 files, so
+this benchmark writes synthetic ABF v1 files and runs them through the same
+steps as the converter: loading or mapping the files, creating one series per
+sweep from `convertDataset` or `SweepDataChunkIterator` and writing the NWB file.
+"""
+
+import os
+import argparse
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from multiprocessing import Pool
+
+import numpy as np
+import pyabf
+import pyabf.abfWriter
+from dateutil.tz import tzlocal
+from pynwb import NWBFile, NWBHDF5IO, TimeSeries
+
+from ipfx.x_to_nwb.ABFConverter import ABFConverter
+from ipfx.x_to_nwb.conversion_utils import SweepDataChunkIterator, convertDataset, mapABFData
+
+
+def writeFiles(folder, fileCount, sweepCount, sweepLength):
+    """
+    Write `fileCount` ABF v1 files with random data into the given folder and return their paths.
+    """
+
+    rng = np.random.RandomState(0)
+    files = []
+
+    for i in range(fileCount):
+        path = os.path.join(folder, f"{i}.abf")
+        sweeps = rng.normal(0, 50, (sweepCount, sweepLength))
+        pyabf.abfWriter.writeABF1(sweeps, path, 20000, units="mV")
+        files.append(path)
+
+    return files
+
+
+def convertFiles(files, outFile, streaming, compression):
+    """
+    Convert the acquired data of the given ABF files to an NWB file as ABFConverter does.
+    """
+
+    nwbFile = NWBFile(session_description="benchmark", identifier="benchmark",
+                      session_start_time=datetime.now(tzlocal()))
+
+    for file_index, path in enumerate(files):
+        abf = pyabf.ABF(path, loadData=False)
+
+        if streaming:
+            abf.data = mapABFData(abf)
+
+        for sweep in range(abf.sweepCount):
+            for channel in range(abf.channelCount):
+                abf.setSweep(sweep, channel=channel, absoluteTime=True)
+
+                if streaming:
+                    data = SweepDataChunkIterator(ABFConverter._acquisitionLoader(abf, channel, abf.sweepY),
+                                                  len(abf.sweepY), ABFConverter.streamingChunkLength)
+                else:
+                    data = abf.sweepY
+
+                series = TimeSeries(name=f"data_{file_index:05d}_{sweep:05d}_{channel}",
+                                    data=convertDataset(data, compression),
+                                    unit="mV", starting_time=0.0, rate=float(abf.dataRate))
+                nwbFile.add_acquisition(series)
+
+    with NWBHDF5IO(outFile, "w") as io:
+        io.write(nwbFile)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=4, help="Number of ABF files.")
+    parser.add_argument("--sweeps", type=int, default=16, help="Number of sweeps per file.")
+    parser.add_argument("--sweepLength", type=int, default=2**22, help="Number of samples per sweep.")
+    parser.add_argument("--compression", action="store_true", default=False, help="Compress the written data.")
+    parser.add_argument("--streaming", action="store_true", default=False,
+                        help="Only measure the streaming conversion.")
+    parser.add_argument("--loaded", action="store_true", default=False,
+                        help="Only measure the non-streaming conversion.")
+
+    args = parser.parse_args()
+
+    modes = []
+
+    if not args.streaming:
+        modes.append(False)
+
+    if not args.loaded:
+        modes.append(True)
+
+    with tempfile.TemporaryDirectory() as folder:
+        # write in a child process so that the random data does not count towards our peak RSS
+        with Pool(1) as pool:
+            files = pool.apply(writeFiles, (folder, args.files, args.sweeps, args.sweepLength))
+
+        size = sum(os.path.getsize(f) for f in files)
+        print(f"{args.files} ABF v1 files with {args.sweeps} sweeps of {args.sweepLength} samples, "
+              f"{size / 2**20:.0f} MB")
+
+        # peak RSS covers the whole process, use --loaded or --streaming to measure one mode alone
+        for streaming in modes:
+            outFile = os.path.join(folder, f"streaming_{streaming}.nwb")
+
+            tracemalloc.start()
+            start = time.time()
+            convertFiles(files, outFile, streaming, args.compression)
+            elapsed = time.time() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+            print(f"{'streaming' if streaming else 'loaded':>9}: peak allocations {peak / 2**20:.0f} MB, "
+                  f"peak RSS {rss:.0f} MB, {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
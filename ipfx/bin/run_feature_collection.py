@@ -119,7 +119,7 @@ def extract_features(data_set, ramp_sweep_numbers, ssq_sweep_numbers, lsq_sweep_
         # Check that all sweeps are long enough and not ended early
         extra_dur = 0.2
         good_lsq_sweep_numbers = [n for n, s in zip(lsq_sweep_numbers, check_lsq_sweeps.sweeps)
-                                  if s.t[-1] >= lsq_start + lsq_dur + extra_dur and not np.all(s.v[tsu.find_time_index(s.t, lsq_start + lsq_dur)-100:tsu.find_time_index(s.t, lsq_start + lsq_dur)] == 0)]
+                                  if s.time_base[-1] >= lsq_start + lsq_dur + extra_dur and not np.all(s.v[tsu.find_time_index(s.time_base, lsq_start + lsq_dur)-100:tsu.find_time_index(s.time_base, lsq_start + lsq_dur)] == 0)]
         lsq_sweeps = data_set.sweep_set(good_lsq_sweep_numbers)
 
         lsq_spx, lsq_spfx = dsf.extractors_for_sweeps(lsq_sweeps,
@@ -145,7 +145,7 @@ def extract_features(data_set, ramp_sweep_numbers, ssq_sweep_numbers, lsq_sweep_
         mask_supra = sweep_table["stim_amp"] >= basic_lsq_features["rheobase_i"]
         sweep_indexes = fv._consolidated_long_square_indexes(sweep_table.loc[mask_supra, :])
         amps = np.rint(sweep_table.loc[sweep_indexes, "stim_amp"].values - basic_lsq_features["rheobase_i"])
-        spike_data = np.array(basic_lsq_features["spikes_set"])
+        spike_data = basic_lsq_features["spikes_set"]
 
         for amp, swp_ind in zip(amps, sweep_indexes):
             if (amp % amp_interval != 0) or (amp > max_above_rheo) or (amp < 0):
@@ -217,7 +217,7 @@ def first_spike_lsq(spike_data,
                         "width",
                         "fast_trough_v",
                     ]):
-    return {f: spike_data.loc[0, f] for f in feature_list}
+    return {f: spike_data[f][0] for f in feature_list}
 
 
 def mean_spike_lsq(spike_data,
@@ -231,7 +231,7 @@ def mean_spike_lsq(spike_data,
                        "fast_trough_v",
                    ]):
 
-    return {f: spike_data[f].mean(skipna=True) for f in feature_list}
+    return {f: np.nanmean(spike_data[f]) for f in feature_list}
 
 
 def fi_curve_fit(amps, rates):
@@ -1,4 +1,5 @@
 #!/usr/bin/python
+import os
 import logging
 import shutil
 import argschema as ags
@@ -16,6 +17,23 @@ import ipfx.logging_utils as lu
 
 
 def embed_spike_times(input_nwb_file, output_nwb_file, sweep_spikes):
+    """
+    Write the spike times into a copy of the input nwb file, or into the input
+    file itself if `output_nwb_file` is the input file
+
+    Parameters
+    ----------
+    input_nwb_file: str
+    output_nwb_file: str
+    sweep_spikes: dict
+        spike times of the sweeps keyed by sweep number
+    """
+
+    if os.path.isfile(output_nwb_file) and os.path.samefile(input_nwb_file, output_nwb_file):
+        nwb_data = appender.create_nwb_appender(input_nwb_file)
+        nwb_data.add_spike_times(sweep_spikes)
+        logging.debug(f"Embedded spike times into the {input_nwb_file} in place")
+        return
 
     tmp_nwb_file = output_nwb_file + ".tmp"
     shutil.copy(input_nwb_file, tmp_nwb_file)
@@ -47,7 +65,33 @@ def run_feature_extraction(input_nwb_file,
                            output_nwb_file,
                            qc_fig_dir,
                            sweep_info,
-                           cell_info):
+                           cell_info,
+                           data_set=None,
+                           prefetch=0):
+    """
+    Parameters
+    ----------
+    input_nwb_file: str
+    stimulus_ontology_file: str
+    output_nwb_file: str
+        copy of the input file with the spike times. If it is the input file,
+        the spike times are written into it in place.
+    qc_fig_dir: str
+    sweep_info: list of dicts
+        sweep features, only the sweeps that passed QC are analyzed
+    cell_info: dict
+        cell features
+    data_set: EphysDataSet
+        already opened data set of `input_nwb_file` to reuse, instead of
+        creating one from the input file and ontology (optional)
+    prefetch: int
+        number of upcoming sweeps read in the background while a sweep is analyzed (optional, default 0)
+
+    Returns
+    -------
+    dict
+        containing the cell and sweep features
+    """
 
     lu.log_pretty_header("Extract ephys features", level=1)
 
@@ -55,18 +99,21 @@ def run_feature_extraction(input_nwb_file,
     if len(sweep_info) == 0:
         raise er.FeatureError("There are no QC-passed sweeps available to analyze")
 
-    if not stimulus_ontology_file:
-        stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
-        logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
-    ont = StimulusOntology(ju.read(stimulus_ontology_file))
+    if data_set is None:
+        if not stimulus_ontology_file:
+            stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
+            logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
+        ont = StimulusOntology(ju.read(stimulus_ontology_file))
 
-    data_set = create_data_set(sweep_info=sweep_info,
-                               nwb_file=input_nwb_file,
-                               ontology=ont,
-                               api_sweeps=False)
+        data_set = create_data_set(sweep_info=sweep_info,
+                                   nwb_file=input_nwb_file,
+                                   ontology=ont,
+                                   api_sweeps=False)
+    else:
+        data_set = data_set.with_sweep_info(sweep_info)
 
     try:
-        cell_features, sweep_features, cell_record, sweep_records = dsft.extract_data_set_features(data_set)
+        cell_features, sweep_features, cell_record, sweep_records = dsft.extract_data_set_features(data_set, prefetch=prefetch)
 
         if cell_info: cell_record.update(cell_info)
 
@@ -86,6 +133,8 @@ def run_feature_extraction(input_nwb_file,
 
     if not cell_state["failed_fx"]:
         sweep_spike_times = collect_spike_times(sweep_features)
+        # the output may be the input file, which can not be written while the data set has it open
+        data_set.nwb_data.close()
         embed_spike_times(input_nwb_file, output_nwb_file, sweep_spike_times)
 
         if qc_fig_dir is None:
@@ -114,7 +163,8 @@ def main():
                                           module.args["output_nwb_file"],
                                           module.args.get("qc_fig_dir", None),
                                           module.args["sweep_features"],
-                                          module.args["cell_features"])
+                                          module.args["cell_features"],
+                                          prefetch=module.args["prefetch"])
 
     ju.write(module.args["output_json"], feature_data)
 
@@ -221,9 +221,9 @@ def validate_sweeps(data_set, sweep_numbers, extra_dur=0.2):
 
     # Check that all sweeps are long enough and not ended early
     good_sweep_numbers = [n for n, s, v in zip(sweep_numbers, check_sweeps.sweeps, valid_sweep_stim)
-                              if s.t[-1] >= end + extra_dur
+                              if s.time_base[-1] >= end + extra_dur
                               and v is True
-                              and not np.all(s.v[tsu.find_time_index(s.t, end)-100:tsu.find_time_index(s.t, end)] == 0)]
+                              and not np.all(s.v[tsu.find_time_index(s.time_base, end)-100:tsu.find_time_index(s.time_base, end)] == 0)]
     return good_sweep_numbers, start, end
 
 
@@ -2,6 +2,8 @@ from __future__ import absolute_import
 import logging
 import argschema as ags
 from ipfx._schemas import PipelineParameters
+from ipfx.stimulus import StimulusOntology
+from ipfx.data_set_utils import create_data_set
 
 from ipfx.bin.run_sweep_extraction import run_sweep_extraction
 from ipfx.bin.run_qc import run_qc
@@ -10,6 +12,7 @@ from ipfx.bin.run_feature_extraction import run_feature_extraction
 import allensdk.core.json_utilities as ju
 import ipfx.sweep_props as sp
 import ipfx.logging_utils as lu
+import ipfx.bin.make_stimulus_ontology as mso
 
 
 def run_pipeline(input_nwb_file,
@@ -18,11 +21,31 @@ def run_pipeline(input_nwb_file,
                  stimulus_ontology_file,
                  qc_fig_dir,
                  qc_criteria,
-                 manual_sweep_states):
+                 manual_sweep_states,
+                 prefetch=0):
+    """Run sweep extraction, QC and feature extraction on a cell.
+
+    The stimulus ontology and the data set are created once and shared by all
+    stages, so that the NWB file is only opened and indexed once. `prefetch`
+    sweeps are read in the background while the sweep features are extracted.
+    """
+
+    if stimulus_ontology_file:
+        mso.make_stimulus_ontology_from_lims(stimulus_ontology_file)
+    else:
+        stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
+        logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
+
+    ont = StimulusOntology(ju.read(stimulus_ontology_file))
+    data_set = create_data_set(nwb_file=input_nwb_file,
+                               h5_file=input_h5_file,
+                               ontology=ont)
 
     se_output = run_sweep_extraction(input_nwb_file,
                                      input_h5_file,
-                                     stimulus_ontology_file)
+                                     stimulus_ontology_file,
+                                     data_set=data_set,
+                                     prefetch=prefetch)
 
     sp.drop_tagged_sweeps(se_output["sweep_features"])
     sp.remove_sweep_feature("tags",se_output["sweep_features"])
@@ -30,7 +53,8 @@ def run_pipeline(input_nwb_file,
     qc_output = run_qc(stimulus_ontology_file,
                        se_output["cell_features"],
                        se_output["sweep_features"],
-                       qc_criteria)
+                       qc_criteria,
+                       ontology=ont)
 
     if qc_output["cell_state"]["failed_qc"]:
         logging.warning("Failed QC. No ephys features extracted.")
@@ -48,6 +72,8 @@ def run_pipeline(input_nwb_file,
                                        qc_fig_dir,
                                        se_output['sweep_features'],
                                        se_output['cell_features'],
+                                       data_set=data_set,
+                                       prefetch=prefetch,
                                        )
 
     return dict(sweep_extraction=se_output,
@@ -72,7 +98,8 @@ def main():
                           module.args.get("stimulus_ontology_file", None),
                           module.args.get("qc_fig_dir", None),
                           module.args.get("qc_criteria", None),
-                          module.args.get("manual_sweep_states", None))
+                          module.args.get("manual_sweep_states", None),
+                          prefetch=module.args["prefetch"])
 
 
     ju.write(module.args["output_json"], output)
@@ -11,7 +11,7 @@ import pandas as pd
 import ipfx.logging_utils as lu
 
 
-def run_qc(stimulus_ontology_file, cell_features, sweep_features, qc_criteria):
+def run_qc(stimulus_ontology_file, cell_features, sweep_features, qc_criteria, ontology=None):
     """
 
     Parameters
@@ -24,6 +24,8 @@ def run_qc(stimulus_ontology_file, cell_features, sweep_features, qc_criteria):
         sweep features
     qc_criteria: dict
         qc criteria
+    ontology: StimulusOntology
+        already loaded ontology, used instead of reading `stimulus_ontology_file` (optional)
 
     Returns
     -------
@@ -33,11 +35,13 @@ def run_qc(stimulus_ontology_file, cell_features, sweep_features, qc_criteria):
 
     lu.log_pretty_header("Perform QC checks", level=1)
 
-    if not stimulus_ontology_file:
-        stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
-        logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
+    if ontology is None:
+        if not stimulus_ontology_file:
+            stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
+            logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
 
-    ont = StimulusOntology(ju.read(stimulus_ontology_file))
+        ontology = StimulusOntology(ju.read(stimulus_ontology_file))
+    ont = ontology
 
     cell_state, sweep_states = qcp.qc_experiment(ont,
                                                  cell_features,
@@ -14,7 +14,8 @@ import ipfx.bin.make_stimulus_ontology as mso
 MANUAL_KEYS = ['manual_seal_gohm', 'manual_initial_access_resistance_mohm', 'manual_initial_input_mohm' ]
 
 
-def run_sweep_extraction(input_nwb_file, input_h5_file, stimulus_ontology_file, input_manual_values=None):
+def run_sweep_extraction(input_nwb_file, input_h5_file, stimulus_ontology_file, input_manual_values=None,
+                         data_set=None, prefetch=0):
     """
     Parameters
     ----------
@@ -22,6 +23,11 @@ def run_sweep_extraction(input_nwb_file, input_h5_file, stimulus_ontology_file,
     input_h5_file
     stimulus_ontology_file
     input_manual_values
+    data_set: EphysDataSet
+        already opened data set to extract the features from, instead of
+        creating one from the input files and ontology (optional)
+    prefetch: int
+        number of upcoming sweeps read in the background while a sweep is analyzed (optional, default 0)
 
     Returns
     -------
@@ -37,23 +43,25 @@ def run_sweep_extraction(input_nwb_file, input_h5_file, stimulus_ontology_file,
         if mk in input_manual_values:
             manual_values[mk] = input_manual_values[mk]
 
-    if stimulus_ontology_file:
-        mso.make_stimulus_ontology_from_lims(stimulus_ontology_file)
-    else:
-        stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
-        logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
+    if data_set is None:
+        if stimulus_ontology_file:
+            mso.make_stimulus_ontology_from_lims(stimulus_ontology_file)
+        else:
+            stimulus_ontology_file = StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE
+            logging.info(F"Ontology is not provided, using default {StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE}")
 
-    ont = StimulusOntology(ju.read(stimulus_ontology_file))
-    ds = create_data_set(nwb_file=input_nwb_file,
-                         h5_file=input_h5_file,
-                         ontology=ont)
+        ont = StimulusOntology(ju.read(stimulus_ontology_file))
+        data_set = create_data_set(nwb_file=input_nwb_file,
+                                   h5_file=input_h5_file,
+                                   ontology=ont)
+    ds = data_set
 
     cell_features, cell_tags = qcfe.cell_qc_features(ds, manual_values)
 
     for tag in cell_tags:
         logging.warning(tag)
 
-    sweep_features = qcfe.sweep_qc_features(ds)
+    sweep_features = qcfe.sweep_qc_features(ds, prefetch=prefetch)
 
     return dict(cell_features=cell_features,
                 cell_tags=cell_tags,
@@ -71,7 +79,8 @@ def main():
     module = ags.ArgSchemaParser(schema_type=SweepExtractionParameters)
     output = run_sweep_extraction(module.args["input_nwb_file"],
                                   module.args.get("input_h5_file",None),
-                                  module.args.get("stimulus_ontology_file", None))
+                                  module.args.get("stimulus_ontology_file", None),
+                                  prefetch=module.args["prefetch"])
 
     ju.write(module.args["output_json"], output)
 
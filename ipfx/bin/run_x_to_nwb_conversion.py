@@ -2,14 +2,34 @@
 
 import os
 import argparse
+import hashlib
+import json
+import shutil
+import tempfile
+import time
 import logging
+from collections import defaultdict
+from multiprocessing import Pool
 log = logging.getLogger(__name__)
 
+import ipfx
 from ipfx.x_to_nwb.ABFConverter import ABFConverter
 from ipfx.x_to_nwb.DatConverter import DatConverter
+from ipfx.x_to_nwb.conversion_utils import getPackageInfo
 
+MANIFEST_VERSION = 1
+MANIFEST_FILE_NAME = "x_to_nwb_manifest.json"
 
-def convert(inFileOrFolder, overwrite=False, fileType=None, outputMetadata=False, outputFeedbackChannel=False, multipleGroupsPerFile=False, compression=True):
+# seconds after which the manifest of a running batch conversion is written
+MANIFEST_WRITE_INTERVAL = 60
+
+BATCH_EXTENSIONS = (".abf", ".dat")
+
+DEFAULT_ADC_NAMES_WITH_REAL_DATA = list(ABFConverter.adcNamesWithRealData)
+
+
+def convert(inFileOrFolder, overwrite=False, fileType=None, outputMetadata=False, outputFeedbackChannel=False, multipleGroupsPerFile=False, compression=True,
+            streaming=False):
     """
     Convert the given file to a NeuroDataWithoutBorders file using pynwb
 
@@ -25,6 +45,7 @@ def convert(inFileOrFolder, overwrite=False, fileType=None, outputMetadata=False
     :param multipleGroupsPerFile: Write all Groups in the DAT file into one NWB
                                   file. By default we create one NWB per Group (ignored for ABF files).
     :param compression: Toggle compression for HDF5 datasets
+    :param streaming: Read the ABF data of each sweep only while writing it (ignored for DAT files)
 
     :return: path of the created NWB file
     """
@@ -57,7 +78,8 @@ def convert(inFileOrFolder, overwrite=False, fileType=None, outputMetadata=False
         if outputMetadata:
             ABFConverter.outputMetadata(inFileOrFolder)
         else:
-            ABFConverter(inFileOrFolder, outFile, outputFeedbackChannel=outputFeedbackChannel, compression=compression)
+            ABFConverter(inFileOrFolder, outFile, outputFeedbackChannel=outputFeedbackChannel, compression=compression,
+                         streaming=streaming)
     elif ext == ".dat":
         if outputMetadata:
             DatConverter.outputMetadata(inFileOrFolder)
@@ -70,6 +92,296 @@ def convert(inFileOrFolder, overwrite=False, fileType=None, outputMetadata=False
     return outFile
 
 
+def findInputFiles(folder):
+    """
+    Return the paths of all ABF and DAT files in the directory tree `folder`,
+    sorted and relative to `folder`.
+    """
+
+    files = []
+
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in BATCH_EXTENSIONS:
+                files.append(os.path.relpath(os.path.join(dirpath, filename), folder))
+
+    return files
+
+
+def findOutputCollisions(inFiles):
+    """
+    Return the input files, relative paths as returned by `findInputFiles`, whose
+    NWB files would get the same name as the ones of other input files in the
+    same folder, e.g. `a.abf` and `a.dat`, mapped to these other input files.
+
+    The names are compared case-insensitively, as `x.abf` and `X.ABF` collide on
+    case-insensitive file systems.
+    """
+
+    filesByOutput = defaultdict(list)
+
+    for inFile in inFiles:
+        dirname, basename = os.path.split(inFile)
+        root = os.path.splitext(basename)[0]
+        filesByOutput[(dirname, root.lower())].append(inFile)
+
+    return {inFile: [other for other in files if other != inFile]
+            for files in filesByOutput.values() if len(files) > 1
+            for inFile in files}
+
+
+def getFileKey(path):
+    """
+    Return the size, modification time and SHA256 hash of the given file.
+    """
+
+    contentHash = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            contentHash.update(block)
+
+    stat = os.stat(path)
+
+    return {"size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": contentHash.hexdigest()}
+
+
+def readManifest(manifestFile, converterVersion, options):
+    """
+    Return the entries of the given batch conversion manifest by input file.
+
+    The entries are empty if the manifest does not exist, has a different
+    version or was created with a different converter version or options.
+    """
+
+    if not os.path.isfile(manifestFile):
+        return {}
+
+    with open(manifestFile) as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        log.warning(f"Ignoring the manifest {manifestFile} of version {manifest.get('version')}.")
+        return {}
+    elif manifest["converter_version"] != converterVersion or manifest["options"] != options:
+        log.info(f"Converter version or options changed since the manifest {manifestFile} was written.")
+        return {}
+
+    return manifest["files"]
+
+
+def writeManifest(manifestFile, converterVersion, options, entries):
+    """
+    Write a batch conversion manifest. The file is replaced atomically.
+    """
+
+    manifest = {"version": MANIFEST_VERSION,
+                "converter_version": converterVersion,
+                "options": options,
+                "files": entries}
+
+    tmpFile = f"{manifestFile}.{os.getpid()}.tmp"
+
+    with open(tmpFile, "w") as f:
+        json.dump(manifest, f, sort_keys=True)
+
+    os.replace(tmpFile, manifestFile)
+
+
+def convertAtomically(inFile, outputFeedbackChannel=False, multipleGroupsPerFile=False, compression=True,
+                      streaming=False):
+    """
+    Convert the given ABF or DAT file to NWB next to it, like `convert`.
+
+    The NWB files are first written into a temporary folder and then moved
+    into place with atomic renames, replacing existing files. A failed
+    conversion leaves no partial files behind.
+
+    :return: paths of the created NWB files
+    """
+
+    folder = os.path.dirname(os.path.abspath(inFile))
+    root, ext = os.path.splitext(os.path.basename(inFile))
+    ext = ext.lower()
+
+    if ext not in BATCH_EXTENSIONS:
+        raise ValueError(f"The extension {ext} is currently not supported.")
+
+    tmpFolder = tempfile.mkdtemp(prefix=".x_to_nwb-", dir=folder)
+
+    try:
+        tmpFile = os.path.join(tmpFolder, root + ".nwb")
+
+        if ext == ".abf":
+            ABFConverter(inFile, tmpFile, outputFeedbackChannel=outputFeedbackChannel, compression=compression,
+                         streaming=streaming)
+        else:
+            DatConverter(inFile, tmpFile, multipleGroupsPerFile=multipleGroupsPerFile, compression=compression)
+
+        outFiles = []
+        for name in sorted(os.listdir(tmpFolder)):
+            outFile = os.path.join(folder, name)
+            os.replace(os.path.join(tmpFolder, name), outFile)
+            outFiles.append(outFile)
+    finally:
+        shutil.rmtree(tmpFolder, ignore_errors=True)
+
+    return outFiles
+
+
+def _convertBatchItem(item):
+    """
+    Convert one input file of `convertBatch`, unless the content is unchanged
+    from the given manifest entry.
+
+    :return: path of the input file, new manifest entry or `None` on errors and
+             one of "converted", "unchanged" or "failed"
+    """
+
+    folder, inFile, entry, options = item
+    path = os.path.join(folder, inFile)
+
+    # class attributes of the converter, passed explicitly as worker processes
+    # do not inherit them with the spawn start method
+    options = dict(options)
+    ABFConverter.protocolStorageDir = options.pop("protocolStorageDir")
+    ABFConverter.adcNamesWithRealData = options.pop("adcNamesWithRealData")
+
+    try:
+        key = getFileKey(path)
+
+        if entry is not None and entry["sha256"] == key["sha256"]:
+            entry = dict(entry, **key)
+            return inFile, entry, "unchanged"
+
+        outFiles = convertAtomically(path, **options)
+    except Exception as e:
+        log.error(f"Could not convert {path}: {e}")
+        return inFile, None, "failed"
+
+    entry = dict(key, outputs=[os.path.relpath(outFile, folder) for outFile in outFiles])
+
+    return inFile, entry, "converted"
+
+
+def convertBatch(folder, manifestFile=None, processes=None, outputFeedbackChannel=False,
+                 multipleGroupsPerFile=False, compression=True, streaming=False, protocolStorageDir=None,
+                 adcNamesWithRealData=None):
+    """
+    Convert all ABF and DAT files in the given directory tree to NWB files next
+    to them, in parallel.
+
+    A manifest records the converter version, the conversion options and the
+    size, modification time, SHA256 hash and created NWB files of each input
+    file. Files with an up-to-date entry are skipped: a file with the same size
+    and modification time is not read again, and a file with a different
+    modification time is only hashed. All files are converted again if the
+    converter version or the options change. Each file is converted with
+    `convertAtomically`. Files whose NWB files would get the same name as the
+    ones of another file, see `findOutputCollisions`, are not converted and
+    count as failed.
+
+    :param folder: root of the directory tree
+    :param manifestFile: path of the manifest, defaults to `MANIFEST_FILE_NAME` in `folder`
+    :param processes: number of worker processes, defaults to the number of CPUs;
+                      `1` converts in the current process
+    :param outputFeedbackChannel: see `convert`
+    :param multipleGroupsPerFile: see `convert`
+    :param compression: see `convert`
+    :param streaming: see `convert`
+    :param protocolStorageDir: folder with the custom ABF waveforms in ATF format
+    :param adcNamesWithRealData: names of the ABF channels which hold non-feedback channel data,
+                                 defaults to `DEFAULT_ADC_NAMES_WITH_REAL_DATA`
+
+    :return: dictionary with the number of "converted", "unchanged" and "failed" files
+    """
+
+    if not os.path.isdir(folder):
+        raise ValueError(f"The folder {folder} does not exist.")
+
+    folder = os.path.realpath(folder)
+
+    if manifestFile is None:
+        manifestFile = os.path.join(folder, MANIFEST_FILE_NAME)
+
+    if adcNamesWithRealData is None:
+        adcNamesWithRealData = DEFAULT_ADC_NAMES_WITH_REAL_DATA
+
+    # getPackageInfo only knows the allensdk version and the git revision of a checkout
+    converterVersion = dict(getPackageInfo(), ipfx_version=ipfx.__version__)
+    options = {"outputFeedbackChannel": outputFeedbackChannel,
+               "multipleGroupsPerFile": multipleGroupsPerFile,
+               "compression": compression,
+               "streaming": streaming,
+               "protocolStorageDir": protocolStorageDir,
+               "adcNamesWithRealData": list(adcNamesWithRealData)}
+    oldEntries = readManifest(manifestFile, converterVersion, options)
+
+    counts = {"converted": 0, "unchanged": 0, "failed": 0}
+    entries = {}
+    pending = []
+
+    inFiles = findInputFiles(folder)
+    collisions = findOutputCollisions(inFiles)
+
+    for inFile in inFiles:
+        if inFile in collisions:
+            log.error(f"Could not convert {os.path.join(folder, inFile)}: its NWB file name collides with the "
+                      f"one of {', '.join(collisions[inFile])}.")
+            counts["failed"] += 1
+            continue
+
+        entry = oldEntries.get(inFile)
+
+        if entry is not None and not all(os.path.isfile(os.path.join(folder, outFile))
+                                         for outFile in entry["outputs"]):
+            entry = None
+
+        if entry is not None:
+            stat = os.stat(os.path.join(folder, inFile))
+            if (stat.st_size, stat.st_mtime_ns) == (entry["size"], entry["mtime_ns"]):
+                entries[inFile] = entry
+                counts["unchanged"] += 1
+                continue
+
+        pending.append((folder, inFile, entry, options))
+
+    log.info(f"Converting {len(pending)} of {len(pending) + len(entries)} files in {folder}.")
+
+    if processes == 1:
+        pool = None
+        results = map(_convertBatchItem, pending)
+    else:
+        pool = Pool(processes)
+        results = pool.imap_unordered(_convertBatchItem, pending)
+
+    lastWrite = time.monotonic()
+
+    try:
+        for inFile, entry, status in results:
+            counts[status] += 1
+
+            if entry is not None:
+                entries[inFile] = entry
+
+            if time.monotonic() - lastWrite > MANIFEST_WRITE_INTERVAL:
+                writeManifest(manifestFile, converterVersion, options, entries)
+                lastWrite = time.monotonic()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+        writeManifest(manifestFile, converterVersion, options, entries)
+
+    log.info(f"Batch conversion of {folder}: {counts}")
+
+    return counts
+
+
 def main():
 
     parser = argparse.ArgumentParser()
@@ -90,6 +402,14 @@ def main():
     common_group.add_argument("--log", type=str, help="Log level for debugging, defaults to the root logger's value.")
     common_group.add_argument("filesOrFolders", nargs="+",
                                help="List of ABF files/folders to convert.")
+    common_group.add_argument("--batch", action="store_true", default=False,
+                               help=("Convert all ABF and DAT files in the given directory trees in parallel, "
+                                     "skipping files which are unchanged since the last batch conversion."))
+    common_group.add_argument("--processes", type=int, default=None,
+                               help="Number of worker processes for batch conversions, defaults to the number of CPUs.")
+    common_group.add_argument("--manifest", type=str, default=None,
+                               help=(f"Manifest file of a batch conversion of a single folder, "
+                                     f"defaults to {MANIFEST_FILE_NAME} in the folder."))
 
     abf_group.add_argument("--protocolDir", type=str,
                             help=("Disc location where custom waveforms in ATF format are stored."))
@@ -99,6 +419,8 @@ def main():
                         help="Output ADC data to the NWB file which stems from stimulus feedback channels.")
     abf_group.add_argument("--realDataChannel", type=str, action="append",
                         help=f"Define additional channels which hold non-feedback channel data. The default is {ABFConverter.adcNamesWithRealData}.")
+    abf_group.add_argument("--streaming", action="store_true", default=False,
+                        help="Read the data of each sweep only while writing it, so that memory use does not grow with the number of files.")
 
     dat_group.add_argument("--multipleGroupsPerFile", action="store_true", default=False,
                            help="Write all Groups from a DAT file into a single NWB file. By default we create one NWB file per Group.")
@@ -121,7 +443,24 @@ def main():
         ABFConverter.protocolStorageDir = args.protocolDir
 
     if args.realDataChannel:
-        ABFConverter.adcNamesWithRealData.append(args.realDataChannel)
+        ABFConverter.adcNamesWithRealData.extend(args.realDataChannel)
+
+    if args.batch:
+        if args.manifest and len(args.filesOrFolders) > 1:
+            raise ValueError("A manifest file can only be passed for a single folder.")
+
+        for folder in args.filesOrFolders:
+            print(f"Converting {folder}")
+            convertBatch(folder,
+                         manifestFile=args.manifest,
+                         processes=args.processes,
+                         outputFeedbackChannel=args.outputFeedbackChannel,
+                         multipleGroupsPerFile=args.multipleGroupsPerFile,
+                         compression=args.compression,
+                         streaming=args.streaming,
+                         protocolStorageDir=ABFConverter.protocolStorageDir,
+                         adcNamesWithRealData=ABFConverter.adcNamesWithRealData)
+        return
 
     for fileOrFolder in args.filesOrFolders:
         print(f"Converting {fileOrFolder}")
@@ -131,7 +470,8 @@ def main():
                 outputMetadata=args.outputMetadata,
                 outputFeedbackChannel=args.outputFeedbackChannel,
                 multipleGroupsPerFile=args.multipleGroupsPerFile,
-                compression=args.compression)
+                compression=args.compression,
+                streaming=args.streaming)
 
 
 if __name__ == "__main__":
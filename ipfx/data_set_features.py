@@ -34,8 +34,12 @@ from __future__ import absolute_import
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #
+import collections
+import itertools
+from contextlib import closing
 import numpy as np
 import logging
+from .sweep import SweepSet
 from .feature_extractor import SpikeFeatureExtractor,SpikeTrainFeatureExtractor
 from . import ephys_data_set as eds
 from . import spike_features as spkf
@@ -107,7 +111,8 @@ def extractors_for_sweeps(sweep_set,
     if est_window is not None:
         dv_cutoff, thresh_frac = spkf.estimate_adjusted_detection_parameters(sweep_set.v, sweep_set.t,
                                                                            est_window[0],
-                                                                           est_window[1])
+                                                                           est_window[1],
+                                                                           dvdt_caches=sweep_set.dvdt_cache)
 
     if thresh_frac_floor is not None:
         thresh_frac = max(thresh_frac_floor, thresh_frac)
@@ -124,40 +129,85 @@ def extractors_for_sweeps(sweep_set,
     return sfx, stfx
 
 
-def extract_sweep_features(data_set, sweep_table):
+def extract_sweep_features(data_set, sweep_table, executor=None, prefetch=0, max_pending_groups=2):
+    """Detect the spikes of every sweep in a sweep table.
+
+    Parameters
+    ----------
+    data_set : EphysDataSet
+    sweep_table : DataFrame of the sweeps to analyze
+    executor : concurrent.futures.Executor to process the sweeps in parallel (optional, default serial)
+    prefetch : number of upcoming sweeps read in the background while a stimulus group is analyzed
+        (optional, default 0 to read them when needed)
+    max_pending_groups : number of stimulus groups submitted to the executor before waiting
+        for the oldest one to finish (optional, default 2)
+
+    Returns
+    -------
+    sweep_features : dict of sweep number to dict with the "spikes" of that sweep
+    """
     sweep_groups = sweep_table.groupby(data_set.STIMULUS_NAME)[data_set.SWEEP_NUMBER]
 
     # extract sweep-level features
     lu.log_pretty_header("Analyzing sweep features:",level=2)
 
     sweep_features = {}
+    pending = collections.deque()
 
-    for stimulus_name, sweep_numbers in sweep_groups:
-        sweep_numbers = sorted(sweep_numbers)
+    sweep_groups = [(stimulus_name, sorted(sweep_numbers)) for stimulus_name, sweep_numbers in sweep_groups]
+    all_sweeps = data_set.iter_sweeps(itertools.chain.from_iterable(sns for _, sns in sweep_groups),
+                                      prefetch=prefetch)
 
-        sweep_set = data_set.sweep_set(sweep_numbers)
-        sweep_set.select_epoch("recording")
-        sweep_set.align_to_start_of_epoch("experiment")
+    with closing(all_sweeps):
+        for stimulus_name, sweep_numbers in sweep_groups:
 
-        dp = detection_parameters(stimulus_name).copy()
-        for k in [ "start", "end" ]:
-            if k in dp:
-                dp.pop(k)
+            sweep_set = SweepSet(list(itertools.islice(all_sweeps, len(sweep_numbers))))
+            sweep_set.select_epoch("recording")
+            sweep_set.align_to_start_of_epoch("experiment")
 
-        sfx, _ = extractors_for_sweeps(sweep_set, **dp)
+            dp = detection_parameters(stimulus_name).copy()
+            for k in [ "start", "end" ]:
+                if k in dp:
+                    dp.pop(k)
 
-        for sn, sweep in zip(sweep_numbers, sweep_set.sweeps):
-#            logging.info("Extracting features from the sweep %d" % sn)
-            spikes_df = sfx.process(sweep.t, sweep.v, sweep.i)
-            sweep_features[sn] = {'spikes': spikes_df.to_dict(orient='records'), "sweep_number": sn }
+            sfx, _ = extractors_for_sweeps(sweep_set, **dp)
+
+            if executor is None:
+                spikes_dfs = sfx.process_sweep_set(sweep_set)
+                _add_sweep_features(sweep_features, sweep_numbers, spikes_dfs)
+                continue
+
+            # Keep only a few groups in flight, so that the sweeps of the
+            # whole table are not held in memory (or pickled) at once
+            pending.append((sweep_numbers, executor.submit(_process_sweep_set, sfx, sweep_set)))
+            while len(pending) > max_pending_groups:
+                sweep_numbers, future = pending.popleft()
+                _add_sweep_features(sweep_features, sweep_numbers, future.result())
+
+    while pending:
+        sweep_numbers, future = pending.popleft()
+        _add_sweep_features(sweep_features, sweep_numbers, future.result())
 
     return sweep_features
 
+
+def _add_sweep_features(sweep_features, sweep_numbers, spikes_dfs):
+    for sn, spikes_df in zip(sweep_numbers, spikes_dfs):
+#        logging.info("Extracting features from the sweep %d" % sn)
+        sweep_features[sn] = {'spikes': spikes_df, "sweep_number": sn }
+
+
+def _process_sweep_set(sfx, sweep_set):
+    """Spike features of the sweeps of a sweep set, as a module-level function for process pools."""
+    return sfx.process_sweep_set(sweep_set)
+
+
 def extract_cell_features(data_set,
                           ramp_sweep_numbers,
                           short_square_sweep_numbers,
                           long_square_sweep_numbers,
-                          subthresh_min_amp):
+                          subthresh_min_amp,
+                          executor=None):
 
     lu.log_pretty_header("Analyzing cell features:",level=2)
 
@@ -178,7 +228,7 @@ def extract_cell_features(data_set,
                                               start = lsq_start,
                                               end = lsq_start+lsq_dur,
                                               **detection_parameters(data_set.LONG_SQUARE))
-    lsq_an = spa.LongSquareAnalysis(lsq_spx, lsq_spfx, subthresh_min_amp=subthresh_min_amp)
+    lsq_an = spa.LongSquareAnalysis(lsq_spx, lsq_spfx, subthresh_min_amp=subthresh_min_amp, executor=executor)
     lsq_features = lsq_an.analyze(lsq_sweeps)
     cell_features["long_squares"] = lsq_an.as_dict(lsq_features, [ dict(sweep_number=sn) for sn in long_square_sweep_numbers ])
 
@@ -199,7 +249,7 @@ def extract_cell_features(data_set,
     ssq_spx, ssq_spfx = extractors_for_sweeps(ssq_sweeps,
                                               est_window = [ssq_start,ssq_start+0.001],
                                               **detection_parameters(data_set.SHORT_SQUARE))
-    ssq_an = spa.ShortSquareAnalysis(ssq_spx, ssq_spfx)
+    ssq_an = spa.ShortSquareAnalysis(ssq_spx, ssq_spfx, executor=executor)
     ssq_features = ssq_an.analyze(ssq_sweeps)
     cell_features["short_squares"] = ssq_an.as_dict(ssq_features, [ dict(sweep_number=sn) for sn in short_square_sweep_numbers ])
 
@@ -217,7 +267,7 @@ def extract_cell_features(data_set,
     ramp_spx, ramp_spfx = extractors_for_sweeps(ramp_sweeps,
                                                 start = ramp_start,
                                                 **detection_parameters(data_set.RAMP))
-    ramp_an = spa.RampAnalysis(ramp_spx, ramp_spfx)
+    ramp_an = spa.RampAnalysis(ramp_spx, ramp_spfx, executor=executor)
     ramp_features = ramp_an.analyze(ramp_sweeps)
     cell_features["ramps"] = ramp_an.as_dict(ramp_features, [dict(sweep_number=sn) for sn in ramp_sweep_numbers ])
 
@@ -260,7 +310,7 @@ def select_subthreshold_min_amplitude(stim_amps, decimals=0):
     return subthresh_min_amp, min_amp_delta
 
 
-def extract_data_set_features(data_set, subthresh_min_amp=None):
+def extract_data_set_features(data_set, subthresh_min_amp=None, executor=None, prefetch=0):
     """
 
     Parameters
@@ -268,6 +318,11 @@ def extract_data_set_features(data_set, subthresh_min_amp=None):
     data_set : EphysDataSet
         data set
     subthresh_min_amp
+    executor : concurrent.futures.Executor
+        analyze the sweeps in parallel (optional, default serial)
+    prefetch : int
+        number of upcoming sweeps read in the background while the sweep features
+        are extracted (optional, default 0)
 
     Returns
     -------
@@ -312,10 +367,11 @@ def extract_data_set_features(data_set, subthresh_min_amp=None):
                                           ramp_sweep_numbers,
                                           ssq_sweep_numbers,
                                           lsq_sweep_numbers,
-                                          subthresh_min_amp)
+                                          subthresh_min_amp,
+                                          executor=executor)
 
     # compute sweep features
-    sweep_features = extract_sweep_features(data_set, iclamp_sweeps)
+    sweep_features = extract_sweep_features(data_set, iclamp_sweeps, executor=executor, prefetch=prefetch)
 
     # shuffle peak deflection for the subthreshold long squares
     for s in cell_features["long_squares"]["subthreshold_sweeps"]:
@@ -1,14 +1,24 @@
+import numpy as np
 from ipfx.hbg_dataset import HBGDataSet
 from ipfx.aibs_data_set import AibsDataSet
 from ipfx.nwb_reader import get_nwb_version
+import ipfx.sweep_index as swi
 
 
-def create_data_set(sweep_info=None, nwb_file=None, ontology=None, api_sweeps=True, h5_file=None,validate_stim=True):
+def create_data_set(sweep_info=None, nwb_file=None, ontology=None, api_sweeps=True, h5_file=None,validate_stim=True,
+                    sweep_cache_bytes=None, sweep_index_dir=None, dtype=None,
+                    use_memmap=False):
     """Create an appropriate EphysDataSet derived class for the given nwb_file
 
     Parameters
     ----------
     nwb_file: str file name
+    sweep_cache_bytes: int maximum size in bytes of the sweeps kept in memory by the data set (optional, no cache by default)
+    sweep_index_dir: str directory of the sweep index files (optional, no index by default).
+        When the sweep table is built from the file, the sweep map and sweep table are loaded
+        from the index of the file if it is up to date, and written to it otherwise.
+    dtype: numpy floating point dtype of the sweep data, e.g. "float32" (optional, the dtype stored in the file by default)
+    use_memmap: bool read the sweep data of uncompressed, contiguous datasets through a memory map of the nwb file
 
     Returns
     -------
@@ -18,22 +28,52 @@ def create_data_set(sweep_info=None, nwb_file=None, ontology=None, api_sweeps=Tr
     if nwb_file is None:
         raise ValueError("Can not decide which EphysDataSet class to create without nwb_file")
 
+    if dtype is not None and np.dtype(dtype).kind != "f":
+        raise ValueError("Sweep data dtype must be a floating point type, not {}".format(dtype))
+
     nwb_version = get_nwb_version(nwb_file)
 
+    index_file = None
+    index = None
+    sweep_map = None
+    if sweep_index_dir is not None and not sweep_info:
+        index_file = swi.index_file_name(nwb_file, sweep_index_dir)
+        index = swi.read_sweep_index(nwb_file, index_file)
+        if index is not None:
+            sweep_map = index["sweep_map"]
+
     if nwb_version["major"] == 2:
-        return HBGDataSet(sweep_info=sweep_info,
-                          nwb_file=nwb_file,
-                          ontology=ontology,
-                          api_sweeps=api_sweeps,
-                          validate_stim=validate_stim)
+        data_set = HBGDataSet(sweep_info=sweep_info,
+                              nwb_file=nwb_file,
+                              ontology=ontology,
+                              api_sweeps=api_sweeps,
+                              validate_stim=validate_stim,
+                              sweep_map=sweep_map,
+                              sweep_index=index)
 
     elif nwb_version["major"] == 1 or nwb_version["major"] == 0:
-        return AibsDataSet(sweep_info=sweep_info,
-                           nwb_file=nwb_file,
-                           ontology=ontology,
-                           api_sweeps=api_sweeps,
-                           h5_file=h5_file,
-                           validate_stim=validate_stim)
+        data_set = AibsDataSet(sweep_info=sweep_info,
+                               nwb_file=nwb_file,
+                               ontology=ontology,
+                               api_sweeps=api_sweeps,
+                               h5_file=h5_file,
+                               validate_stim=validate_stim,
+                               sweep_map=sweep_map,
+                               sweep_index=index)
     else:
         raise ValueError("Unsupported or unknown NWB major" +
                          "version {} ({})".format(nwb_version["major"], nwb_version["full"]))
+
+    if index_file is not None and index is None:
+        # stimulus names depend on the ontology and are looked up again when the index is loaded
+        sweep_table = data_set.sweep_table.copy()
+        if data_set.STIMULUS_NAME in sweep_table:
+            sweep_table[data_set.STIMULUS_NAME] = None
+        swi.write_sweep_index(nwb_file, index_file, data_set.nwb_data.sweep_map_table, sweep_table)
+
+    data_set.enable_sweep_cache(sweep_cache_bytes)
+    data_set.sweep_dtype = np.dtype(dtype) if dtype is not None else None
+    data_set.nwb_data.use_memmap = use_memmap
+
+    return data_set
+
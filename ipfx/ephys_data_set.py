@@ -1,8 +1,26 @@
+import copy
+import itertools
 import warnings
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from ipfx.sweep import Sweep,SweepSet
+from ipfx.sweep import Sweep,SweepSet,SweepCache
+from ipfx.time_series_utils import TimeAxis
+
+
+def scale_samples(data, factor):
+    """
+    Multiply samples by `factor`, in place unless they are read-only, e.g. a
+    memory map of the file, in which case the scaled samples are a new array
+    """
+    if data.flags.writeable:
+        data *= factor
+        return data
+
+    return data * factor
+
 
 class EphysDataSet(object):
 
@@ -34,6 +52,21 @@ class EphysDataSet(object):
         self.sweep_table = None
         self.ontology = ontology
         self.validate_stim = validate_stim
+        self.sweep_cache = None
+        self.sweep_dtype = None
+
+    def enable_sweep_cache(self, max_bytes):
+        """
+        Keep recently used sweeps in memory so that `sweep` does not read and
+        decode them again. The data arrays of cached sweeps are read-only, and
+        every call to `sweep` returns a new Sweep sharing them.
+
+        Parameters
+        ----------
+        max_bytes: int
+            maximum size of the cached sweep data in bytes, or None to disable the cache
+        """
+        self.sweep_cache = SweepCache(max_bytes) if max_bytes is not None else None
 
     @property
     def nwb_data(self):
@@ -47,6 +80,55 @@ class EphysDataSet(object):
         else:
             self.sweep_table = pd.DataFrame(columns=self.COLUMN_NAMES)
 
+    def build_sweep_table_from_index(self, index):
+        """
+        Build the sweep table from a sweep index instead of the sweep records.
+        The clamp modes stored with the index are kept, and the stimulus names,
+        which depend on the ontology, are looked up from the stimulus codes.
+
+        Parameters
+        ----------
+        index: dict
+            sweep index as returned by sweep_index.read_sweep_index
+        """
+
+        sweep_info = index["sweep_info"]
+
+        if self.ontology:
+            for sweep_record in sweep_info:
+                if self.STIMULUS_NAME in sweep_record:
+                    sweep_record[self.STIMULUS_NAME] = self.get_stimulus_name(sweep_record[self.STIMULUS_CODE])
+
+        sweep_table = pd.DataFrame.from_records(sweep_info)
+        self.sweep_table = sweep_table.astype({k: v for k, v in index["sweep_info_dtypes"].items()
+                                               if k != self.STIMULUS_NAME})
+
+        nwb_data = self.nwb_data
+        nwb_data.sweep_map_table = nwb_data.sweep_map_table.astype(index["sweep_map_dtypes"])
+
+    def with_sweep_info(self, sweep_info):
+        """
+        Create a data set that shares the file reader and sweep cache of this one,
+        with a sweep table built from `sweep_info` instead. Sweeps that are not in
+        the sweep table of this data set are dropped.
+
+        Parameters
+        ----------
+        sweep_info: list of dicts
+            where each dict includes sweep properties
+
+        Returns
+        -------
+        data_set: EphysDataSet
+        """
+        sweep_numbers = set(self.sweep_table[self.SWEEP_NUMBER].tolist())
+        sweep_info = [si for si in sweep_info if si[self.SWEEP_NUMBER] in sweep_numbers]
+
+        data_set = copy.copy(self)
+        data_set.build_sweep_table(sweep_info)
+
+        return data_set
+
     def add_clamp_mode(self, sweep_info):
         """
         Check if clamp mode is available and otherwise detect it
@@ -120,7 +202,7 @@ class EphysDataSet(object):
 
         return st.to_dict(orient='records')[0]
 
-    def sweep(self, sweep_number):
+    def sweep(self, sweep_number, index_range=None):
 
         """
         Create an instance of the Sweep class with the data loaded from the from a file
@@ -128,17 +210,32 @@ class EphysDataSet(object):
         Parameters
         ----------
         sweep_number: int
+        index_range: tuple of (start index, end index), both included (optional)
+            only read these samples of the sweep. The times of the samples are the
+            same as in the full sweep, but the epochs of the Sweep are detected
+            within the range and their indexes are relative to its start.
 
         Returns
         -------
         sweep: Sweep object
         """
 
-        sweep_data = self.get_sweep_data(sweep_number)
+        if index_range is not None:
+            sweep_data = self.get_sweep_data(sweep_number, index_range=index_range)
+            first_index = index_range[0]
+        else:
+            if self.sweep_cache is not None:
+                sweep = self.sweep_cache.get(sweep_number)
+                if sweep is not None:
+                    return sweep.copy()
+
+            sweep_data = self.get_sweep_data(sweep_number)
+            first_index = 0
+
         sweep_record = self.get_sweep_record(sweep_number)
         sampling_rate = sweep_data['sampling_rate']
         dt = 1. / sampling_rate
-        t = np.arange(0, len(sweep_data['stimulus'])) * dt
+        t = TimeAxis(len(sweep_data['stimulus']), dt, first_index=first_index)
 
         epochs = sweep_data.get('epochs')
         clamp_mode = sweep_record['clamp_mode']
@@ -152,8 +249,8 @@ class EphysDataSet(object):
         else:
             raise Exception("Unable to determine clamp mode for sweep " + sweep_number)
 
-        v *= 1.0e3    # convert units V->mV
-        i *= 1.0e12   # convert units A->pA
+        v = scale_samples(v, 1.0e3)    # convert units V->mV
+        i = scale_samples(i, 1.0e12)   # convert units A->pA
 
         if len(sweep_data['stimulus']) != len(sweep_data['response']):
             warnings.warn("Stimulus duration {} is not equal reponse duration {}".
@@ -173,6 +270,12 @@ class EphysDataSet(object):
             logging.warning("Error reading sweep %d" % sweep_number)
             raise
 
+        if self.sweep_cache is not None and index_range is None:
+            v.flags.writeable = False
+            i.flags.writeable = False
+            self.sweep_cache.put(sweep_number, sweep)
+            return sweep.copy()
+
         return sweep
 
     def sweep_set(self, sweep_numbers):
@@ -181,6 +284,44 @@ class EphysDataSet(object):
         except TypeError:  # not iterable
             return SweepSet([self.sweep(sweep_numbers)])
 
+    def iter_sweeps(self, sweep_numbers, prefetch=0):
+        """
+        Iterate over sweeps in the order of `sweep_numbers`
+
+        Parameters
+        ----------
+        sweep_numbers: iterable of int
+        prefetch: int
+            number of upcoming sweeps read on a background thread while the
+            current one is used. At most `prefetch` sweeps are held in addition
+            to the current one. Sweeps are read in the calling thread if 0.
+
+        Returns
+        -------
+        iterator of Sweep objects
+        """
+        if prefetch <= 0:
+            for sweep_number in sweep_numbers:
+                yield self.sweep(sweep_number)
+            return
+
+        sweep_numbers = iter(sweep_numbers)
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            try:
+                for sweep_number in itertools.islice(sweep_numbers, prefetch):
+                    pending.append(reader.submit(self.sweep, sweep_number))
+
+                while pending:
+                    sweep = pending.popleft().result()
+                    for sweep_number in itertools.islice(sweep_numbers, 1):
+                        pending.append(reader.submit(self.sweep, sweep_number))
+                    yield sweep
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def aligned_sweeps(self, sweep_numbers, stim_onset_delta):
         raise NotImplementedError
 
@@ -197,7 +338,7 @@ class EphysDataSet(object):
     def get_recording_date(self):
         raise NotImplementedError
 
-    def get_sweep_data(self, sweep_number):
+    def get_sweep_data(self, sweep_number, index_range=None):
         """
         Read sweep data from the nwb file
         Substitute trailing zeros in the response for np.nan
@@ -206,6 +347,11 @@ class EphysDataSet(object):
         Parameters
         ----------
         sweep_number
+        index_range: tuple of (start index, end index), both included (optional)
+            only read these samples of the sweep
+
+        The stimulus and response have the dtype `sweep_dtype` when it is set, and
+        follow the dtype stored in the file otherwise.
 
         Returns
         -------
@@ -219,7 +365,23 @@ class EphysDataSet(object):
         }
         """
 
-        sweep_data = self.nwb_data.get_sweep_data(sweep_number)
+        if index_range is not None:
+            sweep_data = self.nwb_data.get_sweep_data(sweep_number, index_range=index_range, dtype=self.sweep_dtype)
+            response = sweep_data['response']
+
+            # if the range ends before the end of recording, none of its samples are trailing zeros.
+            # Otherwise finding the end of recording needs the rest of the sweep.
+            if len(response) == 0 or response[-1] != 0:
+                return sweep_data
+
+            sweep_data = self.get_sweep_data(sweep_number)
+            start, end = index_range
+            for key in ("stimulus", "response"):
+                sweep_data[key] = sweep_data[key][start:end+1]
+
+            return sweep_data
+
+        sweep_data = self.nwb_data.get_sweep_data(sweep_number, dtype=self.sweep_dtype)
 
         response = sweep_data['response']
 
@@ -231,6 +393,9 @@ class EphysDataSet(object):
             sweep_end_idx = len(response)-1
 
         if recording_end_idx < sweep_end_idx:
+            if not response.flags.writeable:
+                # read-only memory map of the file
+                response = sweep_data['response'] = response.copy()
             response[recording_end_idx+1:] = np.nan
 
         return sweep_data
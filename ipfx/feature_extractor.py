@@ -35,7 +35,7 @@ from __future__ import absolute_import
 # POSSIBILITY OF SUCH DAMAGE.
 #
 import numpy as np
-from pandas import DataFrame
+from collections import OrderedDict
 import warnings
 import logging
 from . import spike_features as spkf
@@ -45,6 +45,7 @@ from . import spike_train_features as strf
 import six
 from . import time_series_utils as tsu
 from . import error as er
+from .spike_table import SpikeTable
 
 
 class SpikeFeatureExtractor(object):
@@ -60,7 +61,7 @@ class SpikeFeatureExtractor(object):
 
     def __init__(self, start=None, end=None, filter=10.,
                  dv_cutoff=20., max_interval=0.005, min_height=2., min_peak=-30.,
-                 thresh_frac=0.05, reject_at_stim_start_interval=0):
+                 thresh_frac=0.05, reject_at_stim_start_interval=0, window_search_backend="loop"):
         """Initialize SweepFeatures object.-
 
         Parameters
@@ -77,7 +78,13 @@ class SpikeFeatureExtractor(object):
         min_peak : minimum acceptable absolute peak level in mV (optional, default -30)
         thresh_frac : fraction of average upstroke for threshold calculation (optional, default 0.05)
         reject_at_stim_start_interval : duration of window after start to reject potential spikes (optional, default 0)
+        window_search_backend : implementation of the per-spike window searches, one of
+            spike_detector.WINDOW_SEARCH_BACKENDS (optional, default "loop")
         """
+        if window_search_backend not in spkd.WINDOW_SEARCH_BACKENDS:
+            raise ValueError("Unknown window search backend {}, expected one of {}".format(
+                window_search_backend, spkd.WINDOW_SEARCH_BACKENDS))
+
         self.start = start
         self.end = end
         self.filter = filter
@@ -87,26 +94,111 @@ class SpikeFeatureExtractor(object):
         self.min_peak = min_peak
         self.thresh_frac = thresh_frac
         self.reject_at_stim_start_interval = reject_at_stim_start_interval
+        self.window_search_backend = window_search_backend
+
+    def process(self, t, v, i, dvdt_cache=None):
+        """Detect spikes and calculate their features.
+
+        Parameters
+        ----------
+        t : ndarray of times (seconds) or TimeAxis
+        v : ndarray of voltages (mV)
+        i : ndarray of currents (pA)
+        dvdt_cache : DvdtCache of `v` to take time-derivatives from (optional)
 
-    def process(self, t, v, i):
-        dvdt = tsu.calculate_dvdt(v, t, self.filter)
+        Returns
+        -------
+        spikes_df : SpikeTable of spike features, one row per spike
+        """
+        if dvdt_cache is None:
+            dvdt = tsu.calculate_dvdt(v, t, self.filter)
+        else:
+            dvdt = dvdt_cache.dvdt(self.filter)
 
         # Basic features of spikes
         putative_spikes = spkd.detect_putative_spikes(v, t, self.start, self.end,
                                                     dv_cutoff=self.dv_cutoff,
                                                     dvdt=dvdt)
-        peaks = spkd.find_peak_indexes(v, t, putative_spikes, self.end)
+
+        return self._process_putative_spikes(t, v, i, dvdt, putative_spikes, dvdt_cache)
+
+    def process_sweep_set(self, sweep_set, max_batch_size=None):
+        """Detect spikes and calculate their features for every sweep of a sweep set.
+
+        Sweeps with identical, evenly sampled time arrays are stacked into a 2-D
+        array so that filtering, dV/dt and the threshold-crossing search run once
+        per batch instead of once per sweep. Other sweeps are processed one at a time.
+
+        Parameters
+        ----------
+        sweep_set : SweepSet object
+        max_batch_size : maximum number of sweeps stacked together (optional, default no limit)
+
+        Returns
+        -------
+        spikes_dfs : list of SpikeTables in the order of `sweep_set.sweeps`
+        """
+
+        sweeps = sweep_set.sweeps
+        spikes_dfs = [None] * len(sweeps)
+
+        batches = []
+        for n, sweep in enumerate(sweeps):
+            t = sweep.time_base
+            if len(t) < 2 or not sweep.has_fixed_dt:
+                spikes_dfs[n] = self.process(t, sweep.v, sweep.i, sweep.dvdt_cache)
+                continue
+
+            for batch_t, batch in batches:
+                if (max_batch_size is None or len(batch) < max_batch_size) and tsu.same_times(batch_t, t):
+                    batch.append(n)
+                    break
+            else:
+                batches.append((t, [n]))
+
+        for t, batch in batches:
+            v_set = np.vstack([sweeps[n].v for n in batch])
+            dvdt_set = tsu.calculate_dvdt(v_set, t, self.filter)
+
+            # Sweeps with nan values need their own time-derivative with the nans removed
+            valid_rows = ~np.isnan(dvdt_set).any(axis=1)
+            for n in np.array(batch)[~valid_rows]:
+                spikes_dfs[n] = self.process(sweeps[n].time_base, sweeps[n].v, sweeps[n].i, sweeps[n].dvdt_cache)
+
+            if not valid_rows.any():
+                continue
+
+            batch = np.array(batch)[valid_rows]
+            v_set = v_set[valid_rows]
+            dvdt_set = dvdt_set[valid_rows]
+
+            putative_spikes_set = spkd.detect_putative_spikes_batch(v_set, t, self.start, self.end,
+                                                                    dv_cutoff=self.dv_cutoff,
+                                                                    dvdt=dvdt_set)
+
+            for n, dvdt, putative_spikes in zip(batch, dvdt_set, putative_spikes_set):
+                sweep = sweeps[n]
+                sweep.dvdt_cache.store(self.filter, dvdt)
+                spikes_dfs[n] = self._process_putative_spikes(t, sweep.v, sweep.i, dvdt, putative_spikes,
+                                                              sweep.dvdt_cache)
+
+        return spikes_dfs
+
+    def _process_putative_spikes(self, t, v, i, dvdt, putative_spikes, dvdt_cache=None):
+        peaks = spkd.find_peak_indexes(v, t, putative_spikes, self.end,
+                                       backend=self.window_search_backend)
         putative_spikes, peaks = spkd.filter_putative_spikes(v, t, putative_spikes, peaks,
                                                            self.min_height, self.min_peak,
                                                            dvdt=dvdt)
 
         if not putative_spikes.size:
             # Save time if no spikes detected
-            return DataFrame()
+            return SpikeTable()
 
-        upstrokes = spkd.find_upstroke_indexes(v, t, putative_spikes, peaks, dvdt=dvdt)
+        upstrokes = spkd.find_upstroke_indexes(v, t, putative_spikes, peaks, dvdt=dvdt,
+                                               backend=self.window_search_backend)
         thresholds = spkd.refine_threshold_indexes(v, t, upstrokes, self.thresh_frac,
-                                                 dvdt=dvdt)
+                                                 dvdt=dvdt, backend=self.window_search_backend)
 
         thresholds, peaks, upstrokes, clipped = spkd.check_thresholds_and_peaks(v, t, thresholds, peaks,
                                                                      upstrokes, self.start, self.end, self.max_interval,
@@ -114,14 +206,17 @@ class SpikeFeatureExtractor(object):
                                                                      reject_at_stim_start_interval=self.reject_at_stim_start_interval)
         if not thresholds.size:
             # Save time if no spikes detected
-            return DataFrame()
+            return SpikeTable()
 
         # Spike list and thresholds have been refined - now find other features
-        upstrokes = spkd.find_upstroke_indexes(v, t, thresholds, peaks, self.filter, dvdt)
-        troughs = spkd.find_trough_indexes(v, t, thresholds, peaks, clipped, self.end)
-        downstrokes = spkd.find_downstroke_indexes(v, t, peaks, troughs, clipped, dvdt=dvdt)
+        upstrokes = spkd.find_upstroke_indexes(v, t, thresholds, peaks, self.filter, dvdt,
+                                               backend=self.window_search_backend)
+        troughs = spkd.find_trough_indexes(v, t, thresholds, peaks, clipped, self.end,
+                                           backend=self.window_search_backend)
+        downstrokes = spkd.find_downstroke_indexes(v, t, peaks, troughs, clipped, dvdt=dvdt,
+                                                   backend=self.window_search_backend)
         trough_details, clipped = spkf.analyze_trough_details(v, t, thresholds, peaks, clipped, self.end,
-                                                            dvdt=dvdt)
+                                                            dvdt=dvdt, dvdt_cache=dvdt_cache)
 
         widths = spkf.find_widths(v, t, thresholds, peaks, trough_details[1], clipped)
 
@@ -143,62 +238,46 @@ class SpikeFeatureExtractor(object):
         isi_types = trough_details[0]
         trough_detail_indexes = dict(zip(["fast_trough", "adp", "slow_trough"], trough_details[1:]))
 
-        # Redundant, but ensures that DataFrame has right number of rows
-        # Any better way to do it?
-        spikes_df = DataFrame(data=thresholds, columns=["threshold_index"])
-        spikes_df["clipped"] = clipped
+        # Assemble the features column by column into preallocated arrays
+        # and hand them over to the SpikeTable without copying
+        n_spikes = len(thresholds)
+        columns = OrderedDict()
+        columns["threshold_index"] = None # placeholder to keep the column order
+        columns["clipped"] = clipped
 
         for k, all_vals in vit_data_indexes.items():
-            valid_ind = ~np.isnan(all_vals)
-            vals = all_vals[valid_ind].astype(int)
-            spikes_df[k + "_index"] = np.nan
-            spikes_df[k + "_t"] = np.nan
-            spikes_df[k + "_v"] = np.nan
-
-            if len(vals) > 0:
-                spikes_df.loc[valid_ind, k + "_index"] = vals
-                spikes_df.loc[valid_ind, k + "_t"] = t[vals]
-                spikes_df.loc[valid_ind, k + "_v"] = v[vals]
+            valid_ind, vals = _valid_indexes(all_vals)
+            columns[k + "_index"] = _feature_column(n_spikes, valid_ind, vals)
+            columns[k + "_t"] = _feature_column(n_spikes, valid_ind, t[vals])
+            columns[k + "_v"] = _feature_column(n_spikes, valid_ind, v[vals])
 
             if i is not None:
-                spikes_df[k + "_i"] = np.nan
-                if len(vals) > 0:
-                    spikes_df.loc[valid_ind, k + "_i"] = i[vals]
+                columns[k + "_i"] = _feature_column(n_spikes, valid_ind, i[vals])
 
         for k, all_vals in dvdt_data_indexes.items():
-            valid_ind = ~np.isnan(all_vals)
-            vals = all_vals[valid_ind].astype(int)
-            spikes_df[k + "_index"] = np.nan
-            spikes_df[k] = np.nan
+            valid_ind, vals = _valid_indexes(all_vals)
+            columns[k + "_index"] = _feature_column(n_spikes, valid_ind, vals)
+            columns[k] = _feature_column(n_spikes, valid_ind, dvdt[vals])
             if len(vals) > 0:
-                spikes_df.loc[valid_ind, k + "_index"] = vals
-                spikes_df.loc[valid_ind, k + "_t"] = t[vals]
-                spikes_df.loc[valid_ind, k + "_v"] = v[vals]
-                spikes_df.loc[valid_ind, k] = dvdt[vals]
+                columns[k + "_t"] = _feature_column(n_spikes, valid_ind, t[vals])
+                columns[k + "_v"] = _feature_column(n_spikes, valid_ind, v[vals])
 
-        spikes_df["isi_type"] = isi_types
+        columns["isi_type"] = isi_types
 
         for k, all_vals in trough_detail_indexes.items():
-            valid_ind = ~np.isnan(all_vals)
-            vals = all_vals[valid_ind].astype(int)
-            spikes_df[k + "_index"] = np.nan
-            spikes_df[k + "_t"] = np.nan
-            spikes_df[k + "_v"] = np.nan
-            if len(vals) > 0:
-                spikes_df.loc[valid_ind, k + "_index"] = vals
-                spikes_df.loc[valid_ind, k + "_t"] = t[vals]
-                spikes_df.loc[valid_ind, k + "_v"] = v[vals]
+            valid_ind, vals = _valid_indexes(all_vals)
+            columns[k + "_index"] = _feature_column(n_spikes, valid_ind, vals)
+            columns[k + "_t"] = _feature_column(n_spikes, valid_ind, t[vals])
+            columns[k + "_v"] = _feature_column(n_spikes, valid_ind, v[vals])
 
             if i is not None:
-                spikes_df[k + "_i"] = np.nan
-                if len(vals) > 0:
-                    spikes_df.loc[valid_ind, k + "_i"] = i[vals]
+                columns[k + "_i"] = _feature_column(n_spikes, valid_ind, i[vals])
 
-        spikes_df["width"] = widths
+        columns["width"] = widths
 
-        spikes_df["upstroke_downstroke_ratio"] = spikes_df["upstroke"] / -spikes_df["downstroke"]
+        columns["upstroke_downstroke_ratio"] = columns["upstroke"] / -columns["downstroke"]
 
-        return spikes_df
+        return SpikeTable(columns)
 
     def spikes(self, spikes_df):
         """Get all features for each spike as a list of records."""
@@ -209,7 +288,7 @@ class SpikeFeatureExtractor(object):
 
     def spike_feature_keys(self, spikes_df):
         """Get list of every available spike feature."""
-        return spikes_df.columns.values.tolist()
+        return list(spikes_df.columns)
 
     def spike_feature(self, spikes_df, key, include_clipped=False, force_exclude_clipped=False):
         """Get specified feature for every spike.
@@ -230,19 +309,32 @@ class SpikeFeatureExtractor(object):
         if key not in spikes_df.columns:
             raise KeyError("requested feature '{:s}' not available".format(key))
 
-        values = spikes_df[key].values
+        values = np.asarray(spikes_df[key])
 
         if include_clipped and force_exclude_clipped:
             raise ValueError("include_clipped and force_exclude_clipped cannot both be true")
 
         if not include_clipped and self.is_spike_feature_affected_by_clipping(key):
-            values = values[~spikes_df["clipped"].values]
+            values = values[~np.asarray(spikes_df["clipped"])]
         elif force_exclude_clipped:
-            values = values[~spikes_df["clipped"].values]
+            values = values[~np.asarray(spikes_df["clipped"])]
 
         return values
 
 
+def _valid_indexes(all_vals):
+    """Return the mask of defined (not nan) indexes and those indexes as ints."""
+    valid_ind = ~np.isnan(all_vals)
+    return valid_ind, all_vals[valid_ind].astype(int)
+
+
+def _feature_column(n_spikes, valid_ind, values):
+    """Make a column of spike features that is nan wherever the feature is undefined."""
+    column = np.full(n_spikes, np.nan)
+    column[valid_ind] = values
+    return column
+
+
 class SpikeTrainFeatureExtractor(object):
     def __init__(self, start, end,
                 #pause_cost_weight=1.0,
@@ -265,7 +357,7 @@ class SpikeTrainFeatureExtractor(object):
         self.sag_baseline_interval = sag_baseline_interval
         self.peak_width = peak_width
 
-    def process(self, t, v, i, spikes_df, extra_features=None, exclude_clipped=False):
+    def process(self, t, v, i, spikes_df, extra_features=None, exclude_clipped=False, dvdt_cache=None):
         features = strf.basic_spike_train_features(t, spikes_df, self.start, self.end, exclude_clipped=exclude_clipped)
 
         if self.start is None:
@@ -281,7 +373,8 @@ class SpikeTrainFeatureExtractor(object):
             features['stim_amp'] = self.stim_amp_fn(t, i, self.start) if self.stim_amp_fn else None
 
         if 'v_baseline' in extra_features:
-            features['v_baseline'] = subf.baseline_voltage(t, v, self.start, self.baseline_interval, self.filter_frequency)
+            features['v_baseline'] = subf.baseline_voltage(t, v, self.start, self.baseline_interval, self.filter_frequency,
+                                                           dvdt_cache=dvdt_cache)
 
         if 'sag' in extra_features:
             features['sag'] = subf.sag(t, v, i, self.start, self.end, self.peak_width, self.sag_baseline_interval)
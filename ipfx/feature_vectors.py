@@ -127,10 +127,11 @@ def step_subthreshold(amp_sweep_dict, target_amps, start, end,
     subsampled_dict = {}
     for amp in amp_sweep_dict:
         swp = amp_sweep_dict[amp]
-        start_index = tsu.find_time_index(swp.t, start - extend_duration)
-        delta_t = swp.t[1] - swp.t[0]
+        t = swp.time_base
+        start_index = tsu.find_time_index(t, start - extend_duration)
+        delta_t = t[1] - t[0]
         subsample_width = int(np.round(subsample_interval / delta_t))
-        end_index = tsu.find_time_index(swp.t, end + extend_duration)
+        end_index = tsu.find_time_index(t, end + extend_duration)
         subsampled_v = _subsample_average(swp.v[start_index:end_index], subsample_width)
         subsampled_dict[amp] = subsampled_v
 
@@ -222,10 +223,11 @@ def subthresh_norm(amp_sweep_dict, deflect_dict, start, end, target_amp=-101.,
     base, deflect_v = deflect_dict[matching_amp]
     delta = base - deflect_v
 
-    start_index = tsu.find_time_index(swp.t, start - extend_duration)
-    delta_t = swp.t[1] - swp.t[0]
+    t = swp.time_base
+    start_index = tsu.find_time_index(t, start - extend_duration)
+    delta_t = t[1] - t[0]
     subsample_width = int(np.round(subsample_interval / delta_t))
-    end_index = tsu.find_time_index(swp.t, end + extend_duration)
+    end_index = tsu.find_time_index(t, end + extend_duration)
     subsampled_v = _subsample_average(swp.v[start_index:end_index], subsample_width)
     subsampled_v -= base
     subsampled_v /= delta
@@ -278,16 +280,17 @@ def subthresh_depol_norm(amp_sweep_dict, deflect_dict, start, end,
 
     base, _ = deflect_dict[max_amp]
 
-    interval_start_index = tsu.find_time_index(swp.t, end - steady_state_interval)
-    interval_end_index = tsu.find_time_index(swp.t, end)
+    t = swp.time_base
+    interval_start_index = tsu.find_time_index(t, end - steady_state_interval)
+    interval_end_index = tsu.find_time_index(t, end)
     steady_state_v = swp.v[interval_start_index:interval_end_index].mean()
 
     delta = steady_state_v - base
 
-    start_index = tsu.find_time_index(swp.t, start - extend_duration)
-    delta_t = swp.t[1] - swp.t[0]
+    start_index = tsu.find_time_index(t, start - extend_duration)
+    delta_t = t[1] - t[0]
     subsample_width = int(np.round(subsample_interval / delta_t))
-    end_index = tsu.find_time_index(swp.t, end + extend_duration)
+    end_index = tsu.find_time_index(t, end + extend_duration)
     subsampled_v = _subsample_average(swp.v[start_index:end_index], subsample_width)
     subsampled_v -= base
     subsampled_v /= delta
@@ -314,7 +317,7 @@ def identify_sweep_for_isi_shape(sweeps, features, duration, min_spike=5):
         -------
         selected_sweep: Sweep
             Sweep object for ISI shape calculation
-        selected_spike_info: DataFrame
+        selected_spike_info: SpikeTable
             Spike info for selected sweep
     """
     sweep_table = features["sweeps"]
@@ -354,7 +357,7 @@ def isi_shape(sweep, spike_info, end, n_points=100, steady_state_interval=0.1,
         ----------
         sweep: Sweep
             Sweep object with at least one action potential
-        spike_info: DataFrame
+        spike_info: SpikeTable or DataFrame
             Spike info for sweep
         end: float
             End of stimulus interval (seconds)
@@ -379,9 +382,9 @@ def isi_shape(sweep, spike_info, end, n_points=100, steady_state_interval=0.1,
     n_spikes = spike_info.shape[0]
 
     if n_spikes > 1:
-        threshold_indexes = spike_info["threshold_index"].values
-        threshold_voltages = spike_info["threshold_v"].values
-        fast_trough_indexes = spike_info["fast_trough_index"].values
+        threshold_indexes = np.asarray(spike_info["threshold_index"])
+        threshold_voltages = np.asarray(spike_info["threshold_v"])
+        fast_trough_indexes = np.asarray(spike_info["fast_trough_index"])
         isi_list = []
         for start_index, end_index, thresh_v in zip(fast_trough_indexes[:-1], threshold_indexes[1:], threshold_voltages[:-1]):
             isi_raw = sweep.v[int(start_index):int(end_index)] - thresh_v
@@ -397,11 +400,12 @@ def isi_shape(sweep, spike_info, end, n_points=100, steady_state_interval=0.1,
         threshold_v = spike_info["threshold_v"][0]
         fast_trough_index = spike_info["fast_trough_index"].astype(int)[0]
         fast_trough_t = spike_info["fast_trough_t"][0]
-        stim_end_index = tsu.find_time_index(sweep.t, end)
+        t = sweep.time_base
+        stim_end_index = tsu.find_time_index(t, end)
         if fast_trough_t < end - steady_state_interval:
-            max_end_index = tsu.find_time_index(sweep.t, sweep.t[fast_trough_index] + single_max_duration)
+            max_end_index = tsu.find_time_index(t, t[fast_trough_index] + single_max_duration)
 
-            std_start_index = tsu.find_time_index(sweep.t, end - steady_state_interval)
+            std_start_index = tsu.find_time_index(t, end - steady_state_interval)
             steady_state_v = sweep.v[std_start_index:stim_end_index].mean()
             above_ss_ind = np.flatnonzero(sweep.v[fast_trough_index:] >= steady_state_v - single_return_tolerance)
 
@@ -440,7 +444,7 @@ def first_ap_vectors(sweeps_list, spike_info_list,
     sweeps_list: list
         List of Sweep objects
     spike_info_list: list
-        List of spike info DataFrames
+        List of spike info SpikeTables or DataFrames
     target_sampling_rate: float (optional, default 50000)
         Desired sampling rate of output (Hz)
     window_length: float (optional, default 0.003)
@@ -458,7 +462,7 @@ def first_ap_vectors(sweeps_list, spike_info_list,
         nonclipped_sweeps_list = []
         nonclipped_spike_info_list = []
         for swp, si in zip(sweeps_list, spike_info_list):
-            if not si["clipped"].values[0]:
+            if not np.asarray(si["clipped"])[0]:
                 nonclipped_sweeps_list.append(swp)
                 nonclipped_spike_info_list.append(si)
         sweeps_list = nonclipped_sweeps_list
@@ -470,7 +474,8 @@ def first_ap_vectors(sweeps_list, spike_info_list,
         return zero_v, np.diff(zero_v)
 
     swp = sweeps_list[0]
-    sampling_rate = int(np.rint(1. / (swp.t[1] - swp.t[0])))
+    t = swp.time_base
+    sampling_rate = int(np.rint(1. / (t[1] - t[0])))
     length_in_points = int(sampling_rate * window_length)
 
     ap_list = []
@@ -526,7 +531,8 @@ def noise_ap_features(noise_sweeps,
         features_list.append(analysis.analyze(noise_sweeps))
 
     swp = noise_sweeps.sweeps[0]
-    sampling_rate = int(np.rint(1. / (swp.t[1] - swp.t[0])))
+    t = swp.time_base
+    sampling_rate = int(np.rint(1. / (t[1] - t[0])))
     length_in_points = int(sampling_rate * window_length)
     avg_ap_list = []
     for i, sweep in enumerate(noise_sweeps.sweeps):
@@ -539,7 +545,7 @@ def noise_ap_features(noise_sweeps,
             if len(spikes) <= skip_first_n:
                 continue
 
-            spike_indexes = np.hstack([spike_indexes, spikes["threshold_index"].values[skip_first_n:]])
+            spike_indexes = np.hstack([spike_indexes, np.asarray(spikes["threshold_index"])[skip_first_n:]])
 
         if len(spike_indexes) > 0:
             avg_ap_list.append(_avg_ap_waveform(sweep, spike_indexes, length_in_points))
@@ -567,8 +573,8 @@ def first_ap_waveform(sweep, spikes, length_in_points):
     ----------
     sweep: Sweep
         Sweep object with spikes
-    spikes: DataFrame
-        Spike info dataframe with "threshold_index" column
+    spikes: SpikeTable or DataFrame
+        Spike info with "threshold_index" column
     length_in_points: int
         Length of returned AP waveform
 
@@ -704,7 +710,7 @@ def psth_vector(spike_info_list, start, end, width=50):
     Parameters
     ----------
     spike_info_list: list
-        Spike info DataFrames for each sweep
+        Spike info SpikeTables or DataFrames for each sweep
     start: float
         Start of stimulus interval (seconds)
     end: float
@@ -748,7 +754,7 @@ def inst_freq_vector(spike_info_list, start, end, width=20):
     Parameters
     ----------
     spike_info_list: list
-        Spike info DataFrames for each sweep
+        Spike info SpikeTables or DataFrames for each sweep
     start: float
         Start of stimulus interval (seconds)
     end: float
@@ -768,7 +774,7 @@ def inst_freq_vector(spike_info_list, start, end, width=20):
         if si is None:
             vector_list.append(None)
             continue
-        thresh_t = si["threshold_t"].values
+        thresh_t = np.asarray(si["threshold_t"])
         inst_freq, inst_freq_times = _inst_freq_feature(thresh_t, start, end)
 
         one_ms = 0.001
@@ -799,7 +805,7 @@ def spike_feature_vector(feature, spike_info_list, start, end, width=20):
     feature: string
         Name of feature found in members of spike_info_list
     spike_info_list: list
-        Spike info DataFrames for each sweep
+        Spike info SpikeTables or DataFrames for each sweep
     start: float
         Start of stimulus interval (seconds)
     end: float
@@ -818,13 +824,13 @@ def spike_feature_vector(feature, spike_info_list, start, end, width=20):
         if si is None:
             vector_list.append(None)
             continue
-        thresh_t = si["threshold_t"].values
+        thresh_t = np.asarray(si["threshold_t"])
         if feature not in si.columns:
-            logging.warning("Requested feature {} not found in supplied dataframe".format(feature))
+            logging.warning("Requested feature {} not found in supplied spike info".format(feature))
             feature_values = np.zeros_like(thresh_t)
         else:
-            feature_values = si[feature].values
-            mask = ~si["clipped"].values
+            feature_values = np.asarray(si[feature])
+            mask = ~np.asarray(si["clipped"])
             thresh_t = thresh_t[mask]
             feature_values = feature_values[mask]
 
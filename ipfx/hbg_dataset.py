@@ -7,9 +7,14 @@ from .ephys_data_set import EphysDataSet
 
 
 class HBGDataSet(EphysDataSet):
-    def __init__(self, sweep_info=None, nwb_file=None, ontology=None, api_sweeps=True, validate_stim=True):
+    def __init__(self, sweep_info=None, nwb_file=None, ontology=None, api_sweeps=True, validate_stim=True,
+                 sweep_map=None, sweep_index=None):
         super(HBGDataSet, self).__init__(ontology, validate_stim)
-        self._nwb_data = nwb_reader.create_nwb_reader(nwb_file)
+        self._nwb_data = nwb_reader.create_nwb_reader(nwb_file, sweep_map)
+
+        if sweep_index is not None:
+            self.build_sweep_table_from_index(sweep_index)
+            return
 
         if sweep_info is None:
             sweep_info = self.extract_sweep_stim_info()
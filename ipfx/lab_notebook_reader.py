@@ -1,11 +1,14 @@
 import h5py
-import math
+import numpy as np
 from ipfx.py2to3 import to_str
 
 
 class LabNotebookReader(object):
     def __init__(self):
         self.register_enabled_names()
+        # notebook lookups, built on first use from the notebook arrays
+        self._field_columns = None
+        self._index = {}
 
     # mapping of notebook keys to keys representing if that value is
     #   enabled
@@ -27,91 +30,111 @@ class LabNotebookReader(object):
     #   for text data. this is an internal function to fetch data from
     #   the numeric part of the notebook
     def get_numeric_value(self, name, data_col, sweep_col, enable_col, sweep_num, default_val):
-        data = self.val_number
-        # val_number has 3 dimensions -- the first has a shape of
-        #   (#fields * 9). there are many hundreds of elements in this
-        #   dimension. they look to represent the full array of values
-        #   (for each field for each multipatch) for a given point in
-        #   time, and thus given sweep
-        # according to Thomas Braun (igor nwb dev), the first 8 pages are
-        #   for headstage data, and the 9th is for headstage-independent
-        #   data
+        key = ("numeric", data_col, sweep_col, enable_col)
+        if key not in self._index:
+            data = self.val_number
+            # val_number has 3 dimensions -- the first has a shape of
+            #   (#fields * 9). there are many hundreds of elements in this
+            #   dimension. they look to represent the full array of values
+            #   (for each field for each multipatch) for a given point in
+            #   time, and thus given sweep
+            # according to Thomas Braun (igor nwb dev), the first 8 pages are
+            #   for headstage data, and the 9th is for headstage-independent
+            #   data
+            sweeps = data[:, sweep_col, 0]
+            values = data[:, data_col, 0]
+            valid = ~np.isnan(sweeps) & ~np.isnan(values)
+            if enable_col is not None:
+                valid &= data[:, enable_col, 0] == 1.0 # 'enable' flag present and it's turned on
+            self._index[key] = last_value_per_sweep(sweeps[valid].astype(int), values[valid])
+
         # return value is last non-empty entry in specified column
         #   for specified sweep number
-        return_val = default_val
-        for sample in data:
-            swp = sample[sweep_col][0]
-            if math.isnan(swp):
-                continue
-            if int(swp) == sweep_num:
-                if enable_col is not None and sample[enable_col][0] != 1.0:
-                    continue # 'enable' flag present and it's turned off
-                val = sample[data_col][0]
-                if not math.isnan(val):
-                    return_val = val
-        return return_val
+        return self._index[key].get(int(sweep_num), default_val)
 
     # internal function for fetching data from the text part of the notebook
     def get_text_value(self, name, data_col, sweep_col, enable_col, sweep_num, default_val):
-        data = self.val_text
-        # algorithm mirrors get_numeric_value
+        key = ("text", data_col, sweep_col)
+        if key not in self._index:
+            data = self.val_text
+            # algorithm mirrors get_numeric_value
+            # an 'enable' flag is not expected for text values, and as this
+            #   situation hasn't been tested (eg, is enabled indicated by 1.0,
+            #   or "1.0" or "true" or ??) it is ignored
+            sweeps = data[:, sweep_col, 0]
+            values = data[:, data_col, 0]
+            valid = np.array([len(swp) > 0 and len(val) > 0 for swp, val in zip(sweeps, values)], dtype=bool)
+            sweep_nums = np.array([int(swp) for swp in sweeps[valid]], dtype=int)
+            self._index[key] = last_value_per_sweep(sweep_nums, values[valid])
+
         # return value is last non-empty entry in specified column
         #   for specified sweep number
-        return_val = default_val
-        for sample in data:
-            swp = sample[sweep_col][0]
-            if len(swp) == 0:
-                continue
-            if int(swp) == int(sweep_num):
-                if enable_col is not None: # and sample[enable_col][0] != 1.0:
-                    # this shouldn't happen, but if it does then bitch
-                    #   as this situation hasn't been tested (eg, is
-                    #   enabled indicated by 1.0, or "1.0" or "true" or ??)
-                    Exception("Enable flag not expected for text values")
-                    #continue # 'enable' flag present and it's turned off
-                val = sample[data_col][0]
-                if len(val) > 0:
-                    return_val = val
-        return return_val
+        return self._index[key].get(int(sweep_num), default_val)
+
+    # notebook field names mapped to their column, decoded once
+    def get_field_columns(self):
+        if self._field_columns is None:
+            # name_number has 3 dimensions -- the first has shape
+            #   (#fields * 9) and stores the key names. the second looks
+            #   to store units for those keys. The third is numeric text
+            #   but it's role isn't clear
+            self._field_columns = tuple(
+                {name: col for col, name in reversed(list(enumerate(to_str(c) for c in colnames[0])))}
+                for colnames in (self.colname_number, self.colname_text))
+        return self._field_columns
 
     # looks for key in lab notebook and returns the value associated with
     #   the specified sweep, or the default value if no value is found
     #   (NaN and empty strings are considered to be non-values)
     def get_value(self, name, sweep_num, default_val):
-        # name_number has 3 dimensions -- the first has shape
-        #   (#fields * 9) and stores the key names. the second looks
-        #   to store units for those keys. The third is numeric text
-        #   but it's role isn't clear
-        numeric_fields = [to_str(c) for c in self.colname_number[0]]
-        text_fields = [to_str(c) for c in self.colname_text[0]]
-        # val_number has 3 dimensions -- the first has a shape of
-        #   (#fields * 9). there are many hundreds of elements in this
-        #   dimension. they look to represent the full array of values
-        #   (for each field for each multipatch) for a given point in
-        #   time, and thus given sweep
+        numeric_fields, text_fields = self.get_field_columns()
         if name in numeric_fields:
-            sweep_idx = numeric_fields.index("SweepNum")
+            sweep_idx = numeric_fields["SweepNum"]
             enable_idx = None
             if name in self.enabled:
                 enable_col = self.enabled[name]
-                enable_idx = numeric_fields.index(enable_col)
-            field_idx = numeric_fields.index(name)
+                enable_idx = numeric_fields[enable_col]
+            field_idx = numeric_fields[name]
             return self.get_numeric_value(name, field_idx, sweep_idx, enable_idx, sweep_num, default_val)
         elif name in text_fields:
             # first check to see if file includes old version of column name
             if "Sweep #" in text_fields:
-                sweep_idx = text_fields.index("Sweep #")
+                sweep_idx = text_fields["Sweep #"]
             else:
-                sweep_idx = text_fields.index("SweepNum")
+                sweep_idx = text_fields["SweepNum"]
             enable_idx = None
             if name in self.enabled:
                 enable_col = self.enabled[name]
-                enable_idx = text_fields.index(enable_col)
-            field_idx = text_fields.index(name)
+                enable_idx = text_fields[enable_col]
+            field_idx = text_fields[name]
             return self.get_text_value(name, field_idx, sweep_idx, enable_idx, sweep_num, default_val)
         else:
             return default_val
 
+    # bulk version of get_value, returns a list with the value of each sweep
+    def get_values(self, name, sweep_nums, default_val):
+        return [self.get_value(name, sweep_num, default_val) for sweep_num in sweep_nums]
+
+
+def last_value_per_sweep(sweep_nums, values):
+    """
+    Map every sweep number to its value in the last notebook row of that sweep
+
+    Parameters
+    ----------
+    sweep_nums: np.ndarray of int
+        sweep number of each row
+    values: np.ndarray
+        value of each row
+
+    Returns
+    -------
+    dict of sweep number to value
+    """
+    unique_sweep_nums, last_rows = np.unique(sweep_nums[::-1], return_index=True)
+    last_rows = len(sweep_nums) - 1 - last_rows
+    return dict(zip(unique_sweep_nums.tolist(), values[last_rows]))
+
 
 
 """ Loads lab notebook data out of a first-generation IVSCC NWB file,
@@ -1,9 +1,8 @@
 import os
-import pynwb
+import h5py
+import numpy as np
 from allensdk.core.nwb_data_set import NwbDataSet
 import ipfx.nwb_reader as nwb_reader
-from pynwb import TimeSeries
-from pynwb import ProcessingModule
 
 
 class NwbAppender(object):
@@ -34,28 +33,66 @@ class Nwb1Appender(NwbAppender):
 
 
 class Nwb2Appender(NwbAppender):
+    """
+    Writes the spike times into the processing module "spikes" of an NWB 2 file in place.
 
-    def __init__(self, nwb_file_name):
-        NwbAppender.__init__(self, nwb_file_name)
-
-        io = pynwb.NWBHDF5IO(self.nwb_file_name, 'a')
-        self.nwbfile = io.read()
-        io.close()
-
-    def add_spike_times(self, sweep_spike_times):
-
-        spike_module = ProcessingModule(name='spikes',
-                                        description='detected spikes')
+    Only the module and its TimeSeries are written, the rest of the file is not copied.
+    """
 
-        for sweep_num, spike_times in sweep_spike_times.items():
-            ts = TimeSeries(timestamps=spike_times, name=f"Sweep_{sweep_num}")
-            spike_module.add_data_interface(ts)
+    spike_module_path = "processing/spikes"
 
-        self.nwbfile.add_processing_module(spike_module)
+    def __init__(self, nwb_file_name):
+        NwbAppender.__init__(self, nwb_file_name)
 
-        io = pynwb.NWBHDF5IO(self.nwb_file_name, 'w')
-        io.write(self.nwbfile)
-        io.close()
+    def add_spike_times(self, sweep_spike_times, replace=False):
+        """
+        Parameters
+        ----------
+        sweep_spike_times: dict
+            spike times of the sweeps keyed by sweep number
+        replace: bool
+            remove the spike times of all sweeps already in the file first. Otherwise
+            only the spike times of the sweeps in `sweep_spike_times` are replaced.
+        """
+
+        with h5py.File(self.nwb_file_name, 'a') as f:
+            if replace and self.spike_module_path in f:
+                del f[self.spike_module_path]
+
+            if self.spike_module_path in f:
+                spike_module = f[self.spike_module_path]
+            else:
+                spike_module = f.create_group(self.spike_module_path)
+                spike_module.attrs.update({"namespace": "core",
+                                           "neurodata_type": "ProcessingModule",
+                                           "description": "detected spikes"})
+
+            for sweep_num, spike_times in sweep_spike_times.items():
+                name = f"Sweep_{sweep_num}"
+                if name in spike_module:
+                    del spike_module[name]
+
+                self.write_spike_time_series(spike_module.create_group(name), spike_times)
+
+    @staticmethod
+    def write_spike_time_series(group, spike_times):
+        """
+        Write the spike times as a TimeSeries into `group`. NWB 2 requires data
+        in a TimeSeries, which holds the spike times as well.
+        """
+
+        spike_times = np.asarray(spike_times, dtype=np.float64)
+
+        group.attrs.update({"namespace": "core",
+                            "neurodata_type": "TimeSeries",
+                            "description": "no description",
+                            "comments": "no comments"})
+
+        data = group.create_dataset("data", data=spike_times)
+        data.attrs.update({"unit": "seconds", "conversion": 1.0, "resolution": -1.0})
+
+        timestamps = group.create_dataset("timestamps", data=spike_times)
+        timestamps.attrs.update({"unit": "seconds", "interval": 1})
 
 
 def create_nwb_appender(nwb_file):
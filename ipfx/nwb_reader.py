@@ -31,12 +31,184 @@ def get_scalar_value(dataset_from_nwb):
     return dataset_from_nwb
 
 
+def memmap_dataset(dataset):
+    """
+    Map the samples of a dataset stored contiguously in the file into memory
+
+    Only uncompressed, unchunked datasets of numbers, which are stored as one block
+    of raw samples at a fixed offset of a plain (sec2 driver, no userblock) file, can be mapped.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+
+    Returns
+    -------
+    read-only np.memmap of the samples, or None if the dataset can not be mapped
+    """
+    f = dataset.file
+    if (dataset.chunks is not None or dataset.external is not None or dataset.dtype.kind not in "fiu"
+            or f.driver != "sec2" or f.userblock_size != 0):
+        return None
+
+    offset = dataset.id.get_offset()
+    if offset is None:  # no storage allocated yet
+        return None
+
+    return np.memmap(f.filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape)
+
+
+def read_dataset(dataset, index_range=None, dtype=None, mapped=None):
+    """
+    Read the samples of a dataset
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+    index_range: tuple of (start index, end index) of the samples to read, both included.
+        Reads all samples if None.
+    dtype: numpy dtype the samples are converted to by HDF5 while reading (optional, stored dtype by default)
+    mapped: np.memmap of the dataset as returned by `memmap_dataset` (optional)
+        If given, the samples are taken from the memory map, so that only the pages
+        of the samples in `index_range` are read.
+
+    Returns
+    -------
+    numpy array. Samples taken from `mapped` without a dtype conversion are a
+    read-only view of the memory map and are not copied.
+    """
+    if mapped is not None:
+        if index_range is not None:
+            start, end = index_range
+            mapped = mapped[start:end + 1]
+        if dtype is None or mapped.dtype == dtype:
+            return mapped
+        return mapped.astype(dtype)
+
+    if dtype is not None and dataset.dtype != dtype:
+        dataset = dataset.astype(dtype)
+
+    if index_range is None:
+        return dataset[...]
+
+    start, end = index_range
+    return dataset[start:end + 1]
+
+
+def read_scaled_dataset(dataset, conversion, index_range=None, dtype=None, mapped=None):
+    """
+    Read the samples of a dataset multiplied by `conversion`
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+    conversion: float
+    index_range: tuple of (start index, end index) of the samples to read, both included (optional)
+    dtype: numpy floating point dtype of the result (optional)
+        If given, the samples are read as `dtype` and scaled in place, without
+        an intermediate array. Otherwise the dtype follows from the stored one.
+    mapped: np.memmap of the dataset as returned by `memmap_dataset` (optional)
+        If given, the samples are taken from the memory map. With a `conversion`
+        of 1 and no dtype conversion the read-only view of the memory map is
+        returned, otherwise the samples are scaled straight out of it.
+
+    Returns
+    -------
+    numpy array
+    """
+    if mapped is not None:
+        data = read_dataset(dataset, index_range, mapped=mapped)
+        if conversion == 1 and (dtype is None or data.dtype == dtype):
+            return data
+        return np.multiply(data, conversion, dtype=dtype)
+
+    if dtype is None:
+        return read_dataset(dataset, index_range) * conversion
+
+    data = read_dataset(dataset, index_range, dtype)
+    data *= conversion
+    return data
+
+
 class NwbReader(object):
+    """
+    Base class of the NWB readers.
+
+    A reader keeps a single read-only h5py handle open for its lifetime instead of
+    reopening the file for every lookup. Close it with `close()` or use the reader
+    as a context manager.
+    """
 
     def __init__(self, nwb_file):
         self.nwb_file = nwb_file
+        self._h5_file = None
+        self._group_keys = {}
+        self._pipeline_version = None
+        # read contiguous datasets through a memory map of the file
+        self.use_memmap = False
+        self._memmaps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def h5_file(self):
+        """Open h5py.File of the nwb file, (re)opened on first use"""
+        if self._h5_file is None or not self._h5_file.id.valid:
+            self._h5_file = h5py.File(self.nwb_file, 'r')
+            self._group_keys = {}
+        return self._h5_file
+
+    def close(self):
+        """
+        Close the file handle. The file is opened again if the reader is used afterwards.
+        """
+        if self._h5_file is not None:
+            self._h5_file.close()
+            self._h5_file = None
+        self._group_keys = {}
+        self._memmaps = {}
+
+    def get_group_keys(self, path):
+        """
+        Names of the members of the group at `path`, read once per open file
+
+        Parameters
+        ----------
+        path: str
+            path of the group in the nwb file
+
+        Returns
+        -------
+        list of str, empty if there is no group at `path`
+        """
+        f = self.h5_file
+        if path not in self._group_keys:
+            self._group_keys[path] = list(f[path].keys()) if path in f else []
+        return list(self._group_keys[path])
+
+    def get_memmap(self, dataset):
+        """
+        Memory map of a dataset if `use_memmap` is set, created once per dataset
 
-    def get_sweep_data(self, sweep_number):
+        Parameters
+        ----------
+        dataset: h5py.Dataset
+
+        Returns
+        -------
+        read-only np.memmap of the samples, or None if memory maps are not used or the dataset can not be mapped
+        """
+        if not self.use_memmap:
+            return None
+        if dataset.name not in self._memmaps:
+            self._memmaps[dataset.name] = memmap_dataset(dataset)
+        return self._memmaps[dataset.name]
+
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
         raise NotImplementedError
 
     def get_acquisition(self,sweep_number):
@@ -65,13 +237,13 @@ class NwbReader(object):
             use date format "%Y-%m-%d %H:%M:%S", drop timezone info
         """
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            if isinstance(f["session_start_time"][()],np.ndarray): # if ndarray
-                session_start_time = f["session_start_time"][()][-1]
-            else:
-                session_start_time = f["session_start_time"][()] # otherwise
+        f = self.h5_file
+        if isinstance(f["session_start_time"][()],np.ndarray): # if ndarray
+            session_start_time = f["session_start_time"][()][-1]
+        else:
+            session_start_time = f["session_start_time"][()] # otherwise
 
-            datetime_object = parser.parse(session_start_time)
+        datetime_object = parser.parse(session_start_time)
 
         return datetime_object
 
@@ -87,14 +259,14 @@ class NwbReader(object):
 
         sweep_map = self.get_sweep_map(sweep_number)
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep_stimulus = f[self.stimulus_path][sweep_map["stimulus_group"]]
-            stimulus_dataset = sweep_stimulus["data"]
+        f = self.h5_file
+        sweep_stimulus = f[self.stimulus_path][sweep_map["stimulus_group"]]
+        stimulus_dataset = sweep_stimulus["data"]
 
-            unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
-            unit_str = NwbReader.get_long_unit_name(unit)
+        unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
+        unit_str = NwbReader.get_long_unit_name(unit)
 
-            return unit_str
+        return unit_str
 
     @staticmethod
     def get_unit_name(stim_attrs):
@@ -132,50 +304,50 @@ class NwbReader(object):
         assumed_sweep_number if given.
         """
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            timeseries = f[self.acquisition_path][sweep_name]
+        f = self.h5_file
+        timeseries = f[self.acquisition_path][sweep_name]
 
-            real_sweep_number = None
+        real_sweep_number = None
 
-            def read_sweep_from_source(source):
-                source = get_scalar_value(source)
-                for x in source.split(";"):
-                    result = re.search(r"^Sweep=(\d+)$", x)
-                    if result:
-                        return int(result.group(1))
+        def read_sweep_from_source(source):
+            source = get_scalar_value(source)
+            for x in source.split(";"):
+                result = re.search(r"^Sweep=(\d+)$", x)
+                if result:
+                    return int(result.group(1))
 
-            if "source" in timeseries:
-                real_sweep_number = read_sweep_from_source(timeseries["source"][()])
-            elif "source" in timeseries.attrs:
-                real_sweep_number = read_sweep_from_source(timeseries.attrs["source"])
-            elif "sweep_number" in timeseries.attrs:
-                real_sweep_number = timeseries.attrs["sweep_number"]
+        if "source" in timeseries:
+            real_sweep_number = read_sweep_from_source(timeseries["source"][()])
+        elif "source" in timeseries.attrs:
+            real_sweep_number = read_sweep_from_source(timeseries.attrs["source"])
+        elif "sweep_number" in timeseries.attrs:
+            real_sweep_number = timeseries.attrs["sweep_number"]
 
-            if real_sweep_number is None:
-                warnings.warn("Sweep number not found, returning: None")
+        if real_sweep_number is None:
+            warnings.warn("Sweep number not found, returning: None")
 
-            return real_sweep_number
+        return real_sweep_number
 
 
     def get_starting_time(self, data_set_name):
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep_ts = f[self.acquisition_path][data_set_name]
-            return get_scalar_value(sweep_ts["starting_time"][()])
+        f = self.h5_file
+        sweep_ts = f[self.acquisition_path][data_set_name]
+        return get_scalar_value(sweep_ts["starting_time"][()])
 
     def get_sweep_attrs(self, sweep_number):
 
         acquisition_group = self.get_sweep_map(sweep_number)["acquisition_group"]
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep_ts = f[self.acquisition_path][acquisition_group]
-            attrs = dict(sweep_ts.attrs)
+        f = self.h5_file
+        sweep_ts = f[self.acquisition_path][acquisition_group]
+        attrs = dict(sweep_ts.attrs)
 
-            if self.nwb_major_version == 2:
-                for entry in sweep_ts.keys():
-                    if entry in ("data", "electrode"):
-                        continue
+        if self.nwb_major_version == 2:
+            for entry in sweep_ts.keys():
+                if entry in ("data", "electrode"):
+                    continue
 
-                    attrs[entry] = sweep_ts[entry][()]
+                attrs[entry] = sweep_ts[entry][()]
 
         return attrs
 
@@ -202,6 +374,20 @@ class NwbReader(object):
         if sweep_map:
             self.drop_reacquired_sweeps()
 
+    def init_sweep_map(self, sweep_map=None):
+        """
+        Use the records of a sweep map that was built before, or build the sweep map from the file
+
+        Parameters
+        ----------
+        sweep_map: list of dicts
+            records of `sweep_map_table` (optional)
+        """
+        if sweep_map is None:
+            self.build_sweep_map()
+        else:
+            self.sweep_map_table = pd.DataFrame.from_records(sweep_map)
+
     def drop_reacquired_sweeps(self):
         """
         If sweep was re-acquired, then drop earlier acquired sweep with the same sweep_number
@@ -218,10 +404,7 @@ class NwbReader(object):
 
     def get_sweep_names(self):
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep_names = [e for e in f[self.acquisition_path].keys()]
-
-        return sweep_names
+        return self.get_group_keys(self.acquisition_path)
 
     def get_sweep_map(self, sweep_number):
         """
@@ -242,22 +425,11 @@ class NwbReader(object):
 
     def get_acquisition_groups(self):
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            if self.acquisition_path in f:
-                acquisition_groups = [e for e in f[self.acquisition_path].keys()]
-            else:
-                acquisition_groups = []
-
-        return acquisition_groups
+        return self.get_group_keys(self.acquisition_path)
 
     def get_stimulus_groups(self):
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            if self.stimulus_path in f:
-                stimulus_groups = [e for e in f[self.stimulus_path].keys()]
-            else:
-                stimulus_groups = []
-        return stimulus_groups
+        return self.get_group_keys(self.stimulus_path)
 
 
     def get_pipeline_version(self):
@@ -270,17 +442,20 @@ class NwbReader(object):
             -------
             int tuple: (major, minor)
         """
+        if self._pipeline_version is not None:
+            return self._pipeline_version
+
         try:
-            with h5py.File(self.nwb_file, 'r') as f:
-                if 'generated_by' in f["general"]:
-                    info = f["general/generated_by"]
-                    # generated_by stores array of keys and values
-                    # keys are even numbered, corresponding values are in
-                    #   odd indices
-                    for i in range(len(info)):
-                        if to_str(info[i]) == 'version':
-                            version = to_str(info[i+1])
-                            break
+            f = self.h5_file
+            if 'generated_by' in f["general"]:
+                info = f["general/generated_by"]
+                # generated_by stores array of keys and values
+                # keys are even numbered, corresponding values are in
+                #   odd indices
+                for i in range(len(info)):
+                    if to_str(info[i]) == 'version':
+                        version = to_str(info[i+1])
+                        break
             toks = version.split('.')
             if len(toks) >= 2:
                 major = int(toks[0])
@@ -288,23 +463,52 @@ class NwbReader(object):
         except:  # noqa: E722
             minor = 0
             major = 0
-        return major, minor
+
+        self._pipeline_version = major, minor
+        return self._pipeline_version
 
 
 class NwbXReader(NwbReader):
     """
     Read data from NWB v2 files created by run_x_to_nwb_conversion.py from
     ABF/DAT files.
+
+    The sweep table, the series and the spike times are read with h5py. The pynwb `nwb`
+    file object, which takes long to build, is only read on first use of `nwb`.
     """
 
-    def __init__(self, nwb_file):
+    sweep_table_path = "general/intracellular_ephys/sweep_table"
+
+    response_types = tuple(t.__name__ for t in (VoltageClampSeries, CurrentClampSeries, IZeroClampSeries))
+    stimulus_types = tuple(t.__name__ for t in (VoltageClampStimulusSeries, CurrentClampStimulusSeries))
+
+    def __init__(self, nwb_file, sweep_map=None):
         NwbReader.__init__(self, nwb_file)
         self.acquisition_path = "acquisition"
         self.stimulus_path = "stimulus/presentation"
         self.nwb_major_version = 2
-        self.build_sweep_map()
-        io = NWBHDF5IO(nwb_file, mode='r')
-        self.nwb = io.read()
+        self.init_sweep_map(sweep_map)
+        self._nwb_io = None
+        self._nwb = None
+        self._sweep_series = None
+
+    @property
+    def nwb(self):
+        """pynwb NWBFile of the nwb file, read on first use"""
+        if self._nwb is None:
+            self._nwb_io = NWBHDF5IO(self.nwb_file, mode='r')
+            self._nwb = self._nwb_io.read()
+        return self._nwb
+
+    def close(self):
+        """
+        Close the file handles. The pynwb `nwb` file object can not be used afterwards.
+        """
+        NwbReader.close(self)
+        if self._nwb_io is not None:
+            self._nwb_io.close()
+            self._nwb_io = None
+            self._nwb = None
 
     def get_sweep_number(self, sweep_name):
         return self.get_real_sweep_number(sweep_name)
@@ -314,17 +518,40 @@ class NwbXReader(NwbReader):
 
     def get_spike_times(self, sweep_number):
 
-        spikes = self.nwb.get_processing_module('spikes')
-        sweep_spikes = spikes.get_data_interface(f"Sweep_{sweep_number}")
+        return self.h5_file[f"processing/spikes/Sweep_{sweep_number}/timestamps"][()]
+
+    def get_sweep_series(self, sweep_number):
+        """
+        References to the series of a sweep, from the sweep table which is read once
+
+        Parameters
+        ----------
+        sweep_number: int
 
-        return sweep_spikes.timestamps
+        Returns
+        -------
+        list of h5py.Reference, None if the sweep is not in the sweep table
+        """
+        if self._sweep_series is None:
+            sweep_table = self.h5_file[self.sweep_table_path]
+            sweep_numbers = sweep_table["sweep_number"][()]
+            series = sweep_table["series"][()]
+            series_end = sweep_table["series_index"][()]
+            series_start = np.concatenate(([0], series_end[:-1]))
+
+            self._sweep_series = {}
+            for number, start, end in zip(sweep_numbers, series_start, series_end):
+                self._sweep_series.setdefault(int(number), []).extend(series[start:end])
 
+        return self._sweep_series.get(int(sweep_number))
 
-    def get_sweep_data(self, sweep_number):
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
         """
         Parameters
         ----------
         sweep_number: int
+        index_range: tuple of (start index, end index) of the samples to read, both included (optional)
+        dtype: numpy floating point dtype of the stimulus and response (optional, follows the stored dtype by default)
         """
 
         if not isinstance(sweep_number, (int, np.uint64, np.int64)):
@@ -348,10 +575,13 @@ class NwbXReader(NwbReader):
 
             return d
 
-        rawDataSourceType = getRawDataSourceType(self.nwb.experiment_description)
+        f = self.h5_file
+
+        experiment_description = to_str(get_scalar_value(f["general/experiment_description"][()]))
+        rawDataSourceType = getRawDataSourceType(experiment_description)
         assert not rawDataSourceType["unknown"], "Cannot handle data from this raw data source"
 
-        series = self.nwb.sweep_table.get_series(sweep_number)
+        series = self.get_sweep_series(sweep_number)
 
         if series is None:
             raise ValueError("No TimeSeries found for sweep number {}.".format(sweep_number))
@@ -360,32 +590,29 @@ class NwbXReader(NwbReader):
 
         response = None
         stimulus = None
-        for s in series:
+        for ref in series:
+            s = f[ref]
+            neurodata_type = to_str(s.attrs["neurodata_type"])
+            dataset = s["data"]
+            conversion = float(dataset.attrs["conversion"])
 
-            if isinstance(s, (VoltageClampSeries, CurrentClampSeries, IZeroClampSeries)):
+            if neurodata_type in self.response_types:
                 if response is not None:
                     raise ValueError("Found multiple response TimeSeries in NWB file for sweep number {}.".format(sweep_number))
 
-                response = s.data[:] * float(s.conversion)
-            elif isinstance(s, (VoltageClampStimulusSeries, CurrentClampStimulusSeries)):
+                response = read_scaled_dataset(dataset, conversion, index_range, dtype, self.get_memmap(dataset))
+
+            elif neurodata_type in self.stimulus_types:
                 if stimulus is not None:
                     raise ValueError("Found multiple stimulus TimeSeries in NWB file for sweep number {}.".format(sweep_number))
 
-                    response = s.data[:] * float(s.conversion)
-                    response_unit = NwbReader.get_long_unit_name(s.unit)
-                    NwbReader.validate_SI_unit(response_unit)
+                stimulus = read_scaled_dataset(dataset, conversion, index_range, dtype, self.get_memmap(dataset))
+                stimulus_unit = NwbReader.get_long_unit_name(NwbReader.get_unit_name(dataset.attrs))
+                NwbReader.validate_SI_unit(stimulus_unit)
 
-                elif isinstance(s, (VoltageClampStimulusSeries, CurrentClampStimulusSeries)):
-                    if stimulus is not None:
-                        raise ValueError("Found multiple stimulus TimeSeries in NWB file for sweep number {}.".format(sweep_number))
-
-                    stimulus = s.data[:] * float(s.conversion)
-                    stimulus_unit = NwbReader.get_long_unit_name(s.unit)
-                    NwbReader.validate_SI_unit(stimulus_unit)
-
-                    stimulus_rate = float(s.rate)
-                else:
-                    raise ValueError("Unexpected TimeSeries {}.".format(type(s)))
+                stimulus_rate = float(s["starting_time"].attrs["rate"])
+            else:
+                raise ValueError("Unexpected TimeSeries {}.".format(neurodata_type))
 
         if stimulus is None:
             raise ValueError("Could not find one stimulus TimeSeries for sweep number {}.".format(sweep_number))
@@ -406,52 +633,54 @@ class NwbPipelineReader(NwbReader):
     the original NWB generated by MIES.
     """
 
-    def __init__(self, nwb_file):
+    def __init__(self, nwb_file, sweep_map=None):
         NwbReader.__init__(self, nwb_file)
         self.acquisition_path = "acquisition/timeseries"
         self.stimulus_path = "stimulus/presentation"
         self.nwb_major_version = 1
-        self.build_sweep_map()
+        self.init_sweep_map(sweep_map)
 
-    def get_sweep_data(self, sweep_number):
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
         """
 
         Parameters
         ----------
         sweep_number: int
+        index_range: tuple of (start index, end index) of the samples to read, both included (optional)
+        dtype: numpy floating point dtype of the stimulus and response (optional, follows the stored dtype by default)
 
         Returns
         -------
         dict
             with values for 'stimulus', 'response', 'stimulus_unit', 'sampling_rate'
         """
-        with h5py.File(self.nwb_file, 'r') as f:
-
-            sweep_name = 'Sweep_%d' % sweep_number
-            swp = f['epochs'][sweep_name]
-
-            stimulus_dataset = swp['stimulus/timeseries']['data']
-            stimulus = self.convert_dataset_to_si_unit(stimulus_dataset)
-            stimulus_unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
-            stimulus_unit = NwbReader.get_long_unit_name(stimulus_unit)
-            NwbReader.validate_SI_unit(stimulus_unit)
-
-            response_dataset = swp['response/timeseries']['data']
-            response = self.convert_dataset_to_si_unit(response_dataset)
-            response_unit = NwbReader.get_unit_name(response_dataset.attrs)
-            response_unit = NwbReader.get_long_unit_name(response_unit)
-            NwbReader.validate_SI_unit(response_unit)
-
-            hz = 1.0 * swp['stimulus/timeseries']['starting_time'].attrs['rate']
-
-            return {
-                'stimulus': stimulus,
-                'response': response,
-                'stimulus_unit': stimulus_unit,
-                'sampling_rate': hz
-            }
+        f = self.h5_file
+
+        sweep_name = 'Sweep_%d' % sweep_number
+        swp = f['epochs'][sweep_name]
+
+        stimulus_dataset = swp['stimulus/timeseries']['data']
+        stimulus = self.convert_dataset_to_si_unit(stimulus_dataset, index_range, dtype)
+        stimulus_unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
+        stimulus_unit = NwbReader.get_long_unit_name(stimulus_unit)
+        NwbReader.validate_SI_unit(stimulus_unit)
+
+        response_dataset = swp['response/timeseries']['data']
+        response = self.convert_dataset_to_si_unit(response_dataset, index_range, dtype)
+        response_unit = NwbReader.get_unit_name(response_dataset.attrs)
+        response_unit = NwbReader.get_long_unit_name(response_unit)
+        NwbReader.validate_SI_unit(response_unit)
 
-    def convert_dataset_to_si_unit(self,dataset):
+        hz = 1.0 * swp['stimulus/timeseries']['starting_time'].attrs['rate']
+
+        return {
+            'stimulus': stimulus,
+            'response': response,
+            'stimulus_unit': stimulus_unit,
+            'sampling_rate': hz
+        }
+
+    def convert_dataset_to_si_unit(self, dataset, index_range=None, dtype=None):
         """
         fetch data from file and convert to correct SI unit
         this operation depends on file version. early versions of
@@ -463,6 +692,8 @@ class NwbPipelineReader(NwbReader):
         Parameters
         ----------
         dataset: dataset from nwb
+        index_range: tuple of (start index, end index) of the samples to read, both included (optional)
+        dtype: numpy floating point dtype of the result (optional, follows the stored dtype by default)
 
         Returns
         -------
@@ -474,9 +705,9 @@ class NwbPipelineReader(NwbReader):
 
         major, minor = self.get_pipeline_version()
         if (major == 1 and minor > 0) or major > 1:
-            dataset_si = dataset[...] * conversion
+            dataset_si = read_scaled_dataset(dataset, conversion, index_range, dtype, self.get_memmap(dataset))
         else:  # old file/pipeline version
-            dataset_si = dataset[...]
+            dataset_si = read_dataset(dataset, index_range, dtype, self.get_memmap(dataset))
         return dataset_si
 
     def get_sweep_number(self, sweep_name):
@@ -493,19 +724,19 @@ class NwbPipelineReader(NwbReader):
 
         names = ["aibs_stimulus_name", "aibs_stimulus_description"]
 
-        with h5py.File(self.nwb_file, 'r') as f:
+        f = self.h5_file
 
-            sweep_ts = f[self.acquisition_path][acquisition_group]
+        sweep_ts = f[self.acquisition_path][acquisition_group]
 
-            for stimulus_description in names:
-                if stimulus_description in sweep_ts.keys():
-                    stim_code_raw = sweep_ts[stimulus_description][()]
-                    stim_code = get_scalar_value(stim_code_raw)
+        for stimulus_description in names:
+            if stimulus_description in sweep_ts.keys():
+                stim_code_raw = sweep_ts[stimulus_description][()]
+                stim_code = get_scalar_value(stim_code_raw)
 
-                    if stim_code[-5:] == "_DA_0":
-                        return stim_code[:-5]
+                if stim_code[-5:] == "_DA_0":
+                    return stim_code[:-5]
 
-                    return stim_code
+                return stim_code
 
 
 class NwbMiesReader(NwbReader):
@@ -513,36 +744,50 @@ class NwbMiesReader(NwbReader):
     Reads data from the MIES generated NWB file
     """
 
-    def __init__(self, nwb_file):
+    def __init__(self, nwb_file, sweep_map=None):
         NwbReader.__init__(self, nwb_file)
         self.acquisition_path = "acquisition/timeseries"
         self.stimulus_path = "stimulus/presentation"
         self.nwb_major_version = 1
-        self.build_sweep_map()
+        self.init_sweep_map(sweep_map)
+
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
+        """
+        Parameters
+        ----------
+        sweep_number: int
+        index_range: tuple of (start index, end index) of the samples to read, both included (optional)
+        dtype: numpy floating point dtype of the stimulus and response (optional, follows the stored dtype by default)
 
-    def get_sweep_data(self, sweep_number):
+        Returns
+        -------
+        dict
+            with values for 'stimulus', 'response', 'stimulus_unit', 'sampling_rate'
+        """
 
         sweep_map = self.get_sweep_map(sweep_number)
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep_response = f[self.acquisition_path][sweep_map["acquisition_group"]]
-            response_dataset = sweep_response["data"]
-            response_unit = NwbReader.get_unit_name(response_dataset.attrs)
-            response_unit = NwbReader.get_long_unit_name(response_unit)
-            response_conversion = float(response_dataset.attrs["conversion"])
-            NwbReader.validate_SI_unit(response_unit)
+        f = self.h5_file
+        sweep_response = f[self.acquisition_path][sweep_map["acquisition_group"]]
+        response_dataset = sweep_response["data"]
+        response_unit = NwbReader.get_unit_name(response_dataset.attrs)
+        response_unit = NwbReader.get_long_unit_name(response_unit)
+        response_conversion = float(response_dataset.attrs["conversion"])
+        NwbReader.validate_SI_unit(response_unit)
 
-            sweep_stimulus = f[self.stimulus_path][sweep_map["stimulus_group"]]
-            stimulus_dataset = sweep_stimulus["data"]
-            stimulus_unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
-            stimulus_unit = NwbReader.get_long_unit_name(stimulus_unit)
-            stimulus_conversion = float(stimulus_dataset.attrs["conversion"])
-            NwbReader.validate_SI_unit(stimulus_unit)
+        sweep_stimulus = f[self.stimulus_path][sweep_map["stimulus_group"]]
+        stimulus_dataset = sweep_stimulus["data"]
+        stimulus_unit = NwbReader.get_unit_name(stimulus_dataset.attrs)
+        stimulus_unit = NwbReader.get_long_unit_name(stimulus_unit)
+        stimulus_conversion = float(stimulus_dataset.attrs["conversion"])
+        NwbReader.validate_SI_unit(stimulus_unit)
 
-            stimulus = stimulus_dataset[...] * stimulus_conversion
-            response = response_dataset[...] * response_conversion
+        stimulus = read_scaled_dataset(stimulus_dataset, stimulus_conversion, index_range, dtype,
+                                       self.get_memmap(stimulus_dataset))
+        response = read_scaled_dataset(response_dataset, response_conversion, index_range, dtype,
+                                       self.get_memmap(response_dataset))
 
-            hz = 1.0 * sweep_response["starting_time"].attrs['rate']
+        hz = 1.0 * sweep_response["starting_time"].attrs['rate']
 
         return {"stimulus": stimulus,
                 "response": response,
@@ -569,47 +814,47 @@ class NwbMiesReader(NwbReader):
 
         stimulus_description = "stimulus_description"
 
-        with h5py.File(self.nwb_file, 'r') as f:
+        f = self.h5_file
 
-            sweep_ts = f[self.acquisition_path][acquisition_group]
-            # look for the stimulus description
-            if stimulus_description in sweep_ts.keys():
-                stim_code_raw = sweep_ts[stimulus_description][()]
-                stim_code = get_scalar_value(stim_code_raw)
+        sweep_ts = f[self.acquisition_path][acquisition_group]
+        # look for the stimulus description
+        if stimulus_description in sweep_ts.keys():
+            stim_code_raw = sweep_ts[stimulus_description][()]
+            stim_code = get_scalar_value(stim_code_raw)
 
-                if stim_code[-5:] == "_DA_0":
-                    stim_code = stim_code[:-5]
+            if stim_code[-5:] == "_DA_0":
+                stim_code = stim_code[:-5]
 
         return stim_code
 
     def get_acquisition(self,sweep_number):
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep = f['acquisition']['timeseries']["data_%05d_AD0" % sweep_number]
-            data = sweep["data"][()]
-            rate = 1.0 * sweep["starting_time"].attrs['rate']
-            unit = sweep["data"].attrs["unit"]
-            conversion = sweep["data"].attrs["conversion"]
-            comment = sweep.attrs["comment"]
+        f = self.h5_file
+        sweep = f['acquisition']['timeseries']["data_%05d_AD0" % sweep_number]
+        data = sweep["data"][()]
+        rate = 1.0 * sweep["starting_time"].attrs['rate']
+        unit = sweep["data"].attrs["unit"]
+        conversion = sweep["data"].attrs["conversion"]
+        comment = sweep.attrs["comment"]
 
-            return {
-                "data": data,
-                "rate": rate,
-                "unit": unit,
-                "conversion": conversion,
-                "comment": comment,
-                }
+        return {
+            "data": data,
+            "rate": rate,
+            "unit": unit,
+            "conversion": conversion,
+            "comment": comment,
+            }
 
     def get_stimulus(self, sweep_number):
 
-        with h5py.File(self.nwb_file, 'r') as f:
-            sweep = f['stimulus']['presentation']["data_%05d_DA0" % sweep_number]
-            data = sweep["data"][()]
+        f = self.h5_file
+        sweep = f['stimulus']['presentation']["data_%05d_DA0" % sweep_number]
+        data = sweep["data"][()]
 
-            unit = sweep["data"].attrs["unit"]
-            rate = 1.0 * sweep["starting_time"].attrs['rate']
-            conversion = sweep["data"].attrs["conversion"]
-            comment = sweep.attrs["comment"]
+        unit = sweep["data"].attrs["unit"]
+        rate = 1.0 * sweep["starting_time"].attrs['rate']
+        conversion = sweep["data"].attrs["conversion"]
+        comment = sweep.attrs["comment"]
 
         return {
                 "data": data,
@@ -674,12 +919,13 @@ def get_nwb1_flavor(nwb_file):
     raise ValueError("Unknown sweep naming convention: %s" % sweep_naming_convention)
 
 
-def create_nwb_reader(nwb_file):
+def create_nwb_reader(nwb_file, sweep_map=None):
     """Create an appropriate reader of the nwb_file
 
     Parameters
     ----------
     nwb_file: str file name
+    sweep_map: list of dicts records of the sweep map, built from the file if None
 
     Returns
     -------
@@ -689,13 +935,13 @@ def create_nwb_reader(nwb_file):
     nwb_version = get_nwb_version(nwb_file)
 
     if nwb_version["major"] == 2:
-        return NwbXReader(nwb_file)
+        return NwbXReader(nwb_file, sweep_map)
     elif nwb_version["major"] == 1 or nwb_version["major"] == 0:
         nwb1_flavor = get_nwb1_flavor(nwb_file)
         if nwb1_flavor == "Mies":
-            return NwbMiesReader(nwb_file)
+            return NwbMiesReader(nwb_file, sweep_map)
         if nwb1_flavor == "Pipeline":
-            return NwbPipelineReader(nwb_file)
+            return NwbPipelineReader(nwb_file, sweep_map)
     else:
         raise ValueError("Unsupported or unknown NWB major" +
                          "version {} ({})".format(nwb_version["major"], nwb_version["full"]))
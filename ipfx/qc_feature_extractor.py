@@ -2,6 +2,7 @@ from . import stim_features as stf
 from . import epochs as ep
 from . import error as er
 import logging
+from contextlib import closing
 import numpy as np
 from . import qc_features as qcf
 
@@ -260,7 +261,21 @@ def cell_qc_features(data_set, manual_values=None):
     return features, tags
 
 
-def sweep_qc_features(data_set):
+def sweep_qc_features(data_set, prefetch=0):
+    """
+    Compute QC features of the current clamp sweeps
+
+    Parameters
+    ----------
+    data_set: EphysDataSet
+    prefetch: int
+        number of upcoming sweeps read in the background while a sweep is analyzed
+        (optional, default 0 to read them when needed)
+
+    Returns
+    -------
+    list of dicts of the sweep features
+    """
 
     ontology = data_set.ontology
     sweeps_features = []
@@ -270,26 +285,29 @@ def sweep_qc_features(data_set):
     if len(iclamp_sweeps.index) == 0:
         logging.warning("No current clamp sweeps available to compute QC features")
 
-    for sweep_info in iclamp_sweeps.to_dict(orient='records'):
-        sweep_features = {}
-        sweep_features.update(sweep_info)
+    sweep_infos = iclamp_sweeps.to_dict(orient='records')
+    sweeps = data_set.iter_sweeps([sweep_info['sweep_number'] for sweep_info in sweep_infos], prefetch=prefetch)
+
+    with closing(sweeps):
+        for sweep_info, sweep in zip(sweep_infos, sweeps):
+            sweep_features = {}
+            sweep_features.update(sweep_info)
 
-        sweep_num = sweep_info['sweep_number']
-        sweep = data_set.sweep(sweep_num)
-        is_ramp = sweep_info['stimulus_name'] in ontology.ramp_names
-        tags = check_sweep_integrity(sweep, is_ramp)
-        sweep_features["tags"] = tags
+            sweep_num = sweep_info['sweep_number']
+            is_ramp = sweep_info['stimulus_name'] in ontology.ramp_names
+            tags = check_sweep_integrity(sweep, is_ramp)
+            sweep_features["tags"] = tags
 
-        stim_features = current_clamp_sweep_stim_features(sweep)
-        sweep_features.update(stim_features)
+            stim_features = current_clamp_sweep_stim_features(sweep)
+            sweep_features.update(stim_features)
 
-        if not tags:
-            qc_features = current_clamp_sweep_qc_features(sweep, is_ramp)
-            sweep_features.update(qc_features)
-        else:
-            logging.warning("sweep {}: {}".format(sweep_num, tags))
+            if not tags:
+                qc_features = current_clamp_sweep_qc_features(sweep, is_ramp)
+                sweep_features.update(qc_features)
+            else:
+                logging.warning("sweep {}: {}".format(sweep_num, tags))
 
-        sweeps_features.append(sweep_features)
+            sweeps_features.append(sweep_features)
 
     return sweeps_features
 
@@ -315,7 +333,7 @@ def current_clamp_sweep_stim_features(sweep):
     stim_features = {}
 
     i = sweep.i
-    t = sweep.t
+    t = sweep.time_base
     hz = sweep.sampling_rate
     start_time, dur, amp, start_idx, end_idx = stf.get_stim_characteristics(i, t)
 
@@ -4,13 +4,25 @@ import logging
 from . import time_series_utils as tsu
 from . import error as er
 
+# Implementations of the per-spike window searches (argmax/argmin over one window per spike):
+# "loop" evaluates one window at a time, "reduceat" evaluates all windows at once.
+# "reduceat" is faster for many short windows (e.g. hundreds of spikes per sweep), "loop" for a few long ones.
+WINDOW_SEARCH_BACKENDS = ("loop", "reduceat")
+
+
+def _check_window_search_backend(backend):
+    if backend not in WINDOW_SEARCH_BACKENDS:
+        raise ValueError("Unknown window search backend {}, expected one of {}".format(
+            backend, WINDOW_SEARCH_BACKENDS))
+
+
 def detect_putative_spikes(v, t, start=None, end=None, filter=10., dv_cutoff=20., dvdt=None):
     """Perform initial detection of spikes and return their indexes.
 
     Parameters
     ----------
     v : numpy array of voltage time series in mV
-    t : numpy array of times in seconds
+    t : numpy array of times in seconds or TimeAxis
     start : start of time window for spike detection (optional)
     end : end of time window for spike detection (optional)
     filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
@@ -25,8 +37,8 @@ def detect_putative_spikes(v, t, start=None, end=None, filter=10., dv_cutoff=20.
     if not isinstance(v, np.ndarray):
         raise TypeError("v is not an np.ndarray")
 
-    if not isinstance(t, np.ndarray):
-        raise TypeError("t is not an np.ndarray")
+    if not isinstance(t, (np.ndarray, tsu.TimeAxis)):
+        raise TypeError("t is neither an np.ndarray nor a TimeAxis")
 
     if v.shape != t.shape:
         raise er.FeatureError("Voltage and time series do not have the same dimensions")
@@ -40,7 +52,7 @@ def detect_putative_spikes(v, t, start=None, end=None, filter=10., dv_cutoff=20.
     start_index = tsu.find_time_index(t, start)
     end_index = tsu.find_time_index(t, end)
     v_window = v[start_index:end_index + 1]
-    t_window = t[start_index:end_index + 1]
+    t_window = tsu.time_window(t, start_index, end_index)
 
     if dvdt is None:
         dvdt = tsu.calculate_dvdt(v_window, t_window, filter)
@@ -50,19 +62,120 @@ def detect_putative_spikes(v, t, start=None, end=None, filter=10., dv_cutoff=20.
     # Find positive-going crossings of dV/dt cutoff level
     putative_spikes = np.flatnonzero(np.diff(np.greater_equal(dvdt, dv_cutoff).astype(int)) == 1)
 
-    if len(putative_spikes) <= 1:
-        # Set back to original index space (not just window)
-        return np.array(putative_spikes) + start_index
-
-    # Only keep spike times if dV/dt has dropped all the way to zero between putative spikes
-    putative_spikes = [putative_spikes[0]] + [s for i, s in enumerate(putative_spikes[1:])
-        if np.any(dvdt[putative_spikes[i]:s] < 0)]
+    putative_spikes = drop_spikes_without_dvdt_reset(dvdt, putative_spikes)
 
     # Set back to original index space (not just window)
     return np.array(putative_spikes) + start_index
 
 
-def find_peak_indexes(v, t, spike_indexes, end=None):
+def detect_putative_spikes_batch(v, t, start=None, end=None, filter=10., dv_cutoff=20., dvdt=None):
+    """Perform initial detection of spikes in a set of equal-length sweeps.
+
+    All sweeps share the time array `t`, so that filtering, differentiation and
+    the search for dV/dt threshold crossings are done for every sweep at once.
+
+    Parameters
+    ----------
+    v : 2-D numpy array of voltage time series in mV (one sweep per row)
+    t : numpy array of times in seconds or TimeAxis shared by all sweeps
+    start : start of time window for spike detection (optional)
+    end : end of time window for spike detection (optional)
+    filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
+    dv_cutoff : minimum dV/dt to qualify as a spike in V/s (optional, default 20)
+    dvdt : pre-calculated 2-D time-derivative of voltage (optional)
+
+    Returns
+    -------
+    putative_spikes : list of numpy arrays of preliminary spike indexes, one per sweep
+    """
+
+    if not isinstance(v, np.ndarray) or v.ndim != 2:
+        raise TypeError("v is not a 2-D np.ndarray")
+
+    if not isinstance(t, (np.ndarray, tsu.TimeAxis)):
+        raise TypeError("t is neither an np.ndarray nor a TimeAxis")
+
+    if v.shape[1] != t.shape[0]:
+        raise er.FeatureError("Voltage and time series do not have the same dimensions")
+
+    if start is None:
+        start = t[0]
+
+    if end is None:
+        end = t[-1]
+
+    start_index = tsu.find_time_index(t, start)
+    end_index = tsu.find_time_index(t, end)
+
+    if dvdt is None:
+        dvdt = tsu.calculate_dvdt(v[:, start_index:end_index + 1], tsu.time_window(t, start_index, end_index), filter)
+    else:
+        dvdt = dvdt[:, start_index:end_index]
+
+    # Find positive-going crossings of dV/dt cutoff level in all sweeps
+    crossings = np.diff(np.greater_equal(dvdt, dv_cutoff).astype(int), axis=1) == 1
+    rows, cols = np.nonzero(crossings)
+    bounds = np.searchsorted(rows, np.arange(v.shape[0] + 1))
+
+    putative_spikes = []
+    for row in range(v.shape[0]):
+        spikes = drop_spikes_without_dvdt_reset(dvdt[row], cols[bounds[row]:bounds[row + 1]])
+        # Set back to original index space (not just window)
+        putative_spikes.append(np.array(spikes) + start_index)
+
+    return putative_spikes
+
+
+def drop_spikes_without_dvdt_reset(dvdt, putative_spikes):
+    """Only keep spikes if dV/dt has dropped all the way to zero since the previous one.
+
+    Parameters
+    ----------
+    dvdt : numpy array of time-derivative of voltage
+    putative_spikes : numpy array of preliminary spike indexes into `dvdt`
+
+    Returns
+    -------
+    putative_spikes : numpy array of retained spike indexes
+    """
+
+    putative_spikes = np.asarray(putative_spikes)
+
+    if len(putative_spikes) <= 1:
+        return putative_spikes
+
+    reset_mask = has_negative_values_between(dvdt, putative_spikes[:-1], putative_spikes[1:])
+
+    return putative_spikes[np.append(True, reset_mask)]
+
+
+def has_negative_values_between(x, starts, ends):
+    """Check for negative values of `x` in each of the windows `x[start:end]`.
+
+    Equivalent to `[np.any(x[s:e] < 0) for s, e in zip(starts, ends)]`, but evaluated
+    for all windows at once from a cumulative count of negative values.
+
+    Parameters
+    ----------
+    x : numpy array
+    starts : numpy array of (non-negative) window start indexes
+    ends : numpy array of (non-negative) window end indexes
+
+    Returns
+    -------
+    mask : boolean numpy array, True where the window contains a negative value
+    """
+
+    negative_count = np.zeros(len(x) + 1, dtype=int)
+    np.cumsum(x < 0, out=negative_count[1:])
+
+    starts = np.minimum(np.asarray(starts, dtype=int), len(x))
+    ends = np.minimum(np.asarray(ends, dtype=int), len(x))
+
+    return negative_count[ends] - negative_count[starts] > 0
+
+
+def find_peak_indexes(v, t, spike_indexes, end=None, backend="loop"):
     """Find indexes of spike peaks.
 
     Parameters
@@ -71,6 +184,7 @@ def find_peak_indexes(v, t, spike_indexes, end=None):
     t : numpy array of times in seconds
     spike_indexes : numpy array of preliminary spike indexes
     end : end of time window for spike detection (optional)
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
     """
 
     if not end:
@@ -78,10 +192,9 @@ def find_peak_indexes(v, t, spike_indexes, end=None):
     end_index = tsu.find_time_index(t, end)
 
     spks_and_end = np.append(spike_indexes, end_index)
-    peak_indexes = [np.argmax(v[spk:next]) + spk for spk, next in
-                    zip(spks_and_end[:-1], spks_and_end[1:])]
+    peak_indexes = window_argmax(v, spks_and_end[:-1], spks_and_end[1:], backend)
 
-    return np.array(peak_indexes)
+    return peak_indexes
 
 
 def filter_putative_spikes(v, t, spike_indexes, peak_indexes, min_height=2.,
@@ -113,11 +226,9 @@ def filter_putative_spikes(v, t, spike_indexes, peak_indexes, min_height=2.,
     if dvdt is None:
         dvdt = tsu.calculate_dvdt(v, t, filter)
 
-    diff_mask = [np.any(dvdt[peak_ind:spike_ind] < 0)
-                 for peak_ind, spike_ind
-                 in zip(peak_indexes[:-1], spike_indexes[1:])]
-    peak_indexes = peak_indexes[np.array(diff_mask + [True])]
-    spike_indexes = spike_indexes[np.array([True] + diff_mask)]
+    diff_mask = has_negative_values_between(dvdt, peak_indexes[:-1], spike_indexes[1:])
+    peak_indexes = peak_indexes[np.append(diff_mask, True)]
+    spike_indexes = spike_indexes[np.append(True, diff_mask)]
 
     peak_level_mask = v[peak_indexes] >= min_peak
     spike_indexes = spike_indexes[peak_level_mask]
@@ -130,7 +241,7 @@ def filter_putative_spikes(v, t, spike_indexes, peak_indexes, min_height=2.,
     return spike_indexes, peak_indexes
 
 
-def find_upstroke_indexes(v, t, spike_indexes, peak_indexes, filter=10., dvdt=None):
+def find_upstroke_indexes(v, t, spike_indexes, peak_indexes, filter=10., dvdt=None, backend="loop"):
     """Find indexes of maximum upstroke of spike.
 
     Parameters
@@ -141,6 +252,7 @@ def find_upstroke_indexes(v, t, spike_indexes, peak_indexes, filter=10., dvdt=No
     peak_indexes : numpy array of indexes of spike peaks
     filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
     dvdt : pre-calculated time-derivative of voltage (optional)
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
 
     Returns
     -------
@@ -151,13 +263,12 @@ def find_upstroke_indexes(v, t, spike_indexes, peak_indexes, filter=10., dvdt=No
     if dvdt is None:
         dvdt = tsu.calculate_dvdt(v, t, filter)
 
-    upstroke_indexes = [np.argmax(dvdt[spike:peak]) + spike for spike, peak in
-                        zip(spike_indexes, peak_indexes)]
+    upstroke_indexes = window_argmax(dvdt, spike_indexes, peak_indexes, backend)
 
-    return np.array(upstroke_indexes)
+    return upstroke_indexes
 
 
-def refine_threshold_indexes(v, t, upstroke_indexes, thresh_frac=0.05, filter=10., dvdt=None):
+def refine_threshold_indexes(v, t, upstroke_indexes, thresh_frac=0.05, filter=10., dvdt=None, backend="loop"):
     """Refine threshold detection of previously-found spikes.
 
     Parameters
@@ -168,12 +279,15 @@ def refine_threshold_indexes(v, t, upstroke_indexes, thresh_frac=0.05, filter=10
     thresh_frac : fraction of average upstroke for threshold calculation (optional, default 0.05)
     filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
     dvdt : pre-calculated time-derivative of voltage (optional)
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
 
     Returns
     -------
     threshold_indexes : numpy array of threshold indexes
     """
 
+    _check_window_search_backend(backend)
+
     if not upstroke_indexes.size:
         return np.array([])
 
@@ -184,6 +298,17 @@ def refine_threshold_indexes(v, t, upstroke_indexes, thresh_frac=0.05, filter=10
     target = avg_upstroke * thresh_frac
 
     upstrokes_and_start = np.append(np.array([0]), upstroke_indexes)
+
+    if backend == "reduceat":
+        # Search backwards from each upstroke down to (but excluding) the previous one
+        threshold_indexes = _segment_last_at_or_below(dvdt, upstrokes_and_start[:-1] + 1,
+                                                      upstrokes_and_start[1:] + 1, target)
+        # couldn't find a matching value for threshold,
+        # so just going to the start of the search interval
+        not_found = threshold_indexes < 0
+        threshold_indexes[not_found] = upstrokes_and_start[:-1][not_found]
+        return threshold_indexes
+
     threshold_indexes = []
     for upstk, upstk_prev in zip(upstrokes_and_start[1:], upstrokes_and_start[:-1]):
         potential_indexes = np.flatnonzero(dvdt[upstk:upstk_prev:-1] <= target)
@@ -338,7 +463,7 @@ def find_clipped_spikes(v, t, spike_indexes, peak_indexes, end_index, tol):
 
     return clipped
 
-def find_trough_indexes(v, t, spike_indexes, peak_indexes, clipped=None, end=None):
+def find_trough_indexes(v, t, spike_indexes, peak_indexes, clipped=None, end=None, backend="loop"):
     """
     Find indexes of minimum voltage (trough) between spikes.
 
@@ -349,6 +474,7 @@ def find_trough_indexes(v, t, spike_indexes, peak_indexes, clipped=None, end=Non
     spike_indexes : numpy array of spike indexes
     peak_indexes : numpy array of spike peak indexes
     end : end of time window (optional)
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
 
     Returns
     -------
@@ -366,8 +492,7 @@ def find_trough_indexes(v, t, spike_indexes, peak_indexes, clipped=None, end=Non
     end_index = tsu.find_time_index(t, end)
 
     trough_indexes = np.zeros_like(spike_indexes, dtype=float)
-    trough_indexes[:-1] = [v[peak:spk].argmin() + peak for peak, spk
-                           in zip(peak_indexes[:-1], spike_indexes[1:])]
+    trough_indexes[:-1] = window_argmin(v, peak_indexes[:-1], spike_indexes[1:], backend)
 
     if clipped[-1]:
         # If last spike is cut off by the end of the window, trough is undefined
@@ -383,7 +508,8 @@ def find_trough_indexes(v, t, spike_indexes, peak_indexes, clipped=None, end=Non
     return trough_indexes
 
 
-def find_downstroke_indexes(v, t, peak_indexes, trough_indexes, clipped=None, filter=10., dvdt=None):
+def find_downstroke_indexes(v, t, peak_indexes, trough_indexes, clipped=None, filter=10., dvdt=None,
+                            backend="loop"):
     """Find indexes of minimum voltage (troughs) between spikes.
 
     Parameters
@@ -395,6 +521,7 @@ def find_downstroke_indexes(v, t, peak_indexes, trough_indexes, clipped=None, fi
     clipped: boolean array - False if spike not clipped by edge of window
     filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
     dvdt : pre-calculated time-derivative of voltage (optional)
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
 
     Returns
     -------
@@ -419,9 +546,120 @@ def find_downstroke_indexes(v, t, peak_indexes, trough_indexes, clipped=None, fi
     valid_trough_indexes = trough_indexes[~clipped].astype(int)
 
     downstroke_indexes = np.zeros_like(peak_indexes) * np.nan
-    downstroke_index_values = [np.argmin(dvdt[peak:trough]) + peak for peak, trough
-                         in zip(valid_peak_indexes, valid_trough_indexes)]
+    downstroke_index_values = window_argmin(dvdt, valid_peak_indexes, valid_trough_indexes, backend)
     downstroke_indexes[~clipped] = downstroke_index_values
 
     return downstroke_indexes
 
+
+def window_argmax(x, starts, ends, backend="loop"):
+    """Find the index of the maximum of `x[start:end]` for each window.
+
+    Parameters
+    ----------
+    x : numpy array
+    starts : numpy array of window start indexes
+    ends : numpy array of window end indexes
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
+
+    Returns
+    -------
+    indexes : numpy array of indexes into `x`, one per window
+    """
+
+    _check_window_search_backend(backend)
+
+    if backend == "reduceat":
+        return _segment_arg_reduce(x, starts, ends, np.maximum)
+
+    return np.array([np.argmax(x[start:end]) + start for start, end in zip(starts, ends)])
+
+
+def window_argmin(x, starts, ends, backend="loop"):
+    """Find the index of the minimum of `x[start:end]` for each window.
+
+    Parameters
+    ----------
+    x : numpy array
+    starts : numpy array of window start indexes
+    ends : numpy array of window end indexes
+    backend : window search backend, one of WINDOW_SEARCH_BACKENDS (optional, default "loop")
+
+    Returns
+    -------
+    indexes : numpy array of indexes into `x`, one per window
+    """
+
+    _check_window_search_backend(backend)
+
+    if backend == "reduceat":
+        return _segment_arg_reduce(x, starts, ends, np.minimum)
+
+    return np.array([np.argmin(x[start:end]) + start for start, end in zip(starts, ends)])
+
+
+def _segment_indexes(n, starts, ends):
+    """Concatenate the indexes of the windows `[start:end]` into an array of length `n`.
+
+    Returns
+    -------
+    indexes : numpy array of the concatenated window indexes
+    offsets : numpy array of the position of each window in `indexes`
+    lengths : numpy array of window lengths
+    """
+
+    starts = np.clip(np.asarray(starts, dtype=int), 0, n)
+    ends = np.clip(np.asarray(ends, dtype=int), 0, n)
+    lengths = np.maximum(ends - starts, 0)
+
+    offsets = np.zeros(len(lengths), dtype=int)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+
+    indexes = np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+
+    return indexes, offsets, lengths
+
+
+def _segment_arg_reduce(x, starts, ends, ufunc):
+    """Index of the first extreme value of each window, as selected by `ufunc` (np.maximum or np.minimum).
+
+    Like np.argmax/np.argmin, the first nan of a window is returned if it contains any.
+    """
+
+    if len(starts) == 0:
+        return np.array([])
+
+    indexes, offsets, lengths = _segment_indexes(len(x), starts, ends)
+    if np.any(lengths == 0):
+        raise ValueError("attempt to get {} of an empty sequence".format(
+            "argmax" if ufunc is np.maximum else "argmin"))
+
+    values = x[indexes]
+    extremes = ufunc.reduceat(values, offsets)
+
+    is_extreme = values == np.repeat(extremes, lengths)
+    if np.isnan(extremes).any():
+        is_extreme |= np.isnan(values)
+    hits = np.flatnonzero(is_extreme)
+    first_hits = hits[np.searchsorted(hits, offsets)]
+
+    return indexes[first_hits]
+
+
+def _segment_last_at_or_below(x, starts, ends, target):
+    """Index of the last value of each window `x[start:end]` that is <= `target`, or -1 if there is none."""
+
+    result = np.full(len(starts), -1, dtype=int)
+    if len(starts) == 0:
+        return result
+
+    indexes, offsets, lengths = _segment_indexes(len(x), starts, ends)
+
+    hits = np.flatnonzero(x[indexes] <= target)
+    last_hits = np.searchsorted(hits, offsets + lengths) - 1
+
+    found = last_hits >= 0
+    found[found] = hits[last_hits[found]] >= offsets[found]
+    result[found] = indexes[hits[last_hits[found]]]
+
+    return result
@@ -110,7 +110,8 @@ def find_widths(v, t, spike_indexes, peak_indexes, trough_indexes, clipped=None)
 
 def analyze_trough_details(v, t, spike_indexes, peak_indexes, clipped=None, end=None, filter=10.,
                            heavy_filter=1., term_frac=0.01, adp_thresh=0.5, tol=0.5,
-                           flat_interval=0.002, adp_max_delta_t=0.005, adp_max_delta_v=10., dvdt=None):
+                           flat_interval=0.002, adp_max_delta_t=0.005, adp_max_delta_v=10., dvdt=None,
+                           dvdt_cache=None):
     """Analyze trough to determine if an ADP exists and whether the reset is a 'detour' or 'direct'
 
     Parameters
@@ -129,6 +130,7 @@ def analyze_trough_details(v, t, spike_indexes, peak_indexes, clipped=None, end=
     adp_max_delta_t: max possible ADP delta t (default 0.005 s)
     adp_max_delta_v: max possible ADP delta v (default 10 mV)
     dvdt : pre-calculated time-derivative of voltage (optional)
+    dvdt_cache : DvdtCache of `v` for the time-derivatives that are not provided (optional)
 
     Returns
     -------
@@ -151,10 +153,13 @@ def analyze_trough_details(v, t, spike_indexes, peak_indexes, clipped=None, end=
     valid_spike_indexes = spike_indexes[~clipped]
     valid_peak_indexes = peak_indexes[~clipped]
 
+    if dvdt_cache is None:
+        dvdt_cache = tsu.DvdtCache(v, t)
+
     if dvdt is None:
-        dvdt = tsu.calculate_dvdt(v, t, filter)
+        dvdt = dvdt_cache.dvdt(filter)
 
-    dvdt_hvy = tsu.calculate_dvdt(v, t, heavy_filter)
+    dvdt_hvy = dvdt_cache.dvdt(heavy_filter)
 
     # Writing as for loop - see if I can vectorize any later
     fast_trough_indexes = []
@@ -326,7 +331,8 @@ def _dbl_exp_fit(y0, x, A1, tau1, A2, tau2):
     return y0 + A1 * np.exp(-x / tau1) + A2 * np.exp(-x / tau2) + penalty
 
 
-def estimate_adjusted_detection_parameters(v_set, t_set, interval_start, interval_end, filter=10):
+def estimate_adjusted_detection_parameters(v_set, t_set, interval_start, interval_end, filter=10,
+                                           dvdt_caches=None):
     """
     Estimate adjusted values for spike detection by analyzing a period when the voltage
     changes quickly but passively (due to strong current stimulation), which can result
@@ -338,6 +344,8 @@ def estimate_adjusted_detection_parameters(v_set, t_set, interval_start, interva
     t_set : list of numpy arrays of times in seconds
     interval_start : start of analysis interval (sec)
     interval_end : end of analysis interval (sec)
+    filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default 10)
+    dvdt_caches : list of DvdtCache objects, one per voltage time series (optional)
 
     Returns
     -------
@@ -360,11 +368,14 @@ def estimate_adjusted_detection_parameters(v_set, t_set, interval_start, interva
     start_index = tsu.find_time_index(t_set[0], interval_start)
     end_index = tsu.find_time_index(t_set[0], interval_end)
 
+    if dvdt_caches is None:
+        dvdt_caches = [tsu.DvdtCache(v, t) for v, t in zip(v_set, t_set)]
+
     maxes = []
     ends = []
     dv_set = []
-    for v, t in zip(v_set, t_set):
-        dv = tsu.calculate_dvdt(v, t, filter)
+    for dvdt_cache in dvdt_caches:
+        dv = dvdt_cache.dvdt(filter)
         dv_set.append(dv)
         maxes.append(dv[start_index:end_index].max())
         ends.append(dv[end_index])
@@ -380,7 +391,7 @@ def estimate_adjusted_detection_parameters(v_set, t_set, interval_start, interva
 
     all_upstrokes = np.array([])
     for v, t, dv in zip(v_set, t_set, dv_set):
-        putative_spikes = spkd.detect_putative_spikes(v, t, dv_cutoff=new_dv_cutoff, filter=filter)
+        putative_spikes = spkd.detect_putative_spikes(v, t, dv_cutoff=new_dv_cutoff, filter=filter, dvdt=dv)
         peaks = spkd.find_peak_indexes(v, t, putative_spikes)
         putative_spikes, peaks = spkd.filter_putative_spikes(v, t, putative_spikes, peaks, dvdt=dv, filter=filter)
         upstrokes = spkd.find_upstroke_indexes(v, t, putative_spikes, peaks, dvdt=dv)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import operator
+import numpy as np
+import pandas as pd
+
+
+class SpikeTable(object):
+    """Spike features of a sweep, stored as one array per feature.
+
+    Indexing with a feature name returns the stored column array itself, without
+    copying. Indexing with an integer returns the features of that spike as a
+    dict, and iterating yields one such record per spike. The records are only
+    built when asked for, so a SpikeTable can stand in for the list of records
+    from `DataFrame.to_dict(orient='records')` without holding a dict per spike.
+
+    Parameters
+    ----------
+    columns : mapping of feature name to 1-D array, all of the same length (optional)
+    """
+
+    __slots__ = ("_columns", "_n_rows")
+
+    def __init__(self, columns=None):
+        self._columns = OrderedDict()
+        self._n_rows = 0
+
+        if columns is None:
+            return
+
+        for n, (name, values) in enumerate(columns.items()):
+            values = np.asarray(values)
+            if values.ndim != 1:
+                raise ValueError("column '{}' is not one-dimensional".format(name))
+            if n == 0:
+                self._n_rows = len(values)
+            elif len(values) != self._n_rows:
+                raise ValueError("column '{}' has {:d} rows, expected {:d}".format(name, len(values), self._n_rows))
+            self._columns[name] = values
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Make a SpikeTable from a DataFrame with one row per spike."""
+        return cls(OrderedDict((name, df[name].values) for name in df.columns))
+
+    def to_dataframe(self):
+        """Return the spike features as a DataFrame with one row per spike."""
+        return pd.DataFrame(self._columns)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def shape(self):
+        return self._n_rows, len(self._columns)
+
+    @property
+    def empty(self):
+        return self._n_rows == 0 or len(self._columns) == 0
+
+    def __len__(self):
+        return self._n_rows
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._columns[key]
+        return self.record(key)
+
+    def __iter__(self):
+        return self.records()
+
+    def __repr__(self):
+        return "SpikeTable({:d} spikes, columns={})".format(self._n_rows, self.columns)
+
+    def record(self, index):
+        """Get the features of a single spike.
+
+        Parameters
+        ----------
+        index : position of the spike, negative values count from the end
+
+        Returns
+        -------
+        record : dict of feature name to value
+        """
+        index = operator.index(index)
+        if index < 0:
+            index += self._n_rows
+        if not 0 <= index < self._n_rows:
+            raise IndexError("spike index out of range")
+
+        return {name: values.item(index) for name, values in self._columns.items()}
+
+    def records(self):
+        """Iterate over the spikes, yielding a dict of feature name to value for each."""
+        names = self.columns
+        for row in zip(*[values.tolist() for values in self._columns.values()]):
+            yield dict(zip(names, row))
+
+    def to_dict(self, orient="records"):
+        """Convert the spike features to built-in Python containers.
+
+        Parameters
+        ----------
+        orient : "records" for a list of dicts, one per spike,
+            or "list" for a dict of feature name to list of values
+
+        Returns
+        -------
+        spikes : list or dict
+        """
+        if orient == "records":
+            return list(self.records())
+        elif orient == "list":
+            return OrderedDict((name, values.tolist()) for name, values in self._columns.items())
+        else:
+            raise ValueError("unsupported orient '{}'".format(orient))
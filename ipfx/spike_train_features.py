@@ -12,9 +12,9 @@ def basic_spike_train_features(t, spikes_df, start, end, exclude_clipped=False):
         features["avg_rate"] = 0
         return features
 
-    thresholds = spikes_df["threshold_index"].values.astype(int)
+    thresholds = np.asarray(spikes_df["threshold_index"]).astype(int)
     if exclude_clipped:
-        mask = spikes_df["clipped"].values.astype(bool)
+        mask = np.asarray(spikes_df["clipped"]).astype(bool)
         thresholds = thresholds[~mask]
     isis = get_isis(t, thresholds)
     with warnings.catch_warnings():
@@ -50,9 +50,9 @@ def pause(t, spikes_df, start, end, cost_weight=1.0):
     """
     warnings.warn("This function will be removed")
     # Pauses are unusually long ISIs with a "detour reset" among delay resets
-    thresholds = spikes_df["threshold_index"].values.astype(int)
+    thresholds = np.asarray(spikes_df["threshold_index"]).astype(int)
     isis = get_isis(t, thresholds)
-    isi_types = spikes_df["isi_type"][:-1].values
+    isi_types = np.asarray(spikes_df["isi_type"])[:-1]
 
     pause_list = spkf.detect_pauses(isis, isi_types, cost_weight)
 
@@ -75,15 +75,15 @@ def burst(t, spikes_df, tol=0.5, pause_cost=1.0):
     num_bursts : number of bursts detected
     """
     warnings.warn("This function will be removed")
-    thresholds = spikes_df["threshold_index"].values.astype(int)
+    thresholds = np.asarray(spikes_df["threshold_index"]).astype(int)
     isis = get_isis(t, thresholds)
 
-    isi_types = spikes_df["isi_type"][:-1].values
-    fast_tr_v = spikes_df["fast_trough_v"].values
-    fast_tr_t = spikes_df["fast_trough_t"].values
-    slow_tr_v = spikes_df["slow_trough_v"].values
-    slow_tr_t = spikes_df["slow_trough_t"].values
-    thr_v = spikes_df["threshold_v"].values
+    isi_types = np.asarray(spikes_df["isi_type"])[:-1]
+    fast_tr_v = np.asarray(spikes_df["fast_trough_v"])
+    fast_tr_t = np.asarray(spikes_df["fast_trough_t"])
+    slow_tr_v = np.asarray(spikes_df["slow_trough_v"])
+    slow_tr_t = np.asarray(spikes_df["slow_trough_t"])
+    thr_v = np.asarray(spikes_df["threshold_v"])
 
     bursts = spkf.detect_bursts(isis, isi_types,
                               fast_tr_v, fast_tr_t,
@@ -112,7 +112,7 @@ def delay(t, v, spikes_df, start, end):
         logging.info("No spikes available for delay calculation")
         return 0., 0.
 
-    spike_time = spikes_df["threshold_t"].values[0]
+    spike_time = np.asarray(spikes_df["threshold_t"])[0]
 
     tau = spkf.fit_prespike_time_constant(t, v, start, spike_time)
     latency = spike_time - start
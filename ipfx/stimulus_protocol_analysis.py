@@ -15,9 +15,17 @@ class StimulusProtocolAnalysis(object):
                       "fast_trough_v", "fast_trough_t", "slow_trough_v", "slow_trough_t",
                       "threshold_v", "threshold_i", "threshold_t", "peak_v", "peak_t" ]
 
-    def __init__(self, spx, sptx):
+    def __init__(self, spx, sptx, executor=None):
+        """
+        Parameters
+        ----------
+        spx : SpikeFeatureExtractor
+        sptx : SpikeTrainFeatureExtractor
+        executor : concurrent.futures.Executor to analyze the sweeps in parallel (optional, default serial)
+        """
         self.spx = spx
         self.sptx = sptx
+        self.executor = executor
 
         self._spikes_set = None
         self._sweep_features = None
@@ -25,7 +33,7 @@ class StimulusProtocolAnalysis(object):
     def _sweep_to_dict(self, sweep, extra_params=None):
         s = sweep.to_dict()
         s['index'] = sweep.name
-        s['spikes'] = self._spikes_set[sweep.name].to_dict(orient='records')
+        s['spikes'] = self._spikes_set[sweep.name]
         if extra_params:
             s.update(extra_params[s['index']])
         return s
@@ -36,7 +44,7 @@ class StimulusProtocolAnalysis(object):
         for sid in sweeps.index:
             s = sweep_index[sid]
             s['index'] = sid
-            s['spikes'] = self._spikes_set[sid].to_dict(orient='records')
+            s['spikes'] = self._spikes_set[sid]
             if extra_params:
                 s.update(extra_params[sid])
             out.append(s)
@@ -65,17 +73,29 @@ class StimulusProtocolAnalysis(object):
 
         output = {}
         for mf in features_list:
-            mfd = [ spikes[mf].values[0] for spikes in spikes_set if len(spikes) > 0 ]
+            mfd = [ np.asarray(spikes[mf])[0] for spikes in spikes_set if len(spikes) > 0 ]
             output[mf] = np.nanmean(mfd)
         return output
 
     def analyze_basic_features(self, sweep_set, extra_sweep_features=None, exclude_clipped=False):
-        self._spikes_set = []
-        for sweep in sweep_set.sweeps:
-            self._spikes_set.append(self.spx.process(sweep.t, sweep.v, sweep.i))
+        if self.executor is None:
+            self._spikes_set = []
+            for sweep in sweep_set.sweeps:
+                self._spikes_set.append(self.spx.process(sweep.time_base, sweep.v, sweep.i, sweep.dvdt_cache))
+
+            sweep_features = [ self.sptx.process(sweep.time_base, sweep.v, sweep.i, spikes, extra_sweep_features,
+                                                 exclude_clipped=exclude_clipped, dvdt_cache=sweep.dvdt_cache)
+                               for sweep, spikes in zip(sweep_set.sweeps, self._spikes_set) ]
+        else:
+            # executor.map returns the results in the order of the sweeps
+            n_sweeps = len(sweep_set.sweeps)
+            results = list(self.executor.map(_analyze_sweep,
+                                             [self.spx] * n_sweeps, [self.sptx] * n_sweeps, sweep_set.sweeps,
+                                             [extra_sweep_features] * n_sweeps, [exclude_clipped] * n_sweeps))
+            self._spikes_set = [ spikes for spikes, _ in results ]
+            sweep_features = [ features for _, features in results ]
 
-        self._sweep_features = pd.DataFrame([ self.sptx.process(sweep.t, sweep.v, sweep.i, spikes, extra_sweep_features, exclude_clipped=exclude_clipped)
-                                              for sweep, spikes in zip(sweep_set.sweeps, self._spikes_set) ])
+        self._sweep_features = pd.DataFrame(sweep_features)
 
     def reset_basic_features(self):
         self._spikes_set = None
@@ -118,8 +138,8 @@ class LongSquareAnalysis(StimulusProtocolAnalysis):
     HERO_MAX_AMP_OFFSET = 61.0
 
     def __init__(self, spx, sptx, subthresh_min_amp, tau_frac=0.1,
-                 require_subthreshold=True, require_suprathreshold=True):
-        super(LongSquareAnalysis, self).__init__(spx, sptx)
+                 require_subthreshold=True, require_suprathreshold=True, executor=None):
+        super(LongSquareAnalysis, self).__init__(spx, sptx, executor)
         self.subthresh_min_amp = subthresh_min_amp
         self.sptx.stim_amp_fn = stf._step_stim_amp
         self.tau_frac = tau_frac
@@ -204,9 +224,9 @@ class LongSquareAnalysis(StimulusProtocolAnalysis):
 
 
         calc_subthresh_ss = SweepSet([sweep_set.sweeps[i] for i in calc_subthresh_features.index.values])
-        median_peak_time = np.median([s.t[subf.voltage_deflection(s.t, s.v, s.i, self.spx.start, self.spx.end, "min")[1]]
+        median_peak_time = np.median([s.time_base[subf.voltage_deflection(s.time_base, s.v, s.i, self.spx.start, self.spx.end, "min")[1]]
                                       for s in calc_subthresh_ss.sweeps])
-        taus = [ subf.time_constant(s.t, s.v, s.i, self.spx.start, self.spx.end, median_peak_time, self.tau_frac, self.sptx.baseline_interval) for s in calc_subthresh_ss.sweeps ]
+        taus = [ subf.time_constant(s.time_base, s.v, s.i, self.spx.start, self.spx.end, median_peak_time, self.tau_frac, self.sptx.baseline_interval) for s in calc_subthresh_ss.sweeps ]
 
         calc_subthresh_features['tau'] = taus
 
@@ -268,8 +288,8 @@ class LongSquareAnalysis(StimulusProtocolAnalysis):
 
 
 class ShortSquareAnalysis(StimulusProtocolAnalysis):
-    def __init__(self, spx, sptx):
-        super(ShortSquareAnalysis, self).__init__(spx, sptx)
+    def __init__(self, spx, sptx, executor=None):
+        super(ShortSquareAnalysis, self).__init__(spx, sptx, executor)
         self.sptx.stim_amp_fn = stf._short_step_stim_amp
 
     def analyze(self, sweep_set):
@@ -305,3 +325,11 @@ class ShortSquareAnalysis(StimulusProtocolAnalysis):
         for k in [ "common_amp_sweeps" ]:
             out[k] = self._sweeps_to_dict(out[k], extra_params)
         return out
+
+
+def _analyze_sweep(spx, sptx, sweep, extra_sweep_features, exclude_clipped):
+    """Spike and spike train features of a single sweep, as a module-level function for process pools."""
+    spikes = spx.process(sweep.time_base, sweep.v, sweep.i, sweep.dvdt_cache)
+    sweep_features = sptx.process(sweep.time_base, sweep.v, sweep.i, spikes, extra_sweep_features,
+                                  exclude_clipped=exclude_clipped, dvdt_cache=sweep.dvdt_cache)
+    return spikes, sweep_features
@@ -5,7 +5,8 @@ from . import time_series_utils as tsu
 from scipy.optimize import curve_fit
 from . import error as er
 
-def baseline_voltage(t, v, start, baseline_interval=0.1, baseline_detect_thresh=0.3, filter_frequency=1.0):
+def baseline_voltage(t, v, start, baseline_interval=0.1, baseline_detect_thresh=0.3, filter_frequency=1.0,
+                     dvdt_cache=None):
     # Look at baseline interval before start if start is defined
     if start is not None:
         return tsu.average_voltage(v, t, start - baseline_interval, start)
@@ -13,7 +14,10 @@ def baseline_voltage(t, v, start, baseline_interval=0.1, baseline_detect_thresh=
     logging.info("computing baseline voltage interval")
 
     # Otherwise try to find an interval where things are pretty flat
-    dv = tsu.calculate_dvdt(v, t, filter_frequency)
+    if dvdt_cache is None:
+        dv = tsu.calculate_dvdt(v, t, filter_frequency)
+    else:
+        dv = dvdt_cache.dvdt(filter_frequency)
     non_flat_points = np.flatnonzero(np.abs(dv >= baseline_detect_thresh))
     flat_intervals = t[non_flat_points[1:]] - t[non_flat_points[:-1]]
     long_flat_intervals = np.flatnonzero(flat_intervals >= baseline_interval)
@@ -1,9 +1,30 @@
+import copy
+import threading
+from collections import OrderedDict
 import ipfx.epochs as ep
+import ipfx.time_series_utils as tsu
 
 
 class Sweep(object):
     def __init__(self, t, v, i, clamp_mode, sampling_rate, sweep_number=None, epochs=None):
-        self._t = t
+        """
+        Parameters
+        ----------
+        t : numpy array of times in seconds, or a TimeAxis that is only materialized when `t` is accessed
+        v : numpy array of voltages in mV
+        i : numpy array of currents in pA
+        clamp_mode : "CurrentClamp" or "VoltageClamp"
+        sampling_rate : float sampling rate in Hz
+        sweep_number : int sweep number (optional)
+        epochs : dict of epoch name to (start index, end index) (optional, detected if not provided)
+        """
+        if isinstance(t, tsu.TimeAxis):
+            self._time_axis = t
+            self._t = None
+        else:
+            self._time_axis = None
+            self._t = t
+        self._has_fixed_dt = None
         self._v = v
         self._i = i
         self.sampling_rate = sampling_rate
@@ -15,6 +36,7 @@ class Sweep(object):
             self.epochs = {}
 
         self.selected_epoch_name = "sweep"
+        self._dvdt_caches = {}
 
         if self.clamp_mode == "CurrentClamp":
             self.response = self._v
@@ -28,8 +50,35 @@ class Sweep(object):
     @property
     def t(self):
         start_idx, end_idx = self.epochs[self.selected_epoch_name]
+        if self._t is None:
+            return self._time_axis.window(start_idx, end_idx).values()
         return self._t[start_idx:end_idx+1]
 
+    @property
+    def time_axis(self):
+        """TimeAxis of the selected epoch, or None if the sweep was created with an array of times"""
+        if self._time_axis is None:
+            return None
+        start_idx, end_idx = self.epochs[self.selected_epoch_name]
+        return self._time_axis.window(start_idx, end_idx)
+
+    @property
+    def time_base(self):
+        """TimeAxis of the selected epoch if the sweep has one, otherwise its array of times.
+
+        Functions of time_series_utils and spike_detector that accept a TimeAxis can
+        take this instead of `t`, so that the time array is not materialized.
+        """
+        time_axis = self.time_axis
+        return time_axis if time_axis is not None else self.t
+
+    @property
+    def has_fixed_dt(self):
+        """True if all time intervals of the sweep are identical"""
+        if self._has_fixed_dt is None:
+            self._has_fixed_dt = self._time_axis is not None or tsu.has_fixed_dt(self._t)
+        return self._has_fixed_dt
+
     @property
     def v(self):
         start_idx, end_idx = self.epochs[self.selected_epoch_name]
@@ -40,12 +89,40 @@ class Sweep(object):
         start_idx, end_idx = self.epochs[self.selected_epoch_name]
         return self._i[start_idx:end_idx+1]
 
+    @property
+    def dvdt_cache(self):
+        """DvdtCache of the voltage in the selected epoch"""
+        if self.selected_epoch_name not in self._dvdt_caches:
+            self._dvdt_caches[self.selected_epoch_name] = tsu.DvdtCache(self.v, self.time_base)
+        return self._dvdt_caches[self.selected_epoch_name]
+
+    @property
+    def nbytes(self):
+        """Memory taken by the data arrays of the sweep"""
+        nbytes = self._v.nbytes + self._i.nbytes
+        if self._t is not None:
+            nbytes += self._t.nbytes
+        return nbytes
+
+    def copy(self):
+        """Return a Sweep that shares the data arrays of this one, with its own
+        epoch selection, time alignment and dV/dt caches"""
+        sweep = copy.copy(self)
+        sweep.epochs = dict(self.epochs)
+        sweep._dvdt_caches = {}
+        return sweep
+
     def select_epoch(self, epoch_name):
         self.selected_epoch_name = epoch_name
 
     def set_time_zero_to_index(self, time_step):
         dt = 1. / self.sampling_rate
-        self._t = self._t - time_step*dt
+        if self._time_axis is not None:
+            self._time_axis = self._time_axis.shifted(-time_step*dt)
+            self._t = None
+        else:
+            self._t = self._t - time_step*dt
+        self._dvdt_caches = {}
 
     def detect_epochs(self):
         """
@@ -105,6 +182,69 @@ class SweepSet(object):
     def sweep_number(self):
         return self._prop('sweep_number')
 
+    @property
+    def dvdt_cache(self):
+        return self._prop('dvdt_cache')
+
     @property
     def sampling_rate(self):
         return self._prop('sampling_rate')
+
+
+class SweepCache(object):
+    """Least recently used sweeps, bounded by the memory taken by their data arrays.
+    The cache can be used from several threads."""
+
+    def __init__(self, max_bytes):
+        """
+        Parameters
+        ----------
+        max_bytes : int maximum size of the cached sweep data in bytes
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._sweeps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sweeps)
+
+    def __contains__(self, sweep_number):
+        return sweep_number in self._sweeps
+
+    def get(self, sweep_number):
+        """Return the cached sweep, or None if it is not in the cache"""
+        with self._lock:
+            if sweep_number not in self._sweeps:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._sweeps.move_to_end(sweep_number)
+            return self._sweeps[sweep_number][0]
+
+    def put(self, sweep_number, sweep):
+        """Add a sweep, evicting the least recently used sweeps to stay within `max_bytes`.
+        Sweeps larger than `max_bytes` are not cached."""
+        nbytes = sweep.nbytes
+
+        with self._lock:
+            if sweep_number in self._sweeps:
+                self.nbytes -= self._sweeps.pop(sweep_number)[1]
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._sweeps[sweep_number] = (sweep, nbytes)
+            self.nbytes += nbytes
+
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._sweeps.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+
+    def clear(self):
+        with self._lock:
+            self._sweeps.clear()
+            self.nbytes = 0
@@ -0,0 +1,137 @@
+"""
+Sidecar index of the sweep map and sweep table of an NWB file.
+
+Building the sweep map and reading the stimulus information of every sweep
+dominates the time to open a large NWB file. The index stores both in a json
+file next to the NWB file (or in a separate directory), together with a key of
+the NWB file, so that they can be loaded instead of rebuilt as long as the file
+does not change.
+"""
+import hashlib
+import logging
+import os
+
+import allensdk.core.json_utilities as ju
+
+SWEEP_INDEX_VERSION = 1
+
+# size of the blocks at the start and the end of the file that are hashed
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def index_file_name(nwb_file, index_dir=None):
+    """
+    Parameters
+    ----------
+    nwb_file: str
+        nwb file name
+    index_dir: str
+        directory of the index files, the directory of the nwb file if None
+
+    Returns
+    -------
+    str
+        name of the index file of `nwb_file`
+    """
+    if index_dir is None:
+        index_dir = os.path.dirname(os.path.abspath(nwb_file))
+
+    return os.path.join(index_dir, os.path.basename(nwb_file) + ".sweep_index.json")
+
+
+def file_key(nwb_file):
+    """
+    Key that changes when the nwb file changes: its size, modification time
+    and a sha256 hash of its content.
+
+    Only the first and the last `HASH_BLOCK_SIZE` bytes are hashed, so that
+    computing the key does not read the whole file.
+
+    Parameters
+    ----------
+    nwb_file: str
+        nwb file name
+
+    Returns
+    -------
+    dict
+    """
+    stat = os.stat(nwb_file)
+
+    content_hash = hashlib.sha256()
+    with open(nwb_file, "rb") as f:
+        content_hash.update(f.read(HASH_BLOCK_SIZE))
+        if stat.st_size > HASH_BLOCK_SIZE:
+            f.seek(max(HASH_BLOCK_SIZE, stat.st_size - HASH_BLOCK_SIZE))
+            content_hash.update(f.read())
+
+    return {"size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": content_hash.hexdigest()}
+
+
+def read_sweep_index(nwb_file, index_file):
+    """
+    Read the index of `nwb_file` if it is up to date
+
+    Parameters
+    ----------
+    nwb_file: str
+        nwb file name
+    index_file: str
+        index file name
+
+    Returns
+    -------
+    dict with "sweep_map" and "sweep_info" lists of records and the dtypes of their
+    columns in "sweep_map_dtypes" and "sweep_info_dtypes", or None if the index
+    does not exist, can not be read or is out of date
+    """
+    if not os.path.isfile(index_file):
+        return None
+
+    try:
+        index = ju.read(index_file)
+    except ValueError:
+        logging.warning("Ignoring unreadable sweep index {}".format(index_file))
+        return None
+
+    if index.get("version") != SWEEP_INDEX_VERSION or index.get("key") != file_key(nwb_file):
+        logging.debug("Sweep index {} is out of date".format(index_file))
+        return None
+
+    logging.debug("Loaded sweep index {}".format(index_file))
+    return index
+
+
+def table_dtypes(df):
+    """Names of the dtypes of the columns of `df`, which are lost in the json records of the table"""
+    return {column: str(dtype) for column, dtype in df.dtypes.items()}
+
+
+def write_sweep_index(nwb_file, index_file, sweep_map, sweep_info):
+    """
+    Write the index of `nwb_file`. The index file is replaced atomically, so
+    that concurrent readers never see a partially written index.
+
+    Parameters
+    ----------
+    nwb_file: str
+        nwb file name
+    index_file: str
+        index file name
+    sweep_map: DataFrame
+        sweep map of the nwb reader
+    sweep_info: DataFrame
+        sweep table
+    """
+    index = {"version": SWEEP_INDEX_VERSION,
+             "key": file_key(nwb_file),
+             "sweep_map": sweep_map.to_dict(orient="records"),
+             "sweep_map_dtypes": table_dtypes(sweep_map),
+             "sweep_info": sweep_info.to_dict(orient="records"),
+             "sweep_info_dtypes": table_dtypes(sweep_info)}
+
+    tmp_index_file = "{}.{:d}.tmp".format(index_file, os.getpid())
+    ju.write(tmp_index_file, index)
+    os.replace(tmp_index_file, index_file)
@@ -2,13 +2,108 @@ import numpy as np
 import scipy.signal as signal
 
 
+class TimeAxis(object):
+    """Evenly sampled time axis described by its sampling instead of an array of times.
+
+    The time of sample k is `(first_index + k) * dt + start`, so a TimeAxis gives the
+    same values as `np.arange(first_index, first_index + n) * dt + start` without
+    holding them in memory.
+
+    Parameters
+    ----------
+    n : number of samples
+    dt : sampling interval in seconds
+    start : time offset in seconds (optional, default 0)
+    first_index : sample number of the first sample (optional, default 0)
+    """
+
+    def __init__(self, n, dt, start=0., first_index=0):
+        self.n = int(n)
+        self.dt = dt
+        self.start = start
+        self.first_index = int(first_index)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def shape(self):
+        return (self.n,)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.values()[index]
+
+        index = np.asarray(index)
+        if np.any((index >= self.n) | (index < -self.n)):
+            raise IndexError("index out of bounds for time axis with {} samples".format(self.n))
+        index = np.where(index < 0, index + self.n, index)
+
+        return (index + self.first_index) * self.dt + self.start
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values()
+        return values if dtype is None else values.astype(dtype)
+
+    def values(self):
+        """Materialize the time axis as a numpy array of times in seconds."""
+        return np.arange(self.first_index, self.first_index + self.n) * self.dt + self.start
+
+    def window(self, start_index, end_index):
+        """Return the part of the time axis between two sample indexes (end inclusive)."""
+        start_index, end_index, _ = slice(start_index, end_index + 1).indices(self.n)
+        return TimeAxis(max(end_index - start_index, 0), self.dt, self.start, self.first_index + start_index)
+
+    def shifted(self, offset):
+        """Return the time axis with all times shifted by `offset` seconds."""
+        return TimeAxis(self.n, self.dt, self.start + offset, self.first_index)
+
+    def index(self, t_0):
+        """Find the index of the sample closest to `t_0` arithmetically (ties go to the earlier sample)."""
+        idx = int(np.clip(np.round((t_0 - self.start) / self.dt) - self.first_index, 0, self.n - 1))
+
+        # Correct for rounding so that the result matches a search on the materialized times
+        while idx > 0 and abs(self[idx - 1] - t_0) <= abs(self[idx] - t_0):
+            idx -= 1
+        while idx < self.n - 1 and abs(self[idx + 1] - t_0) < abs(self[idx] - t_0):
+            idx += 1
+
+        return np.intp(idx)
+
+    def same_as(self, other):
+        """Check that `other` is a TimeAxis with the same sampling, so that both give the same times."""
+        return (isinstance(other, TimeAxis) and (self.n, self.dt, self.start, self.first_index) ==
+                (other.n, other.dt, other.start, other.first_index))
+
+
+def time_window(t, start_index, end_index):
+    """Return the part of a time array or TimeAxis between two sample indexes (end inclusive).
+
+    A TimeAxis stays a TimeAxis, so that its times are not materialized.
+    """
+    if isinstance(t, TimeAxis):
+        return t.window(start_index, end_index)
+
+    return t[start_index:end_index + 1]
+
+
+def same_times(t_a, t_b):
+    """Check that two time arrays or TimeAxes give the same times."""
+    if isinstance(t_a, TimeAxis) and isinstance(t_b, TimeAxis):
+        return len(t_a) == len(t_b) and (t_a.same_as(t_b) or np.array_equal(t_a.values(), t_b.values()))
+
+    return np.array_equal(t_a, t_b)
+
+
 def find_time_index(t, t_0):
     """ Find the index value of a given time (t_0) in a time series (t).
 
+    The closest time point is found by bisection, so `t` must be monotonically
+    increasing. Ties are resolved towards the earlier time point.
 
     Parameters
     ----------
-    t   : time array
+    t   : time array or TimeAxis
     t_0 : time point to find an index
 
     Returns
@@ -17,8 +112,55 @@ def find_time_index(t, t_0):
     """
     assert t[0] <= t_0 <= t[-1], "Given time ({:f}) is outside of time range ({:f}, {:f})".format(t_0, t[0], t[-1])
 
-    idx = np.argmin(abs(t - t_0))
-    return idx
+    if isinstance(t, TimeAxis):
+        return t.index(t_0)
+
+    t = np.asarray(t)
+    if len(t) == 1:
+        return np.intp(0)
+
+    idx = min(max(np.searchsorted(t, t_0), 1), len(t) - 1)
+    if abs(t[idx - 1] - t_0) <= abs(t[idx] - t_0):
+        idx -= 1
+
+    # Return the first of repeated time points, as np.argmin(abs(t - t_0)) would
+    if idx > 0 and t[idx - 1] == t[idx]:
+        idx = np.searchsorted(t, t[idx])
+
+    return np.intp(idx)
+
+
+def find_time_indexes(t, times):
+    """ Find the index values of several times in a time series (t).
+
+    Parameters
+    ----------
+    t     : monotonically increasing time array or TimeAxis
+    times : array of time points to find indexes for
+
+    Returns
+    -------
+    idx: numpy array of indexes of t closest to each of the times
+    """
+    times = np.asarray(times, dtype=float)
+
+    assert np.all((t[0] <= times) & (times <= t[-1])), \
+        "Given times are outside of time range ({:f}, {:f})".format(t[0], t[-1])
+
+    if isinstance(t, TimeAxis):
+        return np.array([t.index(t_0) for t_0 in times.flat], dtype=np.intp).reshape(times.shape)
+
+    t = np.asarray(t)
+
+    if len(t) == 1:
+        return np.zeros(times.shape, dtype=np.intp)
+
+    right = np.clip(np.searchsorted(t, times), 1, len(t) - 1)
+    left = right - 1
+    idx = np.where(abs(t[left] - times) <= abs(t[right] - times), left, right)
+
+    # Return the first of repeated time points
+    return np.searchsorted(t, t[idx])
 
 
 def calculate_dvdt(v, t, filter=None):
@@ -26,13 +168,15 @@ def calculate_dvdt(v, t, filter=None):
 
     Parameters
     ----------
-    v : numpy array of voltage time series in mV
-    t : numpy array of times in seconds
+    v : numpy array of voltage time series in mV, or 2-D array of equal-length
+        voltage time series (one sweep per row) that share the time array `t`
+    t : numpy array of times in seconds or TimeAxis
     filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default None)
 
     Returns
     -------
-    dvdt : numpy array of time-derivative of voltage (V/s = mV/ms)
+    dvdt : numpy array of time-derivative of voltage (V/s = mV/ms). For a 2-D `v`
+        one row per sweep is returned and nan values are left in place.
     """
 
     if has_fixed_dt(t) and filter:
@@ -42,21 +186,64 @@ def calculate_dvdt(v, t, filter=None):
         if filt_coeff < 0 or filt_coeff >= 1:
             raise ValueError("bessel coeff ({:f}) is outside of valid range [0,1); cannot filter sampling frequency {:.1f} kHz with cutoff frequency {:.1f} kHz.".format(filt_coeff, sample_freq / 1e3, filter))
         b, a = signal.bessel(4, filt_coeff, "low")
-        v_filt = signal.filtfilt(b, a, v, axis=0)
-        dv = np.diff(v_filt)
+        v_filt = signal.filtfilt(b, a, v, axis=-1)
+        dv = np.diff(v_filt, axis=-1)
     else:
-        dv = np.diff(v)
+        dv = np.diff(v, axis=-1)
 
-    dt = np.diff(t)
+    if isinstance(t, TimeAxis):
+        dt = t.dt
+    else:
+        dt = np.diff(t)
     dvdt = 1e-3 * dv / dt # in V/s = mV/ms
 
     # Remove nan values (in case any dt values == 0)
-    dvdt = dvdt[~np.isnan(dvdt)]
+    if dvdt.ndim == 1:
+        dvdt = dvdt[~np.isnan(dvdt)]
 
     return dvdt
 
+
+class DvdtCache(object):
+    """Time-derivatives of one voltage trace, calculated once per filter cutoff.
+
+    Parameters
+    ----------
+    v : numpy array of voltage time series in mV
+    t : numpy array of times in seconds or TimeAxis
+    """
+
+    def __init__(self, v, t):
+        self.v = v
+        self.t = t
+        self._dvdt = {}
+
+    def dvdt(self, filter=None):
+        """Return the time-derivative of voltage, calculating it on first use.
+
+        Parameters
+        ----------
+        filter : cutoff frequency for 4-pole low-pass Bessel filter in kHz (optional, default None)
+
+        Returns
+        -------
+        dvdt : numpy array of time-derivative of voltage (V/s = mV/ms)
+        """
+        if filter not in self._dvdt:
+            self._dvdt[filter] = calculate_dvdt(self.v, self.t, filter)
+
+        return self._dvdt[filter]
+
+    def store(self, filter, dvdt):
+        """Store a time-derivative of voltage that was calculated elsewhere with `filter`."""
+        self._dvdt[filter] = dvdt
+
+
 def has_fixed_dt(t):
     """Check that all time intervals are identical."""
+    if isinstance(t, TimeAxis):
+        return True
+
     dt = np.diff(t)
     return np.allclose(dt, np.ones_like(dt) * dt[0])
 
@@ -67,7 +254,7 @@ def average_voltage(v, t, start=None, end=None):
     Parameters
     ----------
     v : numpy array of voltage time series in mV
-    t : numpy array of times in seconds
+    t : numpy array of times in seconds or TimeAxis
     start : start of time window for spike detection (optional, default None)
     end : end of time window for spike detection (optional, default None)
 
@@ -82,8 +269,7 @@ def average_voltage(v, t, start=None, end=None):
     if end is None:
         end = t[-1]
 
-    start_index = find_time_index(t, start)
-    end_index = find_time_index(t, end)
+    start_index, end_index = find_time_indexes(t, [start, end])
 
     return v[start_index:end_index].mean()
 
@@ -20,7 +20,7 @@ from pynwb.icephys import IntracellularElectrode
 
 from ipfx.x_to_nwb.conversion_utils import PLACEHOLDER, V_CLAMP_MODE, I_CLAMP_MODE, \
      parseUnit, getStimulusSeriesClass, getAcquiredSeriesClass, createSeriesName, convertDataset, \
-     getPackageInfo, createCycleID
+     getPackageInfo, createCycleID, SweepDataChunkIterator, mapABFData, scaleABFSamples
 
 log = logging.getLogger(__name__)
 
@@ -30,7 +30,10 @@ class ABFConverter:
     protocolStorageDir = None
     adcNamesWithRealData = ["IN 0", "IN 1", "IN 2", "IN 3"]
 
-    def __init__(self, inFileOrFolder, outFile, outputFeedbackChannel, compression=True):
+    # number of samples of the acquired data read at once when streaming
+    streamingChunkLength = 2**20
+
+    def __init__(self, inFileOrFolder, outFile, outputFeedbackChannel, compression=True, streaming=False):
         """
         Convert the given ABF file to NWB
 
@@ -39,6 +42,8 @@ class ABFConverter:
         outFile               -- target filepath (must not exist)
         outputFeedbackChannel -- Output ADC data from feedback channels as well (useful for debugging only)
         compression           -- Toggle compression for HDF5 datasets
+        streaming             -- Read the data of each sweep only while writing it, instead of
+                                 loading all files up front, so that memory does not scale with the folder
         """
 
         inFiles = []
@@ -52,6 +57,7 @@ class ABFConverter:
 
         self.outputFeedbackChannel = outputFeedbackChannel
         self.compression = compression
+        self.streaming = streaming
 
         self._settings = self._getJSONFiles(inFileOrFolder)
 
@@ -61,6 +67,11 @@ class ABFConverter:
 
         for inFile in inFiles:
             abf = pyabf.ABF(inFile, loadData=False)
+
+            if streaming:
+                # setSweep loads all data unless abf.data is present
+                abf.data = mapABFData(abf)
+
             self.abfs.append(abf)
 
             # ensure that the input file matches our expectations
@@ -355,6 +366,29 @@ class ABFConverter:
 
         return delta.total_seconds() + abf.sweepX[0]
 
+    @staticmethod
+    def _stimulusLoader(abf, sweep, channel, scale_factor):
+        """
+        Return a function loading the scaled stimulus of the sweep and channel, for `SweepDataChunkIterator`.
+        """
+
+        def load(start, stop):
+            abf.setSweep(sweep, channel=channel, absoluteTime=True)
+            return (abf.sweepC[start:stop] * scale_factor).astype(np.float32)
+
+        return load
+
+    @staticmethod
+    def _acquisitionLoader(abf, channel, samples):
+        """
+        Return a function scaling the raw `samples` of the channel, for `SweepDataChunkIterator`.
+        """
+
+        def load(start, stop):
+            return scaleABFSamples(abf, channel, samples[start:stop])
+
+        return load
+
     def _createStimulusSeries(self, electrodes):
         """
         Return a list of pynwb stimulus series objects created from the ABF file contents.
@@ -377,7 +411,12 @@ class ABFConverter:
 
                     abf.setSweep(sweep, channel=channel, absoluteTime=True)
                     name, counter = createSeriesName("index", counter, total=self.totalSeriesCount)
-                    data = convertDataset(abf.sweepC * scale_factor, self.compression)
+                    if self.streaming:
+                        data = SweepDataChunkIterator(self._stimulusLoader(abf, sweep, channel, scale_factor),
+                                                      len(abf.sweepC))
+                    else:
+                        data = abf.sweepC * scale_factor
+                    data = convertDataset(data, self.compression)
                     conversion, unit = parseUnit(abf.sweepUnitsC)
                     electrode = electrodes[channel]
                     gain = abf._dacSection.fDACScaleFactor[channel]
@@ -555,7 +594,12 @@ class ABFConverter:
 
                     abf.setSweep(sweep, channel=channel, absoluteTime=True)
                     name, counter = createSeriesName("index", counter, total=self.totalSeriesCount)
-                    data = convertDataset(abf.sweepY, self.compression)
+                    if self.streaming:
+                        data = SweepDataChunkIterator(self._acquisitionLoader(abf, channel, abf.sweepY),
+                                                      len(abf.sweepY), ABFConverter.streamingChunkLength)
+                    else:
+                        data = abf.sweepY
+                    data = convertDataset(data, self.compression)
                     conversion, unit = parseUnit(abf.sweepUnitsY)
                     electrode = electrodes[channel]
                     gain = abf._adcSection.fADCProgrammableGain[channel]
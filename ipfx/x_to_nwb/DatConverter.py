@@ -42,48 +42,50 @@ class DatConverter:
         if not os.path.isfile(inFile):
             raise ValueError(f"The input file {inFile} does not exist.")
 
-        self.bundle = Bundle(inFile)
+        self.bundle = Bundle(inFile, use_mmap=True, lazy_tree=True)
+
         self.compression = compression
 
-        self._check()
+        with self.bundle:
+            self._check()
 
-        self.totalSeriesCount = self._getMaxTimeSeriesCount()
+            self.totalSeriesCount = self._getMaxTimeSeriesCount()
 
-        def generateList(multipleGroupsPerFile, pul):
-            """
-            Return a list of groups from pul depending on multipleGroupsPerFile.
-            """
+            def generateList(multipleGroupsPerFile, pul):
+                """
+                Return a list of groups from pul depending on multipleGroupsPerFile.
+                """
 
-            if multipleGroupsPerFile:
-                return [pul]
+                if multipleGroupsPerFile:
+                    return [pul]
 
-            return [[x] for x in pul]
+                return [[x] for x in pul]
 
-        for elem in generateList(multipleGroupsPerFile, self.bundle.pul):
+            for elem in generateList(multipleGroupsPerFile, self.bundle.pul):
 
-            nwbFile = self._createFile()
+                nwbFile = self._createFile()
 
-            device = self._createDevice()
-            nwbFile.add_device(device)
+                device = self._createDevice()
+                nwbFile.add_device(device)
 
-            self.electrodeDict = DatConverter._generateElectrodeDict(elem)
-            electrodes = self._createElectrodes(device)
-            nwbFile.add_ic_electrode(electrodes)
+                self.electrodeDict = DatConverter._generateElectrodeDict(elem)
+                electrodes = self._createElectrodes(device)
+                nwbFile.add_ic_electrode(electrodes)
 
-            for i in self._createAcquiredSeries(electrodes, elem):
-                nwbFile.add_acquisition(i)
+                for i in self._createAcquiredSeries(electrodes, elem):
+                    nwbFile.add_acquisition(i)
 
-            for i in self._createStimulusSeries(electrodes, elem):
-                nwbFile.add_stimulus(i)
+                for i in self._createStimulusSeries(electrodes, elem):
+                    nwbFile.add_stimulus(i)
 
-            if multipleGroupsPerFile:
-                outFileFmt = outFile
-            else:
-                name, suffix = os.path.splitext(outFile)
-                outFileFmt = f"{name}-{elem[0].GroupCount}{suffix}"
+                if multipleGroupsPerFile:
+                    outFileFmt = outFile
+                else:
+                    name, suffix = os.path.splitext(outFile)
+                    outFileFmt = f"{name}-{elem[0].GroupCount}{suffix}"
 
-            with NWBHDF5IO(outFileFmt, "w") as io:
-                io.write(nwbFile, cache_spec=True)
+                with NWBHDF5IO(outFileFmt, "w") as io:
+                    io.write(nwbFile, cache_spec=True)
 
     @staticmethod
     def outputMetadata(inFile):
@@ -559,7 +561,7 @@ class DatConverter:
                                              total=self.totalSeriesCount)
                     for trace in sweep:
                         name, counter = createSeriesName("index", counter, total=self.totalSeriesCount)
-                        data = convertDataset(self.bundle.data[trace], self.compression)
+                        data = convertDataset(self.bundle.data.getScaled(trace, np.float32), self.compression)
 
                         ampState = DatConverter._getAmplifierState(self.bundle, series, trace)
 
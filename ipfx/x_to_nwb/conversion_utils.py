@@ -15,8 +15,10 @@ from pynwb.icephys import CurrentClampSeries, VoltageClampSeries
 
 try:
     from pynwb.form.backends.hdf5.h5_utils import H5DataIO
+    from pynwb.form.data_utils import AbstractDataChunkIterator, DataChunk
 except ModuleNotFoundError:
     from hdmf.backends.hdf5.h5_utils import H5DataIO
+    from hdmf.data_utils import AbstractDataChunkIterator, DataChunk
 
 PLACEHOLDER = "PLACEHOLDER"
 V_CLAMP_MODE = 0
@@ -105,9 +107,14 @@ def createCycleID(numbers, total):
 def convertDataset(array, compression):
     """
     Convert to FP32 and optionally request compression for the given array and return it wrapped.
+
+    FP32 arrays are not copied. Chunk iterators, which return FP32 chunks already, are only wrapped.
     """
 
-    data = array.astype(np.float32)
+    if isinstance(array, AbstractDataChunkIterator):
+        data = array
+    else:
+        data = array.astype(np.float32, copy=False)
 
     if compression:
         return H5DataIO(data=data, compression=True, chunks=True, shuffle=True, fletcher32=True)
@@ -115,6 +122,86 @@ def convertDataset(array, compression):
     return data
 
 
+class SweepDataChunkIterator(AbstractDataChunkIterator):
+    """
+    Iterate over the FP32 samples of a sweep in chunks, which are only loaded
+    when the NWB file is written.
+
+    :param: loadChunk:
+        Function returning the samples `[start, stop)` of the sweep as FP32 array
+        given `start` and `stop`
+
+    :param: length:
+        Number of samples of the sweep
+
+    :param: chunkLength:
+        Number of samples per chunk, defaults to the whole sweep
+    """
+
+    def __init__(self, loadChunk, length, chunkLength=None):
+        self.loadChunk = loadChunk
+        self.length = length
+        self.chunkLength = chunkLength or length
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= self.length:
+            raise StopIteration
+
+        start = self.position
+        stop = min(start + self.chunkLength, self.length)
+        self.position = stop
+
+        return DataChunk(data=self.loadChunk(start, stop), selection=np.s_[start:stop])
+
+    def recommended_chunk_shape(self):
+        return None
+
+    def recommended_data_shape(self):
+        return (self.length,)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    @property
+    def maxshape(self):
+        return (self.length,)
+
+
+def mapABFData(abf):
+    """
+    Map the raw samples of the ABF file into memory, channels as rows as in `abf.data`.
+
+    Assigned to `abf.data`, it keeps pyabf from loading and scaling all samples
+    of the file on `setSweep`, and `abf.sweepY` becomes a view of the raw samples
+    of the sweep, which `scaleABFSamples` scales.
+    """
+
+    raw = np.memmap(abf.abfFilePath, dtype=abf._dtype, mode="r",
+                    offset=abf.dataByteStart, shape=(abf.dataPointCount,))
+
+    return raw.reshape(-1, abf.channelCount).T
+
+
+def scaleABFSamples(abf, channel, raw):
+    """
+    Return the raw samples of the given channel of the ABF file scaled to FP32
+    in the same way as pyabf does when loading the data.
+    """
+
+    data = raw.astype(np.float32)
+
+    if abf._dtype == np.int16:
+        np.multiply(data, abf._dataGain[channel], out=data)
+        np.add(data, abf._dataOffset[channel], out=data)
+
+    return data
+
+
 def getPackageInfo():
     """
     Return a dictionary with version information for the allensdk package
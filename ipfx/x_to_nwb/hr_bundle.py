@@ -1,4 +1,6 @@
+import mmap
 import warnings
+from contextlib import contextmanager
 
 from ipfx.x_to_nwb.hr_nodes import (Pulsed, StimulusTemplate, AmplifierFile,
                                     ProtocolMethod, Solutions, Marker,
@@ -8,6 +10,15 @@ from ipfx.x_to_nwb.hr_nodes import (Pulsed, StimulusTemplate, AmplifierFile,
 class Bundle():
     """
     Represent a PATCHMASTER tree file in memory
+
+    By default the file is opened for every read. With `use_mmap` it is opened
+    once and mapped into memory for the lifetime of the bundle, and the raw data
+    of the traces are read without copies. Close it with `close()` or use the
+    bundle as a context manager, which closes it on exit.
+
+    With `lazy_tree` the trees are read in one go and parsed with
+    `TreeNode.frombuffer`, which converts the fields of the records on first
+    access.
     """
 
     item_classes = {
@@ -21,10 +32,18 @@ class Bundle():
         '.onl': Analysis
     }
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, use_mmap=False, lazy_tree=False):
         self.file_name = file_name
+        self.use_mmap = use_mmap
+        self.lazy_tree = lazy_tree
+        self.fh = None
+        self.mmap = None
+
+        if use_mmap:
+            self.fh = open(self.file_name, 'rb')
+            self.mmap = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
 
-        with self:
+        with self._opened():
             if self.fh.read(4) != b'DAT2':
                 raise ValueError(f"No support for other files than 'DAT2' format")
 
@@ -53,12 +72,48 @@ class Bundle():
 
         return
 
-    def __enter__(self):
+    @contextmanager
+    def _opened(self):
+        """
+        Context in which `fh` is open for reading. Without `use_mmap` the file is
+        opened for the duration of the context, otherwise it is open anyway.
+        """
+        if self.use_mmap:
+            yield self.fh
+            return
+
         self.fh = open(self.file_name, 'rb')
+        try:
+            yield self.fh
+        finally:
+            self.fh.close()
+            self.fh = None
+
+    def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.fh.close()
+        try:
+            self.close()
+        except BufferError:
+            # On errors, arrays referenced from the traceback can still hold the
+            # memory map, which must not hide the original exception
+            if exc_type is None:
+                raise
+
+    def close(self):
+        """
+        Close the file and the memory map of a bundle with `use_mmap`.
+
+        Raises a `BufferError` while raw data of traces still reference the memory map.
+        """
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
 
     @property
     def data(self):
@@ -130,13 +185,19 @@ class Bundle():
 
         cls = self.item_classes[ext]
 
-        with self:
+        with self._opened():
             if ext == '.dat':
                 item.instance = cls(self)
             else:
                 self.fh.seek(item.Start)
+
+                if self.lazy_tree:
+                    data = self.fh.read(item.Length)
+                else:
+                    data = self.fh.read(4)
+
                 # read endianess magic
-                magic = self.fh.read(4)
+                magic = data[:4]
                 if magic == b'eerT':
                     endianess = '<'
                 elif magic == b'Tree':
@@ -144,7 +205,10 @@ class Bundle():
                 else:
                     raise RuntimeError('Bad file magic: %s' % magic)
 
-                item.instance = cls(self.fh, endianess)
+                if self.lazy_tree:
+                    item.instance = cls.frombuffer(data, 4, endianess)
+                else:
+                    item.instance = cls(self.fh, endianess)
 
             return item.instance
 
@@ -1131,6 +1131,10 @@ class Analysis(TreeNode):
 # Not a TreeNode as the data starts at file offset `trace.Data`
 # and also endianess handling is different
 class RawData():
+
+    # number of samples scaled at once by `getScaled` with a dtype
+    scalingBlockSize = 2**16
+
     def __init__(self, bundle):
         self.bundle = bundle
 
@@ -1152,13 +1156,60 @@ class RawData():
             pul = self.bundle.pul
             trace = pul[index[0]][index[1]][index[2]][index[3]]
 
+        return self.getScaled(trace)
+
+    def getRaw(self, trace):
+        """
+        Get the unscaled data of a trace.
+
+        With a bundle using `use_mmap` this is a read-only view of the file
+        contents, otherwise a copy read from the file.
+
+        :param trace: `TraceRecord`
+
+        :return: 1D-numpy array
+        """
+
         assert trace.DataKind["IsLittleEndian"], "Big endian support is not implemented"
 
-        with self.bundle:
+        dtype = convertDataFormatToNP(trace.DataFormat)
+
+        if self.bundle.mmap is not None:
+            return np.frombuffer(self.bundle.mmap, dtype=dtype, count=trace.DataPoints, offset=trace.Data)
+
+        with self.bundle._opened():
             self.bundle.fh.seek(trace.Data)
-            dtype = convertDataFormatToNP(trace.DataFormat)
-            data = np.fromfile(self.bundle.fh, count=trace.DataPoints, dtype=dtype)
-            return data * trace.DataScaler + trace.ZeroData
+            return np.fromfile(self.bundle.fh, count=trace.DataPoints, dtype=dtype)
+
+    def getScaled(self, trace, dtype=None):
+        """
+        Get the data of a trace scaled to its unit.
+
+        :param trace: `TraceRecord`
+        :param dtype: dtype of the result. The data is scaled directly (or block wise
+                      for traces with an offset) into the result, with the same
+                      precision as without `dtype`, instead of being converted
+                      afterwards. Defaults to the dtype of the scaling.
+
+        :return: 1D-numpy array
+        """
+
+        raw = self.getRaw(trace)
+
+        if dtype is None:
+            return raw * trace.DataScaler + trace.ZeroData
+
+        data = np.empty(len(raw), dtype=dtype)
+
+        if trace.ZeroData == 0:
+            np.multiply(raw, trace.DataScaler, out=data, dtype=np.result_type(raw, trace.DataScaler))
+            return data
+
+        for start in range(0, len(raw), self.scalingBlockSize):
+            stop = start + self.scalingBlockSize
+            data[start:stop] = raw[start:stop] * trace.DataScaler + trace.ZeroData
+
+        return data
 
     def __str__(self):
         return "RawData(...)"
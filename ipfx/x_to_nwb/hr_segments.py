@@ -35,7 +35,7 @@ def getSegmentClass(stimRec, channelRec, segmentRec):
 class Segment(ABC):
     """
         Base class for all segment types.
-        Derived class must implement `createArray` only.
+        Derived class must implement `createArrays` only.
 
         The following segment types are supported:
         - Constant
@@ -122,7 +122,6 @@ class Segment(ABC):
 
         return Segment._applyDelta(self.xDelta, xValue, sweepNo), Segment._applyDelta(self.yDelta, yValue, sweepNo)
 
-    @abstractmethod
     def createArray(self, sweep):
         """
         Return a numpy array with the stimset data.
@@ -130,6 +129,17 @@ class Segment(ABC):
         Units are [mV] for voltage clamp and [pA] for current clamp.
         """
 
+        return self.createArrays([sweep])[0]
+
+    @abstractmethod
+    def createArrays(self, sweeps):
+        """
+        Return a 2D numpy array with the stimset data of the given sweeps, one
+        row per sweep, see also Segment.createArray.
+
+        All sweeps must have the same duration, see Segment.getDuration.
+        """
+
         pass
 
     def hasXDelta(self):
@@ -155,6 +165,20 @@ class Segment(ABC):
 
         return duration, self.applyAmplitudeScale(amplitude)
 
+    def getDuration(self, sweepNo):
+        """
+        Return the duration of the segment in the given sweep.
+        """
+
+        return Segment._applyDelta(self.xDelta, self.duration, sweepNo)
+
+    def getAmplitudes(self, sweeps):
+        """
+        Return a column vector with the scaled amplitudes of the given sweeps.
+        """
+
+        return np.array([self.doStepping(sweep)[1] for sweep in sweeps], dtype=float)[:, np.newaxis]
+
     def calculateNumberOfPoints(self, duration):
         """
         Return the number of points of this segment.
@@ -221,7 +245,7 @@ class SquareSegment(Segment):
     def getAmplitude(self, channelRec, segmentRec):
         return None
 
-    def createArray(self, sweep):
+    def createArrays(self, sweeps):
 
         numPoints = self.calculateNumberOfPoints(self.duration)
         numPointsCycle = math.trunc(self.cycleDuration / self.sampleInterval)
@@ -233,10 +257,13 @@ class SquareSegment(Segment):
 
         numCycles = math.ceil(self.duration / self.cycleDuration)
 
-        segment = np.tile(oneCycle, numCycles)
-        segment.resize(numPoints)
+        # truncate or zero pad the cycles to the segment length
+        segment = np.zeros([numPoints])
+        cycles = np.tile(oneCycle, numCycles)[:numPoints]
+        segment[:len(cycles)] = cycles
 
-        return segment
+        # no delta modes, so all sweeps are the same
+        return np.tile(segment, (len(sweeps), 1))
 
 
 class ConstantSegment(Segment):
@@ -249,12 +276,11 @@ class ConstantSegment(Segment):
                (", "
                 "amp={}").format(self.amplitude)
 
-    def createArray(self, sweep):
+    def createArrays(self, sweeps):
 
-        duration, amplitude = self.doStepping(sweep)
-        numPoints = self.calculateNumberOfPoints(duration)
+        numPoints = self.calculateNumberOfPoints(self.getDuration(sweeps[0]))
 
-        return np.full((numPoints), amplitude)
+        return np.repeat(self.getAmplitudes(sweeps), numPoints, axis=1)
 
 
 class RampSegment(Segment):
@@ -267,12 +293,11 @@ class RampSegment(Segment):
                (", "
                 "amp={}").format(self.amplitude)
 
-    def createArray(self, sweep):
+    def createArrays(self, sweeps):
 
-        duration, amplitude = self.doStepping(sweep)
-        numPoints = self.calculateNumberOfPoints(duration)
+        numPoints = self.calculateNumberOfPoints(self.getDuration(sweeps[0]))
 
-        return np.linspace(0.0, amplitude, numPoints)
+        return np.linspace(0.0, self.getAmplitudes(sweeps)[:, 0], numPoints, axis=1)
 
 
 # Chirp wave dialog in PatchMaster:
@@ -305,9 +330,9 @@ class ChirpSegment(Segment):
         # stored in the DAT file.
         return channelRec.Chirp_Amplitude * 0.5
 
-    def createArray(self, sweep):
+    def createArrays(self, sweeps):
 
-        duration, amplitude = self.doStepping(sweep)
+        duration = self.getDuration(sweeps[0])
         numPoints = self.calculateNumberOfPoints(duration)
         x = np.linspace(0, duration, numPoints)
 
@@ -316,5 +341,6 @@ class ChirpSegment(Segment):
         elif self.kind == "Linear":
             method = "linear"
 
-        return amplitude * scipy.signal.chirp(x, f0=self.startFreq, f1=self.endFreq,
-                                              t1=duration, method=method, phi=-90)
+        # the chirp only depends on the duration, which is the same for all sweeps
+        return self.getAmplitudes(sweeps) * scipy.signal.chirp(x, f0=self.startFreq, f1=self.endFreq,
+                                                               t1=duration, method=method, phi=-90)
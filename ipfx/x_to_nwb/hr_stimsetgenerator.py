@@ -56,18 +56,33 @@ class StimSetGenerator:
                 raise ValueError(f"Unsupported ActualDacChannels lengths for "
                                  f"sweep index {stimRec_idx} and ChannelRecord index {channelRec_index}.")
 
-            allSweeps = []
-
-            for sweep in range(stimRec.NumberSweeps):
-                stimset = np.empty([0])
-                for segmentRec in channelRec:
-                    cls = getSegmentClass(stimRec, channelRec, segmentRec)
-                    # print(cls)
-                    segment = cls.createArray(sweep)
-
-                    stimset = np.append(stimset, segment, axis=0)
-
-                allSweeps.append(stimset)
+            segments = [getSegmentClass(stimRec, channelRec, segmentRec) for segmentRec in channelRec]
+            sweeps = range(stimRec.NumberSweeps)
+
+            # durations of the segments (columns) in each sweep (rows)
+            durations = [[segment.getDuration(sweep) for segment in segments] for sweep in sweeps]
+            lengths = np.array([[segment.calculateNumberOfPoints(duration)
+                                 for segment, duration in zip(segments, row)] for row in durations],
+                               dtype=int).reshape(len(sweeps), len(segments))
+            ends = np.cumsum(lengths, axis=1)
+            totalLengths = lengths.sum(axis=1)
+
+            if len(set(totalLengths)) == 1:
+                allSweeps = list(np.empty((len(sweeps), totalLengths[0])))
+            else:
+                allSweeps = [np.empty(totalLength) for totalLength in totalLengths]
+
+            for index, segment in enumerate(segments):
+
+                # all sweeps with the same segment duration are created at once
+                sweepsByDuration = {}
+                for sweep in sweeps:
+                    sweepsByDuration.setdefault(durations[sweep][index], []).append(sweep)
+
+                for group in sweepsByDuration.values():
+                    for sweep, data in zip(group, segment.createArrays(group)):
+                        end = ends[sweep, index]
+                        allSweeps[sweep][end - lengths[sweep, index]:end] = data
 
             self.cache[key] = allSweeps
 
@@ -2,6 +2,14 @@ import re
 import struct
 import collections
 
+import numpy as np
+
+# numpy types of the numeric struct format characters, all other
+# characters are read as raw bytes
+NUMPY_TYPES = {'b': 'i1', 'B': 'u1', '?': 'u1', 'h': 'i2', 'H': 'u2',
+               'i': 'i4', 'I': 'u4', 'l': 'i4', 'L': 'u4', 'q': 'i8',
+               'Q': 'u8', 'f': 'f4', 'd': 'f8'}
+
 
 class Struct():
     """High-level wrapper around struct.Struct that makes it a bit easier to
@@ -36,6 +44,10 @@ class Struct():
         fh = open(fname, 'rb')
         data = MyStruct(fh)
 
+    Alternatively structures can be created with *from_records* from records
+    of the numpy structured dtype returned by *dtype*. Their fields are then
+    only converted when they are first accessed.
+
     """
 
     field_info = None
@@ -125,6 +137,140 @@ class Struct():
         cls._field_info()
         return cls._le_struct.size
 
+    @classmethod
+    def dtype(cls, endian='<'):
+        """Return the numpy structured dtype of the struct with *endian* byte
+        order. Omitted fields are not part of the dtype, sub-structures and
+        strings are raw bytes (void) fields.
+        """
+        dtypes = cls.__dict__.get('_dtypes')
+        if dtypes is None:
+            dtypes = cls._dtypes = {}
+
+        if endian in dtypes:
+            return dtypes[endian]
+
+        names = []
+        formats = []
+        offsets = []
+        offset = 0
+        for name, fmt, func in cls._field_info():
+            size = struct.calcsize('<' + fmt)
+            if func is not None:
+                count, char = re.match(r'(\d*)(.)', fmt).groups()
+                if char in NUMPY_TYPES and count:
+                    np_fmt = (endian + NUMPY_TYPES[char], int(count))
+                elif char in NUMPY_TYPES:
+                    np_fmt = endian + NUMPY_TYPES[char]
+                elif char == 'c' and count:
+                    np_fmt = ('V1', int(count))
+                else:
+                    np_fmt = 'V%d' % size
+                names.append(name)
+                formats.append(np_fmt)
+                offsets.append(offset)
+            offset += size
+
+        dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                          'itemsize': offset})
+        dtypes[endian] = dtype
+        return dtype
+
+    @classmethod
+    def records(cls, data, offsets, realsize=None, endian='<'):
+        """Read the records at *offsets* in the buffer *data* as numpy
+        structured array of *dtype*.
+
+        Only the first *realsize* bytes of each record are used, defaults to
+        the size of the struct. Smaller records are padded with zeros.
+        """
+        size = cls.size()
+        if realsize is None:
+            realsize = size
+
+        padding = bytes(max(size - realsize, 0))
+        length = min(size, realsize)
+        data = b''.join([data[offset:offset + length] + padding for offset in offsets])
+
+        return np.frombuffer(data, dtype=cls.dtype(endian), count=len(offsets))
+
+    @classmethod
+    def from_records(cls, records, endian='<'):
+        """Create a structure for every record of the numpy structured array
+        *records* of *dtype*.
+
+        The fields are not converted up front. A field is converted for all
+        records at once when it is first accessed on one of the structures.
+        """
+        structs = [cls.__new__(cls) for _ in range(len(records))]
+        shared = (records, structs, endian)
+        for self in structs:
+            self._records = shared
+        return structs
+
+    @classmethod
+    def _convert_column(cls, name, column, endian):
+        """Convert the field *name* of all records in the array *column* like
+        the struct unpacking does."""
+        fmt, func = cls._field_lookup()[name]
+        char = fmt[-1]
+
+        if char == '?' and len(fmt) > 1:
+            items = [tuple(bool(x) for x in item) for item in column.tolist()]
+        elif char == '?':
+            items = [bool(item) for item in column.tolist()]
+        elif char in NUMPY_TYPES and len(fmt) > 1:
+            items = [tuple(item) for item in column.tolist()]
+        elif char in NUMPY_TYPES:
+            items = column.tolist()
+        elif char == 'c' and len(fmt) > 1:
+            items = [tuple(x.tobytes() for x in item) for item in column]
+        else:
+            data = column.tobytes()
+            size = column.dtype.itemsize
+            items = [data[i:i + size] for i in range(0, len(data), size)]
+
+        if isinstance(func, tuple):
+            substr, func = func
+            items = [substr(item, endian) for item in items]
+
+        if func is not True:
+            items = [func(item) for item in items]
+
+        return items
+
+    @classmethod
+    def _field_lookup(cls):
+        # format and function of the fields by name, without the omitted fields
+        lookup = cls.__dict__.get('_fields_by_name')
+        if lookup is None:
+            lookup = {name: (fmt, func) for name, fmt, func in cls._field_info() if func is not None}
+            cls._fields_by_name = lookup
+        return lookup
+
+    def __getattr__(self, name):
+        # only called for attributes which are not set, which are the
+        # not yet converted fields of structures created from records
+        shared = self.__dict__.get('_records')
+        if shared is None:
+            raise AttributeError(name)
+
+        if name == 'fields':
+            fields = collections.OrderedDict()
+            for field_name in self._field_lookup():
+                fields[field_name] = getattr(self, field_name)
+            self.fields = fields
+            return fields
+
+        if name not in self._field_lookup():
+            raise AttributeError(name)
+
+        records, structs, endian = shared
+        for struct_, item in zip(structs, self._convert_column(name, records[name], endian)):
+            struct_.__dict__[name] = item
+
+        return self.__dict__[name]
+
     @classmethod
     def array(cls, x):
         """Return a new StructArray class of length *x* and using this struct
@@ -1,7 +1,9 @@
 """
 Wrapper class around the native struct
 """
+import itertools
 import struct
+
 from ipfx.x_to_nwb.hr_struct import Struct
 
 
@@ -48,6 +50,63 @@ class TreeNode(Struct):
             self.children.append(child_rectype(fh, endianess, record_types,
                                  level_sizes, level))
 
+    @classmethod
+    def from_records(cls, records, endianess, level=0):
+        nodes = super().from_records(records, endianess)
+        for node in nodes:
+            node.level = level
+            node.children = []
+        return nodes
+
+    @classmethod
+    def frombuffer(cls, data, offset, endianess):
+        """Alternative to the constructor of the root nodes, which parses the
+        tree from the buffer *data* starting at *offset*.
+
+        The records of each level of the tree are read at once as numpy
+        structured array and their fields are only converted on first access.
+        """
+        levels = struct.unpack_from(endianess + 'i', data, offset)[0]
+        level_sizes = struct.unpack_from(endianess + '%di' % levels, data, offset + 4)
+        record_types = [cls] + cls.rectypes[1:]
+
+        offsets = [[] for _ in record_types]
+        nchildren = [[] for _ in record_types]
+        TreeNode._scan(data, offset + 4 * (levels + 1), endianess, level_sizes, offsets, nchildren)
+
+        nodes = []
+        for level, rectype in enumerate(record_types):
+            records = rectype.records(data, offsets[level], level_sizes[level], endianess)
+            nodes.append(rectype.from_records(records, endianess, level))
+
+        # the records are stored depth first, so the children of the nodes of
+        # a level follow each other in the next level
+        for level in range(len(record_types) - 1):
+            children = iter(nodes[level + 1])
+            for node, nchild in zip(nodes[level], nchildren[level]):
+                node.children = list(itertools.islice(children, nchild))
+
+        return nodes[0][0]
+
+    @staticmethod
+    def _scan(data, offset, endianess, level_sizes, offsets, nchildren, level=0):
+        """Collect the offsets of the records and their numbers of children of the
+        subtree at *offset* per level and return the offset after the subtree.
+        """
+        offsets[level].append(offset)
+        offset += level_sizes[level]
+        nchild = struct.unpack_from(endianess + 'i', data, offset)[0]
+        offset += 4
+
+        if level + 1 >= len(offsets):
+            return offset
+
+        nchildren[level].append(nchild)
+        for _ in range(nchild):
+            offset = TreeNode._scan(data, offset, endianess, level_sizes, offsets, nchildren, level + 1)
+
+        return offset
+
     def __getitem__(self, i):
         return self.children[i]
 
@@ -1,8 +1,10 @@
 from __future__ import absolute_import
 import pytest
+import numpy as np
 from ipfx.stimulus import StimulusOntology
 from ipfx.aibs_data_set import AibsDataSet
 from ipfx.aibs_data_set import EphysDataSet
+from ipfx.data_set_utils import create_data_set
 import ipfx.sweep_props as sp
 from .helpers_for_tests import compare_dicts
 import allensdk.core.json_utilities as ju
@@ -70,3 +72,23 @@ def test_get_stimulus_code_ext(NWB_file):
     dataset = AibsDataSet(nwb_file=NWB_file, ontology=default_ontology)
 
     assert dataset.get_stimulus_code_ext("EXTPSMOKET180424",0) == "EXTPSMOKET180424[0]"
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_sweep_dtype(NWB_file):
+
+    ontology = StimulusOntology(ju.read(StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE))
+    native = create_data_set(nwb_file=NWB_file, ontology=ontology).sweep(0)
+    sweep32 = create_data_set(nwb_file=NWB_file, ontology=ontology, dtype="float32").sweep(0)
+    sweep64 = create_data_set(nwb_file=NWB_file, ontology=ontology, dtype="float64").sweep(0)
+
+    assert sweep32.v.dtype == np.float32 and sweep32.i.dtype == np.float32
+    assert sweep64.v.dtype == np.float64 and sweep64.i.dtype == np.float64
+
+    # the file stores float32 samples, so float64 only adds the rounding of the unit conversions
+    for sweep in (sweep32, sweep64):
+        np.testing.assert_allclose(sweep.v, native.v, rtol=1e-6)
+        np.testing.assert_allclose(sweep.i, native.i, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        create_data_set(nwb_file=NWB_file, ontology=ontology, dtype="int16")
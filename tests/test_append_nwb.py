@@ -1,5 +1,6 @@
 import pytest
 import datetime
+import shutil
 import pynwb
 import h5py
 
@@ -7,6 +8,7 @@ import numpy as np
 import ipfx.nwb_reader as nwb_reader
 
 from ipfx.bin.run_feature_extraction import embed_spike_times
+from ipfx.nwb_append import create_nwb_appender
 
 
 def make_skeleton_nwb1_file(nwb1_file_name):
@@ -60,3 +62,59 @@ def test_embed_spike_times_into_nwb(make_skeleton_nwb_file, tmpdir_factory):
         assert np.allclose(nwb_data.get_spike_times(sweep_num), spike_times)
 
 
+@pytest.mark.parametrize('NWB_file', ['2018_03_20_0005.nwb'], indirect=True)
+def test_add_spike_times_in_place(NWB_file, tmpdir):
+
+    nwb_file_name = str(tmpdir.join("cell.nwb"))
+    shutil.copy(NWB_file, nwb_file_name)
+
+    with h5py.File(nwb_file_name, 'r') as f:
+        data_offset = f["acquisition/index_0/data"].id.get_offset()
+
+    appender = create_nwb_appender(nwb_file_name)
+    appender.add_spike_times({3: [56.0, 44.6], 4: []})
+    appender.add_spike_times({3: [661.1]})
+
+    with nwb_reader.create_nwb_reader(nwb_file_name) as nwb_data:
+        assert np.allclose(nwb_data.get_spike_times(3), [661.1])
+        assert len(nwb_data.get_spike_times(4)) == 0
+        assert nwb_data.h5_file["acquisition/index_0/data"].id.get_offset() == data_offset
+
+    appender.add_spike_times({5: [1.5]}, replace=True)
+
+    with pynwb.NWBHDF5IO(nwb_file_name, 'r') as io:
+        spikes = io.read().processing["spikes"]
+        assert list(spikes.data_interfaces) == ["Sweep_5"]
+        assert np.allclose(spikes["Sweep_5"].timestamps[:], [1.5])
+
+
+def test_embed_spike_times_in_place_nwb1(tmpdir, monkeypatch):
+
+    nwb_file_name = str(tmpdir.join("cell.nwb"))
+    make_skeleton_nwb1_file(nwb_file_name)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("nwb file copied")
+
+    monkeypatch.setattr(shutil, "copy", fail)
+    embed_spike_times(nwb_file_name, nwb_file_name, {3: [56.0, 44.6]})
+
+    with nwb_reader.create_nwb_reader(nwb_file_name) as nwb_data:
+        assert np.allclose(nwb_data.get_spike_times(3), [56.0, 44.6])
+    assert not tmpdir.join("cell.nwb.tmp").exists()
+
+
+@pytest.mark.parametrize('NWB_file', ['2018_03_20_0005.nwb'], indirect=True)
+def test_embed_spike_times_in_place_nwb2(NWB_file, tmpdir, monkeypatch):
+
+    nwb_file_name = str(tmpdir.join("cell.nwb"))
+    shutil.copy(NWB_file, nwb_file_name)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("nwb file copied")
+
+    monkeypatch.setattr(shutil, "copy", fail)
+    embed_spike_times(nwb_file_name, nwb_file_name, {3: [56.0, 44.6]})
+
+    with nwb_reader.create_nwb_reader(nwb_file_name) as nwb_data:
+        assert np.allclose(nwb_data.get_spike_times(3), [56.0, 44.6])
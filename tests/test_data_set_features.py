@@ -1,8 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
 import pytest
+import allensdk.core.json_utilities as ju
 import ipfx.data_set_features as dsft
+from ipfx.ephys_data_set import EphysDataSet
+from ipfx.stimulus import StimulusOntology
 from ipfx.error import FeatureError
 
 
+class TraceDataSet(EphysDataSet):
+    """Data set serving the same voltage trace, with an offset per sweep, for every sweep."""
+
+    def __init__(self, t, v, sweep_numbers, stimulus_names):
+        super(TraceDataSet, self).__init__(StimulusOntology(ju.read(StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE)))
+        self.sweep_table = pd.DataFrame({"sweep_number": sweep_numbers,
+                                         "stimulus_name": stimulus_names,
+                                         "clamp_mode": "CurrentClamp"})
+        self.t = t
+        self.v = v
+
+    def get_sweep_data(self, sweep_number):
+        n = len(self.t)
+        return {"stimulus": np.zeros(n),
+                "response": (self.v + sweep_number % 3) * 1e-3,
+                "sampling_rate": 1. / (self.t[1] - self.t[0]),
+                "epochs": {name: (0, n - 1) for name in ["test", "sweep", "recording", "experiment", "stim"]}}
+
+
 def test_select_subthreshold_min_amplitude():
 
     a = [10, 10, 10, 10]
@@ -41,3 +66,21 @@ def test_select_subthreshold_min_amplitude():
     min_amp, delta = dsft.select_subthreshold_min_amplitude(a)
     assert delta == 20
     assert min_amp == -100
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("max_pending_groups", [0, 2])
+def test_extract_sweep_features_with_executor(spike_test_pair, executor_class, max_pending_groups):
+    t = spike_test_pair[:, 0]
+    v = spike_test_pair[:, 1]
+    data_set = TraceDataSet(t, v, [7, 3, 5, 4, 6], ["Ramp", "Long Square", "Ramp", "Short Square", "Long Square"])
+
+    expected = dsft.extract_sweep_features(data_set, data_set.sweep_table)
+    with executor_class(max_workers=2) as executor:
+        result = dsft.extract_sweep_features(data_set, data_set.sweep_table, executor=executor,
+                                             max_pending_groups=max_pending_groups)
+
+    assert list(result) == list(expected)
+    for sn in expected:
+        assert result[sn]["sweep_number"] == sn
+        pd.testing.assert_frame_equal(result[sn]["spikes"].to_dataframe(), expected[sn]["spikes"].to_dataframe())
@@ -174,3 +174,179 @@ def test_get_sweep_data():
     with pytest.raises(NotImplementedError):
         ds = get_dataset()
         ds.get_sweep_data(123)
+
+
+class CountingDataSet(EphysDataSet):
+
+    def __init__(self):
+        super(CountingDataSet, self).__init__(StimulusOntology(ju.read(StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE)))
+        self.sweep_table = pd.DataFrame(get_sweep_table_dict())
+        self.reads = 0
+
+    def get_clamp_mode(self, sweep_number):
+        return self.get_sweep_record(sweep_number)[self.CLAMP_MODE]
+
+    def get_sweep_data(self, sweep_number):
+        self.reads += 1
+        n = 1000
+        return {"stimulus": np.zeros(n),
+                "response": np.full(n, -0.07),
+                "sampling_rate": 1000.}
+
+
+def test_sweep_cache():
+
+    ds = CountingDataSet()
+    ds.enable_sweep_cache(max_bytes=40000)
+
+    sweep = ds.sweep(0)
+    sweep.select_epoch("recording")
+    again = ds.sweep(0)
+
+    assert ds.reads == 1
+    assert (ds.sweep_cache.hits, ds.sweep_cache.misses) == (1, 1)
+    assert again is not sweep and again._v is sweep._v
+    assert again.selected_epoch_name == "sweep"
+    assert np.allclose(again.v, -70.)
+
+    with pytest.raises(ValueError):
+        again.v[0] = 0.
+
+    ds.sweep(5)
+    ds.sweep(6)
+    ds.sweep(0)
+    assert ds.reads == 4
+    assert ds.sweep_cache.nbytes == 32000
+
+
+def test_sweep_cache_disabled():
+
+    ds = CountingDataSet()
+    ds.sweep(0)
+    ds.sweep(0)
+
+    assert ds.sweep_cache is None
+    assert ds.reads == 2
+
+
+def test_with_sweep_info():
+
+    ds = CountingDataSet()
+    ds.enable_sweep_cache(max_bytes=40000)
+    ds.sweep(0)
+
+    sweep_info = [{"sweep_number": 0, "stimulus_code": "C1LSFINEST150112", "passed": True},
+                  {"sweep_number": 3, "stimulus_code": "C1LSFINEST150112", "passed": True}]
+    subset = ds.with_sweep_info(sweep_info)
+
+    assert subset.sweep_table["sweep_number"].tolist() == [0]
+    assert subset.sweep_table["clamp_mode"].tolist() == ["CurrentClamp"]
+    assert ds.sweep_table["sweep_number"].tolist() == [0, 5, 6]
+
+    subset.sweep(0)
+    assert subset.sweep_cache is ds.sweep_cache
+    assert ds.reads == 1
+
+
+class ArrayReader(object):
+
+    def __init__(self, response):
+        self.response = response
+        self.stimulus = np.ones_like(response)
+
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
+        start, end = index_range if index_range is not None else (0, len(self.response) - 1)
+        return {"stimulus": self.stimulus[start:end + 1].copy(),
+                "response": self.response[start:end + 1].copy(),
+                "sampling_rate": 1000.}
+
+
+class ArrayDataSet(EphysDataSet):
+
+    def __init__(self, response):
+        super(ArrayDataSet, self).__init__(StimulusOntology(ju.read(StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE)))
+        self.sweep_table = pd.DataFrame(get_sweep_table_dict())
+        self._nwb_data = ArrayReader(response)
+
+    @property
+    def nwb_data(self):
+        return self._nwb_data
+
+
+class ReadOnlyReader(ArrayReader):
+
+    def get_sweep_data(self, sweep_number, index_range=None, dtype=None):
+        sweep_data = super(ReadOnlyReader, self).get_sweep_data(sweep_number, index_range, dtype)
+        for key in ("stimulus", "response"):
+            sweep_data[key].flags.writeable = False
+        return sweep_data
+
+
+def test_sweep_from_read_only_data():
+
+    response = np.array([-0.07] * 8 + [0.] * 2)
+    ds = ArrayDataSet(response)
+    ds._nwb_data = ReadOnlyReader(response)
+
+    sweep_data = ds.get_sweep_data(0)
+    assert np.isnan(sweep_data["response"][-2:]).all()
+
+    sweep = ds.sweep(0)
+    np.testing.assert_allclose(sweep.v[:8], -70.)
+    np.testing.assert_array_equal(response, [-0.07] * 8 + [0.] * 2)
+
+
+@pytest.mark.parametrize('index_range', [(0, 9), (2, 5), (5, 9), (6, 9), (0, 3)])
+def test_get_sweep_data_index_range(index_range):
+
+    response = np.array([0., 1., 0., 2., 3., 0., 4., 0., 0., 0.])
+    ds = ArrayDataSet(response)
+
+    expected = ds.get_sweep_data(0)["response"][index_range[0]:index_range[1] + 1]
+    actual = ds.get_sweep_data(0, index_range=index_range)["response"]
+
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_sweep_index_range():
+
+    response = np.linspace(-0.08, -0.06, 1000)
+    ds = ArrayDataSet(response)
+
+    sweep = ds.sweep(0)
+    window = ds.sweep(0, index_range=(200, 399))
+
+    assert len(window.v) == 200
+    np.testing.assert_array_equal(window.v, sweep.v[200:400])
+    np.testing.assert_array_equal(window.t, sweep.t[200:400])
+
+
+@pytest.mark.parametrize('prefetch', [0, 1, 2])
+def test_iter_sweeps(prefetch):
+
+    ds = CountingDataSet()
+    sweeps = ds.iter_sweeps([0, 5, 6, 0], prefetch=prefetch)
+
+    first = next(sweeps)
+    assert ds.reads <= 1 + prefetch
+    rest = list(sweeps)
+
+    assert [s.sweep_number for s in [first] + rest] == [0, 5, 6, 0]
+    assert [s.clamp_mode for s in [first] + rest] == ["CurrentClamp", "VoltageClamp", "VoltageClamp", "CurrentClamp"]
+    assert ds.reads == 4
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_iter_sweeps_raises_in_order(prefetch):
+
+    class FailingDataSet(CountingDataSet):
+        def get_sweep_data(self, sweep_number):
+            if sweep_number == 5:
+                raise IOError("unreadable sweep")
+            return super(FailingDataSet, self).get_sweep_data(sweep_number)
+
+    sweeps = FailingDataSet().iter_sweeps([0, 5, 6], prefetch=prefetch)
+
+    assert next(sweeps).sweep_number == 0
+    with pytest.raises(IOError):
+        next(sweeps)
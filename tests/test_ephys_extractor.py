@@ -35,6 +35,9 @@
 #
 import pytest
 import numpy as np
+import pandas as pd
+from ipfx.sweep import Sweep, SweepSet
+import ipfx.time_series_utils as tsu
 from ipfx.feature_extractor import SpikeFeatureExtractor, SpikeTrainFeatureExtractor
 
 
@@ -113,7 +116,7 @@ def test_extractor_on_variable_time_step(spike_test_var_dt):
     spikes = ext.process(t, v, i=None)
 
     expected_thresh_ind = np.array([73, 183, 314, 463, 616, 770])
-    assert np.allclose(spikes["threshold_index"].values, expected_thresh_ind)
+    assert np.allclose(spikes["threshold_index"], expected_thresh_ind)
 
 
 def test_extractor_with_high_init_dvdt(spike_test_high_init_dvdt):
@@ -126,4 +129,152 @@ def test_extractor_with_high_init_dvdt(spike_test_high_init_dvdt):
     spikes = ext.process(t, v, i=None)
 
     expected_thresh_ind = np.array([11222, 16258, 24060])
-    assert np.allclose(spikes["threshold_index"].values, expected_thresh_ind)
+    assert np.allclose(spikes["threshold_index"], expected_thresh_ind)
+
+
+def test_process_sweep_set_matches_process(spike_test_pair, spike_test_var_dt):
+    t = spike_test_pair[:, 0]
+    v = spike_test_pair[:, 1]
+    t_var = spike_test_var_dt[:, 0]
+    v_var = spike_test_var_dt[:, 1]
+
+    traces = [(t, v), (t, v + 5.), (t_var, v_var), (t, np.zeros_like(v)), (t + 1., v)]
+    sweeps = []
+    for tt, vv in traces:
+        epochs = {name: (0, len(tt) - 1) for name in ["test", "sweep", "recording", "experiment", "stim"]}
+        sweeps.append(Sweep(t=tt, v=vv, i=np.zeros_like(vv), clamp_mode="CurrentClamp",
+                            sampling_rate=1. / (tt[1] - tt[0]), epochs=epochs))
+    sweep_set = SweepSet(sweeps)
+
+    ext = SpikeFeatureExtractor()
+    expected = [ext.process(s.t, s.v, s.i) for s in sweep_set.sweeps]
+
+    for max_batch_size in [None, 1]:
+        results = ext.process_sweep_set(sweep_set, max_batch_size=max_batch_size)
+        assert len(results) == len(expected)
+        for result, exp in zip(results, expected):
+            pd.testing.assert_frame_equal(result.to_dataframe(), exp.to_dataframe())
+
+
+def test_extractors_with_time_axis_match_array(spike_test_pair):
+    v = spike_test_pair[:, 1]
+    i = np.zeros_like(v)
+    t = spike_test_pair[:, 0]
+    axis = tsu.TimeAxis(len(v), t[1] - t[0], start=t[0])
+    t = axis.values()
+
+    ext = SpikeFeatureExtractor()
+    expected = ext.process(t, v, i)
+    result = ext.process(axis, v, i, tsu.DvdtCache(v, axis))
+    assert len(result) > 0
+    pd.testing.assert_frame_equal(result.to_dataframe(), expected.to_dataframe())
+
+    train_ext = SpikeTrainFeatureExtractor(start=t[0], end=t[-1])
+    extra_features = ["peak_deflect"]
+    expected_features = train_ext.process(t, v, i, expected, extra_features)
+    features = train_ext.process(axis, v, i, result, extra_features)
+    assert features.keys() == expected_features.keys()
+    for k in expected_features:
+        assert np.allclose(features[k], expected_features[k], equal_nan=True), k
+
+    epochs = {name: (0, len(v) - 1) for name in ["test", "sweep", "recording", "experiment", "stim"]}
+    sweeps = [Sweep(t=tsu.TimeAxis(len(v), axis.dt, start=axis.start), v=vv, i=i, clamp_mode="CurrentClamp",
+                    sampling_rate=1. / axis.dt, epochs=epochs) for vv in (v, v + 5.)]
+    for sweep, result in zip(sweeps, ext.process_sweep_set(SweepSet(sweeps))):
+        pd.testing.assert_frame_equal(result.to_dataframe(), ext.process(t, sweep.v, i).to_dataframe())
+
+
+def test_extractor_reduceat_backend_matches_loop(spike_test_pair, spike_test_var_dt, spike_test_high_init_dvdt):
+    ext = SpikeFeatureExtractor()
+    reduceat_ext = SpikeFeatureExtractor(window_search_backend="reduceat")
+
+    for data in (spike_test_pair, spike_test_var_dt, spike_test_high_init_dvdt):
+        t = data[:, 0]
+        v = data[:, 1]
+        i = np.zeros_like(v)
+
+        expected = ext.process(t, v, i)
+
+        result = reduceat_ext.process(t, v, i)
+
+        pd.testing.assert_frame_equal(result.to_dataframe(), expected.to_dataframe(), check_exact=True)
+
+
+def test_extractor_unknown_window_search_backend():
+    with pytest.raises(ValueError):
+        SpikeFeatureExtractor(window_search_backend="I_DONT_EXIST")
+
+
+def test_extractor_with_dvdt_cache(spike_test_pair):
+    data = spike_test_pair
+
+    t = data[:, 0]
+    v = data[:, 1]
+    i = np.zeros_like(v)
+
+    ext = SpikeFeatureExtractor()
+    cache = tsu.DvdtCache(v, t)
+
+    pd.testing.assert_frame_equal(ext.process(t, v, i, cache).to_dataframe(),
+                                  ext.process(t, v, i).to_dataframe(), check_exact=True)
+    assert ext.filter in cache._dvdt
+    assert 1. in cache._dvdt
+
+
+def test_extractor_spike_table_columns(spike_test_pair):
+    data = spike_test_pair
+
+    t = data[:, 0]
+    v = data[:, 1]
+    i = np.zeros_like(v)
+
+    spikes = SpikeFeatureExtractor().process(t, v, i)
+
+    expected_columns = ["threshold_index", "clipped", "threshold_t", "threshold_v", "threshold_i"]
+    for k in ["peak", "trough"]:
+        expected_columns += [k + "_index", k + "_t", k + "_v", k + "_i"]
+    for k in ["upstroke", "downstroke"]:
+        expected_columns += [k + "_index", k, k + "_t", k + "_v"]
+    expected_columns += ["isi_type"]
+    for k in ["fast_trough", "adp", "slow_trough"]:
+        expected_columns += [k + "_index", k + "_t", k + "_v", k + "_i"]
+    expected_columns += ["width", "upstroke_downstroke_ratio"]
+
+    assert list(spikes.columns) == expected_columns
+    assert np.allclose(spikes["threshold_index"], [725, 3382])
+    assert spikes["threshold_index"].dtype == np.float64
+    assert np.allclose(spikes["threshold_t"], t[[725, 3382]])
+    assert np.allclose(spikes["upstroke_downstroke_ratio"],
+                       spikes["upstroke"] / -spikes["downstroke"])
+
+
+@pytest.mark.parametrize("trace", ["spike_test_pair", "spike_test_var_dt", "spike_test_high_init_dvdt"])
+def test_extractor_float32_matches_float64(trace, request):
+    data = request.getfixturevalue(trace)
+
+    t = data[:, 0]
+    v = data[:, 1]
+    i = np.zeros_like(v)
+    v32 = v.astype(np.float32)
+    i32 = i.astype(np.float32)
+
+    ext = SpikeFeatureExtractor()
+    expected = ext.process(t, v, i)
+    actual = ext.process(t, v32, i32)
+
+    assert actual.columns == expected.columns
+    assert len(actual) == len(expected)
+    for name in expected.columns:
+        if name.endswith("_index") or expected[name].dtype.kind not in "fi":
+            np.testing.assert_array_equal(actual[name], expected[name])
+        else:
+            # float32 samples change the features by less than 1e-5 relative to float64
+            np.testing.assert_allclose(actual[name], expected[name], rtol=1e-5, atol=1e-6)
+
+    sx = SpikeTrainFeatureExtractor(start=0, end=t[-1])
+    expected_train = sx.process(t, v, i, expected)
+    actual_train = sx.process(t, v32, i32, actual)
+
+    for name, value in expected_train.items():
+        if isinstance(value, float):
+            np.testing.assert_allclose(actual_train[name], value, rtol=1e-5, atol=1e-6)
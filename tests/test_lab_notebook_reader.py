@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from ipfx.lab_notebook_reader import LabNotebookReader
+
+
+@pytest.fixture()
+def notebook():
+    reader = LabNotebookReader()
+
+    nan = np.nan
+    # columns: SweepNum, Bridge Bal Value, Bridge Bal Enable, Scale Factor
+    rows = [[0, 10., 1., 1.],
+            [0, 11., 1., nan],
+            [1, 12., 1., 2.],
+            [1, 13., 0., nan],   # bridge balance disabled
+            [nan, 14., 1., 3.],  # no sweep number
+            [2, nan, 1., 4.],
+            [2, 15., nan, 5.]]
+    reader.colname_number = np.array([["SweepNum", "Bridge Bal Value", "Bridge Bal Enable", "Scale Factor"]] * 3,
+                                     dtype=object)
+    reader.val_number = np.full((len(rows), 4, 9), np.nan)
+    reader.val_number[:, :, 0] = rows
+
+    reader.colname_text = np.array([["Sweep #", "Stim Wave Name"]] * 3, dtype=object)
+    reader.val_text = np.full((4, 2, 9), b"", dtype=object)
+    reader.val_text[:, :, 0] = [[b"0", b"C1LSCOARSE"],
+                                [b"1", b"C1RP"],
+                                [b"1", b""],
+                                [b"", b"C1SSFINEST"]]
+
+    return reader
+
+
+def test_get_value_numeric(notebook):
+    assert notebook.get_value("Bridge Bal Value", 0, None) == 11.
+    assert notebook.get_value("Bridge Bal Value", 1, None) == 12.
+    assert notebook.get_value("Bridge Bal Value", 2, None) is None
+    assert notebook.get_value("Scale Factor", 0, None) == 1.
+    assert notebook.get_value("Scale Factor", np.int64(2), None) == 5.
+    assert notebook.get_value("Scale Factor", 3, -1) == -1
+
+
+def test_get_value_text(notebook):
+    assert notebook.get_value("Stim Wave Name", 0, "") == b"C1LSCOARSE"
+    assert notebook.get_value("Stim Wave Name", 1, "") == b"C1RP"
+    assert notebook.get_value("Stim Wave Name", 2, "") == ""
+
+
+def test_get_value_unknown_field(notebook):
+    assert notebook.get_value("Unknown", 0, 7) == 7
+
+
+def test_get_values(notebook):
+    assert notebook.get_values("Scale Factor", [2, 0, 1, 3], None) == [5., 1., 2., None]
+    assert notebook.get_values("Stim Wave Name", [1, 0], "") == [b"C1RP", b"C1LSCOARSE"]
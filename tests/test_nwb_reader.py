@@ -5,7 +5,8 @@ import os
 import pytest
 import h5py
 import numpy as np
-from ipfx.nwb_reader import create_nwb_reader, NwbMiesReader, NwbPipelineReader, NwbXReader, NwbReader
+from ipfx.nwb_reader import create_nwb_reader, memmap_dataset, read_dataset, read_scaled_dataset, \
+    NwbMiesReader, NwbPipelineReader, NwbXReader, NwbReader
 from .helpers_for_tests import compare_dicts
 from allensdk.api.queries.cell_types_api import CellTypesApi
 
@@ -502,3 +503,139 @@ def test_get_long_unit_name(unit_name, long_unit_name):
 
     assert long_unit_name == NwbReader.get_long_unit_name(unit_name)
 
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_reader_keeps_file_open(NWB_file):
+
+    with create_nwb_reader(NWB_file) as reader:
+        h5_file = reader.h5_file
+        assert h5_file.id.valid
+
+        sweep_data = reader.get_sweep_data(0)
+        assert reader.get_sweep_attrs(0)["source"]
+        assert reader.get_acquisition_groups() == [u'data_00000_AD0']
+        assert reader.get_stimulus_groups() == [u'data_00000_DA0']
+        assert reader.get_group_keys("no/such/group") == []
+
+        # the same handle serves every lookup
+        assert reader.h5_file is h5_file
+
+    assert not h5_file.id.valid
+
+    # a closed reader opens the file again when it is used
+    np.testing.assert_array_equal(reader.get_sweep_data(0)["response"], sweep_data["response"])
+    reader.close()
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_get_sweep_data_index_range(NWB_file):
+
+    with create_nwb_reader(NWB_file) as reader:
+        sweep_data = reader.get_sweep_data(0)
+        window = reader.get_sweep_data(0, index_range=(1000, 2999))
+
+    assert window["sampling_rate"] == sweep_data["sampling_rate"]
+    assert window["stimulus_unit"] == sweep_data["stimulus_unit"]
+    for key in ("stimulus", "response"):
+        assert len(window[key]) == 2000
+        np.testing.assert_array_equal(window[key], sweep_data[key][1000:3000])
+
+
+def copy_contiguous(src_file, dst_file):
+    """Copy an hdf5 file, storing all of its datasets uncompressed and contiguously"""
+
+    with h5py.File(src_file, 'r') as src, h5py.File(dst_file, 'w') as dst:
+        dst.attrs.update(src.attrs)
+
+        def copy_item(name, item):
+            if isinstance(item, h5py.Dataset):
+                copy = dst.create_dataset(name, data=item[()])
+            else:
+                copy = dst.create_group(name)
+            copy.attrs.update(item.attrs)
+
+        src.visititems(copy_item)
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_get_sweep_data_memmap(NWB_file, tmpdir):
+
+    nwb_file = str(tmpdir.join("contiguous.nwb"))
+    copy_contiguous(NWB_file, nwb_file)
+
+    with create_nwb_reader(nwb_file) as reader:
+        assert memmap_dataset(reader.h5_file["acquisition/timeseries/data_00000_AD0/data"]) is not None
+
+        expected = [reader.get_sweep_data(0, index_range=index_range, dtype=dtype)
+                    for index_range in (None, (1000, 2999)) for dtype in (None, np.float32)]
+        reader.use_memmap = True
+        actual = [reader.get_sweep_data(0, index_range=index_range, dtype=dtype)
+                  for index_range in (None, (1000, 2999)) for dtype in (None, np.float32)]
+
+    for sweep_data, expected_sweep_data in zip(actual, expected):
+        for key in ("stimulus", "response"):
+            assert sweep_data[key].dtype == expected_sweep_data[key].dtype
+            np.testing.assert_array_equal(sweep_data[key], expected_sweep_data[key])
+
+
+def test_read_dataset_memmap(tmpdir):
+
+    h5_file = str(tmpdir.join("contiguous.h5"))
+    samples = np.arange(100, dtype=np.float32)
+    with h5py.File(h5_file, "w") as f:
+        f.create_dataset("data", data=samples)
+
+    with h5py.File(h5_file, "r") as f:
+        dataset = f["data"]
+        mapped = memmap_dataset(dataset)
+
+        view = read_dataset(dataset, (10, 19), mapped=mapped)
+        assert not view.flags.writeable and np.shares_memory(view, mapped)
+        np.testing.assert_array_equal(view, samples[10:20])
+
+        assert read_scaled_dataset(dataset, 1., (10, 19), mapped=mapped).base is view.base
+        assert read_dataset(dataset, (10, 19), np.float64, mapped).flags.writeable
+
+        scaled = read_scaled_dataset(dataset, 2., (10, 19), mapped=mapped)
+        assert scaled.flags.writeable and not np.shares_memory(scaled, mapped)
+        np.testing.assert_array_equal(scaled, samples[10:20] * 2.)
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_reader_caches_memmap(NWB_file, tmpdir):
+
+    nwb_file = str(tmpdir.join("contiguous.nwb"))
+    copy_contiguous(NWB_file, nwb_file)
+
+    with create_nwb_reader(nwb_file) as reader:
+        dataset = reader.h5_file["acquisition/timeseries/data_00000_AD0/data"]
+        assert reader.get_memmap(dataset) is None
+
+        reader.use_memmap = True
+        mapped = reader.get_memmap(dataset)
+        assert mapped is not None
+        assert reader.get_memmap(reader.h5_file["acquisition/timeseries/data_00000_AD0/data"]) is mapped
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_memmap_dataset_chunked(NWB_file):
+
+    with h5py.File(NWB_file, 'r') as f:
+        assert memmap_dataset(f["acquisition/timeseries/data_00000_AD0/data"]) is None
+
+
+@pytest.mark.parametrize('NWB_file', ['2018_03_20_0005.nwb'], indirect=True)
+def test_v2_sweep_data_without_pynwb(NWB_file):
+
+    with create_nwb_reader(NWB_file) as reader:
+        sweep_data = reader.get_sweep_data(0)
+        assert reader._nwb is None
+
+        assert len(reader.get_sweep_series(0)) == 2
+        assert reader.get_sweep_series(1) is None
+
+        for series in reader.nwb.sweep_table.get_series(0):
+            key = "stimulus" if "Stimulus" in type(series).__name__ else "response"
+            np.testing.assert_array_equal(sweep_data[key], series.data[:] * float(series.conversion))
+            assert sweep_data["sampling_rate"] == series.rate
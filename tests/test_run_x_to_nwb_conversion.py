@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+import ipfx.bin.run_x_to_nwb_conversion as run_x_to_nwb_conversion
+from ipfx.bin.run_x_to_nwb_conversion import MANIFEST_FILE_NAME, convertBatch
+
+
+@pytest.fixture()
+def converters(monkeypatch):
+    """Replace the ABF and DAT converters by stand-ins which record their input files"""
+
+    converted = []
+
+    def write(outFile, inFile):
+        with open(outFile, "w") as f:
+            f.write(inFile)
+
+    def abfConverter(inFile, outFile, **kwargs):
+        if "broken" in inFile:
+            write(outFile, inFile)
+            raise ValueError("broken file")
+
+        converted.append(os.path.basename(inFile))
+        write(outFile, inFile)
+
+    def datConverter(inFile, outFile, multipleGroupsPerFile, **kwargs):
+        converted.append(os.path.basename(inFile))
+        name, suffix = os.path.splitext(outFile)
+        for group in (1, 2):
+            write(f"{name}-{group}{suffix}", inFile)
+
+    monkeypatch.setattr(run_x_to_nwb_conversion, "ABFConverter", abfConverter)
+    monkeypatch.setattr(run_x_to_nwb_conversion, "DatConverter", datConverter)
+
+    return converted
+
+
+def make_tree(folder):
+    os.makedirs(os.path.join(folder, "cell", "day2"))
+
+    for name in ["a.abf", os.path.join("cell", "b.dat"), os.path.join("cell", "day2", "c.ABF"), "notes.txt"]:
+        with open(os.path.join(folder, name), "w") as f:
+            f.write(name)
+
+
+def test_convert_batch(tmpdir, converters):
+    folder = str(tmpdir)
+    make_tree(folder)
+
+    counts = convertBatch(folder, processes=1)
+
+    assert counts == {"converted": 3, "unchanged": 0, "failed": 0}
+    assert sorted(converters) == ["a.abf", "b.dat", "c.ABF"]
+    for outFile in ["a.nwb", os.path.join("cell", "b-1.nwb"), os.path.join("cell", "b-2.nwb"),
+                    os.path.join("cell", "day2", "c.nwb")]:
+        assert os.path.isfile(os.path.join(folder, outFile))
+    assert not [name for name in os.listdir(folder) if name.startswith(".x_to_nwb-")]
+
+    with open(os.path.join(folder, MANIFEST_FILE_NAME)) as f:
+        entries = json.load(f)["files"]
+    assert sorted(entries) == ["a.abf", os.path.join("cell", "b.dat"), os.path.join("cell", "day2", "c.ABF")]
+    assert entries[os.path.join("cell", "b.dat")]["outputs"] == [os.path.join("cell", "b-1.nwb"),
+                                                                 os.path.join("cell", "b-2.nwb")]
+
+    # unchanged, touched and modified inputs
+    del converters[:]
+    assert convertBatch(folder, processes=1) == {"converted": 0, "unchanged": 3, "failed": 0}
+
+    stat = os.stat(os.path.join(folder, "a.abf"))
+    os.utime(os.path.join(folder, "a.abf"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with open(os.path.join(folder, "cell", "b.dat"), "a") as f:
+        f.write("new sweep")
+
+    assert convertBatch(folder, processes=1) == {"converted": 1, "unchanged": 2, "failed": 0}
+    assert converters == ["b.dat"]
+
+    # changed options and missing outputs
+    del converters[:]
+    os.remove(os.path.join(folder, "a.nwb"))
+
+    assert convertBatch(folder, processes=1) == {"converted": 1, "unchanged": 2, "failed": 0}
+    assert converters == ["a.abf"]
+    assert convertBatch(folder, processes=1, compression=False)["converted"] == 3
+
+
+def test_convert_batch_failures(tmpdir, converters):
+    folder = str(tmpdir)
+    make_tree(folder)
+    with open(os.path.join(folder, "broken.abf"), "w") as f:
+        f.write("broken")
+
+    manifestFile = str(tmpdir.join("manifest.json"))
+
+    assert convertBatch(folder, manifestFile=manifestFile, processes=2) == {"converted": 3, "unchanged": 0,
+                                                                            "failed": 1}
+    assert not os.path.exists(os.path.join(folder, "broken.nwb"))
+    assert not [name for name in os.listdir(folder) if name.startswith(".x_to_nwb-")]
+
+    # failed conversions are retried
+    assert convertBatch(folder, manifestFile=manifestFile, processes=2) == {"converted": 0, "unchanged": 3,
+                                                                            "failed": 1}
+
+
+def test_convert_batch_output_collisions(tmpdir, converters):
+    folder = str(tmpdir)
+    make_tree(folder)
+    for name in ["a.dat", os.path.join("cell", "day2", "c.abf"), os.path.join("cell", "a.abf")]:
+        with open(os.path.join(folder, name), "w") as f:
+            f.write(name)
+
+    assert convertBatch(folder, processes=1) == {"converted": 2, "unchanged": 0, "failed": 4}
+    assert sorted(converters) == ["a.abf", "b.dat"]
+    assert os.path.isfile(os.path.join(folder, "cell", "a.nwb"))
+    assert not os.path.exists(os.path.join(folder, "a.nwb"))
+    assert not os.path.exists(os.path.join(folder, "cell", "day2", "c.nwb"))
+
+    with open(os.path.join(folder, MANIFEST_FILE_NAME)) as f:
+        entries = json.load(f)["files"]
+    assert sorted(entries) == [os.path.join("cell", "a.abf"), os.path.join("cell", "b.dat")]
+
+
+def test_convert_batch_reconverts_on_new_version_and_abf_options(tmpdir, converters, monkeypatch):
+    folder = str(tmpdir)
+    make_tree(folder)
+
+    assert convertBatch(folder, processes=1)["converted"] == 3
+    assert run_x_to_nwb_conversion.ABFConverter.adcNamesWithRealData == ["IN 0", "IN 1", "IN 2", "IN 3"]
+    assert convertBatch(folder, processes=1)["unchanged"] == 3
+
+    assert convertBatch(folder, processes=1, adcNamesWithRealData=["IN 0", "IN 5"])["converted"] == 3
+    assert run_x_to_nwb_conversion.ABFConverter.adcNamesWithRealData == ["IN 0", "IN 5"]
+
+    protocolDir = str(tmpdir.mkdir("protocols"))
+    assert convertBatch(folder, processes=1, adcNamesWithRealData=["IN 0", "IN 5"],
+                        protocolStorageDir=protocolDir)["converted"] == 3
+    assert run_x_to_nwb_conversion.ABFConverter.protocolStorageDir == protocolDir
+
+    monkeypatch.setattr(run_x_to_nwb_conversion.ipfx, "__version__", "99.0.0")
+    assert convertBatch(folder, processes=1, adcNamesWithRealData=["IN 0", "IN 5"],
+                        protocolStorageDir=protocolDir)["converted"] == 3
@@ -1,6 +1,8 @@
 from __future__ import print_function
 import pytest
 import ipfx.spike_detector as spkd
+import ipfx.time_series_utils as tsu
+from ipfx.nwb_reader import create_nwb_reader
 import numpy as np
 import ipfx.error as er
 
@@ -204,3 +206,93 @@ def test_upstrokes(spike_test_pair):
 
     expected_upstrokes = np.array([778, 3440])
     assert np.allclose(spkd.find_upstroke_indexes(v, t, spikes, peaks), expected_upstrokes)
+
+
+def _detect_putative_spikes_reference(v, t, dv_cutoff=20., filter=10.):
+    # Loop-based implementation of the dV/dt reset filter in detect_putative_spikes
+    dvdt = tsu.calculate_dvdt(v, t, filter)
+    putative_spikes = np.flatnonzero(np.diff(np.greater_equal(dvdt, dv_cutoff).astype(int)) == 1)
+
+    if len(putative_spikes) <= 1:
+        return np.array(putative_spikes)
+
+    putative_spikes = [putative_spikes[0]] + [s for i, s in enumerate(putative_spikes[1:])
+        if np.any(dvdt[putative_spikes[i]:s] < 0)]
+
+    return np.array(putative_spikes)
+
+
+def test_has_negative_values_between():
+    x = np.array([1., -1., 2., 3., -0.5, 4.])
+    starts = np.array([0, 2, 2, 5, 4, 3])
+    ends = np.array([2, 4, 5, 6, 2, 10])
+
+    expected = [np.any(x[s:e] < 0) for s, e in zip(starts, ends)]
+
+    assert np.array_equal(spkd.has_negative_values_between(x, starts, ends), expected)
+
+
+@pytest.mark.parametrize('dv_cutoff', [20., 1., 0.1])
+def test_detect_putative_spikes_matches_reference(spike_test_pair, spike_test_high_init_dvdt, dv_cutoff):
+    np.random.seed(0)
+
+    for data in (spike_test_pair, spike_test_high_init_dvdt):
+        t = data[:, 0]
+        for v in (data[:, 1], data[:, 1] + np.random.normal(scale=0.5, size=len(t))):
+            assert np.array_equal(spkd.detect_putative_spikes(v, t, dv_cutoff=dv_cutoff),
+                                  _detect_putative_spikes_reference(v, t, dv_cutoff=dv_cutoff))
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb',
+                                      'UntitledExperiment-2018_12_03_234957-compressed.nwb'],
+                         indirect=True)
+def test_detect_putative_spikes_matches_reference_nwb(NWB_file):
+    sweep_data = create_nwb_reader(NWB_file).get_sweep_data(0)
+    sampling_rate = sweep_data["sampling_rate"]
+
+    for trace in (sweep_data["response"], sweep_data["stimulus"]):
+        v = trace * 1e3
+        t = np.arange(len(v)) / sampling_rate
+        filter = min(10., 0.4 * sampling_rate * 1e-3)
+        for dv_cutoff in [20., 1., 0.1]:
+            assert np.array_equal(spkd.detect_putative_spikes(v, t, dv_cutoff=dv_cutoff, filter=filter),
+                                  _detect_putative_spikes_reference(v, t, dv_cutoff=dv_cutoff, filter=filter))
+
+
+def test_unknown_window_search_backend():
+    x = np.arange(10.)
+    with pytest.raises(ValueError):
+        spkd.window_argmax(x, np.array([0]), np.array([5]), backend="I_DONT_EXIST")
+
+
+def test_window_searches_match_loop():
+    np.random.seed(0)
+    x = np.random.normal(size=1000)
+    x[[17, 18, 500]] = np.nan
+    x[600:610] = x.max()
+
+    starts = np.array([0, 10, 15, 200, 490, 590, 990, 5])
+    ends = np.array([10, 20, 30, 700, 501, 650, 1010, 900])
+
+    expected_max = [np.argmax(x[s:e]) + s for s, e in zip(starts, ends)]
+    expected_min = [np.argmin(x[s:e]) + s for s, e in zip(starts, ends)]
+
+    assert np.array_equal(spkd.window_argmax(x, starts, ends, backend="reduceat"), expected_max)
+    assert np.array_equal(spkd.window_argmin(x, starts, ends, backend="reduceat"), expected_min)
+
+    with pytest.raises(ValueError):
+        spkd.window_argmax(x, np.array([3]), np.array([3]), backend="reduceat")
+
+
+@pytest.mark.parametrize('thresh_frac', [0.05, 0.5, 5.])
+def test_refine_thresholds_reduceat_matches_loop(spike_test_pair, thresh_frac):
+    data = spike_test_pair
+    t = data[:, 0]
+    v = data[:, 1]
+    upstrokes = np.array([778, 3440, 3441])
+
+    expected = spkd.refine_threshold_indexes(v, t, upstrokes, thresh_frac)
+
+    result = spkd.refine_threshold_indexes(v, t, upstrokes, thresh_frac, backend="reduceat")
+
+    assert np.array_equal(result, expected)
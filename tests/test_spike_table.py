@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import pytest
+import allensdk.core.json_utilities as ju
+
+from ipfx.spike_table import SpikeTable
+
+
+@pytest.fixture()
+def columns():
+    return OrderedDict([("threshold_index", np.array([10., 52., 97.])),
+                        ("threshold_t", np.array([0.1, 0.52, 0.97])),
+                        ("clipped", np.array([False, False, True])),
+                        ("isi_type", np.array(["direct", "detour", ""], dtype=object)),
+                        ("width", np.array([0.001, np.nan, 0.0012]))])
+
+
+def test_spike_table_columns_are_not_copied(columns):
+    spikes = SpikeTable(columns)
+
+    assert len(spikes) == 3
+    assert spikes.shape == (3, 5)
+    assert not spikes.empty
+    assert spikes.columns == list(columns)
+    assert "width" in spikes and "peak_v" not in spikes
+    for name, values in columns.items():
+        assert spikes[name] is values
+
+    with pytest.raises(KeyError):
+        spikes["peak_v"]
+
+
+def test_spike_table_records_match_dataframe(columns):
+    spikes = SpikeTable(columns)
+    expected = pd.DataFrame(columns).to_dict(orient="records")
+
+    assert spikes[0] == expected[0]
+    assert spikes[-1]["isi_type"] == expected[-1]["isi_type"]
+    assert np.isnan(spikes[1]["width"])
+    assert [r["threshold_t"] for r in spikes] == [r["threshold_t"] for r in expected]
+    assert [type(v) for v in spikes.to_dict()[0].values()] == [type(v) for v in expected[0].values()]
+    assert spikes.to_dict(orient="list")["threshold_index"] == [10., 52., 97.]
+
+    with pytest.raises(IndexError):
+        spikes[3]
+
+
+def test_spike_table_dataframe_round_trip(columns):
+    df = pd.DataFrame(columns)
+    spikes = SpikeTable.from_dataframe(df)
+
+    pd.testing.assert_frame_equal(spikes.to_dataframe(), df)
+
+
+def test_spike_table_empty():
+    spikes = SpikeTable()
+
+    assert len(spikes) == 0
+    assert spikes.empty
+    assert spikes.to_dict() == []
+    assert list(spikes) == []
+
+
+def test_spike_table_mismatched_columns():
+    with pytest.raises(ValueError):
+        SpikeTable({"threshold_index": np.arange(3), "peak_index": np.arange(4)})
+
+
+def test_spike_table_json(columns):
+    spikes = SpikeTable(columns)
+    records = pd.DataFrame(columns).to_dict(orient="records")
+
+    assert ju.write_string({"spikes": spikes}) == ju.write_string({"spikes": records})
@@ -1,8 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import pytest
 import pandas as pd
 import numpy as np
-from ipfx.stimulus_protocol_analysis import LongSquareAnalysis
+from ipfx.stimulus_protocol_analysis import StimulusProtocolAnalysis, LongSquareAnalysis
 from ipfx.feature_extractor import SpikeTrainFeatureExtractor, SpikeFeatureExtractor
+from ipfx.sweep import Sweep, SweepSet
 
 
 @pytest.fixture()
@@ -36,3 +38,29 @@ def test_find_hero_sweep(long_square_analysis, spiking_sweep_features):
 
     hero_sweep = long_square_analysis.find_hero_sweep(rheobase_i, spiking_sweep_features)
     assert hero_sweep["stim_amp"] == 60
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_analyze_with_executor(spike_test_pair, executor_class):
+    t = spike_test_pair[:, 0]
+    v = spike_test_pair[:, 1]
+
+    sweeps = []
+    for offset in [0., 5., -200., 2.]:
+        epochs = {name: (0, len(t) - 1) for name in ["test", "sweep", "recording", "experiment", "stim"]}
+        sweeps.append(Sweep(t=t, v=v + offset, i=np.zeros_like(v), clamp_mode="CurrentClamp",
+                            sampling_rate=1. / (t[1] - t[0]), epochs=epochs))
+    sweep_set = SweepSet(sweeps)
+
+    def analysis(executor=None):
+        return StimulusProtocolAnalysis(SpikeFeatureExtractor(), SpikeTrainFeatureExtractor(start=t[0], end=t[-1]),
+                                        executor=executor)
+
+    expected = analysis().analyze(sweep_set)
+    with executor_class(max_workers=2) as executor:
+        result = analysis(executor).analyze(sweep_set)
+
+    pd.testing.assert_frame_equal(result["sweeps"], expected["sweeps"])
+    assert len(result["spikes_set"]) == len(sweeps)
+    for spikes, expected_spikes in zip(result["spikes_set"], expected["spikes_set"]):
+        pd.testing.assert_frame_equal(spikes.to_dataframe(), expected_spikes.to_dataframe())
@@ -1,4 +1,5 @@
-from ipfx.sweep import Sweep
+from ipfx.sweep import Sweep, SweepCache
+import ipfx.time_series_utils as tsu
 import pytest
 import numpy as np
 
@@ -36,3 +37,86 @@ def test_set_time_zero_to_index(sweep):
     assert np.isclose(sweep.t[t0_idx], 0.0)
 
 
+def test_dvdt_cache(sweep):
+
+    sweep.select_epoch("recording")
+    cache = sweep.dvdt_cache
+    assert sweep.dvdt_cache is cache
+    assert np.allclose(cache.dvdt(), np.diff(sweep.v) / np.diff(sweep.t) * 1e-3)
+
+    sweep.select_epoch("sweep")
+    assert sweep.dvdt_cache is not cache
+
+    sweep.select_epoch("recording")
+    assert sweep.dvdt_cache is cache
+
+    sweep.set_time_zero_to_index(7)
+    assert sweep.dvdt_cache is not cache
+
+
+def test_sweep_with_time_axis():
+
+    i = [0,0,1,1,0,0,0,2,2,2,2,2,0,0,0,0]
+    v = [0,0,1,2,1,0,0,1,2,3,1,np.nan,np.nan,np.nan,np.nan,np.nan]
+    sampling_rate = 2
+    dt = 1./sampling_rate
+    t = np.arange(0,len(v))*dt
+
+    sweep = Sweep(tsu.TimeAxis(len(v), dt), v, i, sampling_rate=sampling_rate, clamp_mode="CurrentClamp")
+    array_sweep = Sweep(t, v, i, sampling_rate=sampling_rate, clamp_mode="CurrentClamp")
+
+    assert sweep._t is None
+    assert sweep.has_fixed_dt
+
+    for s in (sweep, array_sweep):
+        s.select_epoch("recording")
+        s.set_time_zero_to_index(7)
+
+    assert np.array_equal(sweep.t, array_sweep.t)
+    assert sweep._t is None
+    assert np.array_equal(sweep.time_axis.values(), array_sweep.t)
+    assert array_sweep.time_axis is None
+
+    assert sweep.time_base[-1] == array_sweep.time_base[-1]
+    assert isinstance(sweep.time_base, tsu.TimeAxis)
+    assert np.array_equal(array_sweep.time_base, array_sweep.t)
+    assert np.allclose(sweep.dvdt_cache.dvdt(), array_sweep.dvdt_cache.dvdt())
+
+
+def test_sweep_copy(sweep):
+
+    copy = sweep.copy()
+    copy.select_epoch("recording")
+    copy.set_time_zero_to_index(7)
+
+    assert copy._v is sweep._v
+    assert sweep.selected_epoch_name == "sweep"
+    assert np.isclose(sweep.t[0], 0.0)
+    assert copy.dvdt_cache is not sweep.dvdt_cache
+
+
+def test_sweep_cache_evicts_least_recently_used():
+
+    def make_sweep(n):
+        v = np.zeros(100)
+        i = np.zeros(100)
+        return Sweep(tsu.TimeAxis(100, 0.5), v, i, sampling_rate=2, clamp_mode="CurrentClamp", sweep_number=n)
+
+    sweep_nbytes = make_sweep(0).nbytes
+    assert sweep_nbytes == 1600
+
+    cache = SweepCache(2 * sweep_nbytes)
+    for n in range(2):
+        cache.put(n, make_sweep(n))
+
+    assert cache.get(0).sweep_number == 0
+    cache.put(2, make_sweep(2))
+
+    assert 1 not in cache and 0 in cache and 2 in cache
+    assert cache.get(1) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.nbytes == 2 * sweep_nbytes
+
+    cache.put(3, Sweep(tsu.TimeAxis(300, 0.5), np.zeros(300), np.zeros(300),
+                       sampling_rate=2, clamp_mode="CurrentClamp"))
+    assert 3 not in cache and len(cache) == 2
@@ -0,0 +1,69 @@
+import os
+import shutil
+import pytest
+import pandas as pd
+import allensdk.core.json_utilities as ju
+
+from ipfx.stimulus import StimulusOntology
+from ipfx.data_set_utils import create_data_set
+from ipfx.nwb_reader import NwbReader
+from ipfx.ephys_data_set import EphysDataSet
+from ipfx.aibs_data_set import AibsDataSet
+import ipfx.sweep_index as swi
+
+
+@pytest.fixture()
+def ontology():
+    return StimulusOntology(ju.read(StimulusOntology.DEFAULT_STIMULUS_ONTOLOGY_FILE))
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb',
+                                      'UntitledExperiment-2018_12_03_234957-compressed.nwb'], indirect=True)
+def test_data_set_from_sweep_index(NWB_file, ontology, tmpdir, monkeypatch):
+
+    index_dir = str(tmpdir)
+    expected = create_data_set(nwb_file=NWB_file, ontology=ontology)
+
+    written = create_data_set(nwb_file=NWB_file, ontology=ontology, sweep_index_dir=index_dir)
+    assert os.path.isfile(swi.index_file_name(NWB_file, index_dir))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("sweep map rebuilt")
+
+    monkeypatch.setattr(NwbReader, "build_sweep_map", fail)
+    monkeypatch.setattr(EphysDataSet, "build_sweep_table", fail)
+    loaded = create_data_set(nwb_file=NWB_file, ontology=ontology, sweep_index_dir=index_dir)
+
+    if isinstance(loaded, AibsDataSet):
+        assert loaded.notebook is not None
+
+    for data_set in (written, loaded):
+        pd.testing.assert_frame_equal(data_set.sweep_table, expected.sweep_table)
+        pd.testing.assert_frame_equal(data_set.nwb_data.sweep_map_table.reset_index(drop=True),
+                                      expected.nwb_data.sweep_map_table.reset_index(drop=True))
+
+
+@pytest.mark.parametrize('NWB_file', ['H18.03.315.11.11.01.05.nwb'], indirect=True)
+def test_sweep_index_is_invalidated(NWB_file, ontology, tmpdir):
+
+    nwb_file = str(tmpdir.join("cell.nwb"))
+    shutil.copy(NWB_file, nwb_file)
+    index_file = swi.index_file_name(nwb_file)
+
+    create_data_set(nwb_file=nwb_file, ontology=ontology, sweep_index_dir=str(tmpdir))
+    assert swi.read_sweep_index(nwb_file, index_file) is not None
+
+    stat = os.stat(nwb_file)
+    os.utime(nwb_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert swi.read_sweep_index(nwb_file, index_file) is None
+
+    create_data_set(nwb_file=nwb_file, ontology=ontology, sweep_index_dir=str(tmpdir))
+    assert swi.read_sweep_index(nwb_file, index_file) is not None
+
+    with open(nwb_file, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xff]))
+    os.utime(nwb_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert swi.read_sweep_index(nwb_file, index_file) is None
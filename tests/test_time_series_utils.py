@@ -12,6 +12,29 @@ def test_find_time_out_of_bounds():
         tsu.find_time_index(t, t_0)
 
 
+def test_find_time_index_matches_argmin():
+    np.random.seed(0)
+    t = np.arange(0, 2000) * 5e-6
+    t_var = np.cumsum(np.random.uniform(1e-6, 1e-5, size=2000))
+    t_repeats = np.array([0., 1., 1., 1., 2., 3., 3., 4.])
+
+    for tt in (t, t_var, t_repeats, t - 0.3, np.array([1.5])):
+        times = np.concatenate([np.random.uniform(tt[0], tt[-1], size=200),
+                                tt[[0, -1]], tt[::7], (tt[1:] + tt[:-1])[::5] / 2.])
+
+        expected = [np.argmin(abs(tt - t_0)) for t_0 in times]
+
+        assert [tsu.find_time_index(tt, t_0) for t_0 in times] == expected
+        assert np.array_equal(tsu.find_time_indexes(tt, times), expected)
+
+
+def test_find_time_indexes_out_of_bounds():
+    t = np.array([0, 1, 2])
+
+    with pytest.raises(AssertionError):
+        tsu.find_time_indexes(t, [1, 4])
+
+
 def test_dvdt_no_filter():
     t = np.array([0, 1, 2, 3])
     v = np.array([1, 1, 1, 1])
@@ -32,3 +55,58 @@ def test_flatnotnan():
 
     assert np.all(tsu.flatnotnan(a) == [0, 1, 2, 3, 4, 5, 6])
 
+
+
+def test_dvdt_cache():
+    t = np.arange(0, 1000) * 1e-5
+    v = np.sin(2 * np.pi * 100 * t)
+
+    cache = tsu.DvdtCache(v, t)
+    dvdt = cache.dvdt(10.)
+
+    assert np.array_equal(dvdt, tsu.calculate_dvdt(v, t, 10.))
+    assert cache.dvdt(10.) is dvdt
+    assert np.array_equal(cache.dvdt(1.), tsu.calculate_dvdt(v, t, 1.))
+
+    stored = np.zeros(999)
+    cache.store(5., stored)
+    assert cache.dvdt(5.) is stored
+
+
+def test_time_axis_matches_array():
+    dt = 1. / 200000.
+    axis = tsu.TimeAxis(5000, dt, start=-0.25)
+    t = np.arange(0, 5000) * dt + -0.25
+
+    assert len(axis) == len(t)
+    assert np.array_equal(axis.values(), t)
+    assert np.array_equal(np.asarray(axis), t)
+    assert axis[0] == t[0] and axis[-1] == t[-1] and axis[1234] == t[1234]
+    assert np.array_equal(axis[10:20], t[10:20])
+    assert np.array_equal(axis.window(100, 199).values(), t[100:200])
+    assert axis.shape == t.shape
+    assert tsu.time_window(axis, 100, 199).same_as(axis.window(100, 199))
+    assert np.array_equal(tsu.time_window(t, 100, 199), t[100:200])
+    assert tsu.same_times(axis, t) and tsu.same_times(axis, tsu.TimeAxis(5000, dt, start=-0.25))
+    assert not tsu.same_times(axis, axis.window(0, 3998))
+    assert np.array_equal(axis.shifted(0.25).values(), np.arange(0, 5000) * dt + (-0.25 + 0.25))
+
+    with pytest.raises(IndexError):
+        axis[5000]
+
+    np.random.seed(0)
+    times = np.concatenate([np.random.uniform(t[0], t[-1], size=200), t[::97], (t[1:] + t[:-1])[::89] / 2.])
+    window = axis.window(1000, 2999)
+    for t_0 in times:
+        assert tsu.find_time_index(axis, t_0) == tsu.find_time_index(t, t_0)
+        if window[0] <= t_0 <= window[-1]:
+            assert tsu.find_time_index(window, t_0) == tsu.find_time_index(t[1000:3000], t_0)
+    assert np.array_equal(tsu.find_time_indexes(axis, times), tsu.find_time_indexes(t, times))
+
+    v = np.sin(2 * np.pi * 50 * t)
+    assert tsu.has_fixed_dt(axis)
+    for filter in [None, 10.]:
+        assert np.allclose(tsu.calculate_dvdt(v, axis, filter), tsu.calculate_dvdt(v, t, filter))
+        assert np.allclose(tsu.calculate_dvdt(np.vstack([v, -v]), axis, filter),
+                           tsu.calculate_dvdt(np.vstack([v, -v]), t, filter))
+    assert np.isclose(tsu.average_voltage(v, axis, -0.24, -0.23), tsu.average_voltage(v, t, -0.24, -0.23))
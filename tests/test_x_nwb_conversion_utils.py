@@ -0,0 +1,91 @@
+import numpy as np
+import pyabf
+import pyabf.abfWriter
+
+from ipfx.x_to_nwb.ABFConverter import ABFConverter
+from ipfx.x_to_nwb.conversion_utils import SweepDataChunkIterator, convertDataset, mapABFData, scaleABFSamples
+
+
+def test_sweep_data_chunk_iterator():
+    samples = np.arange(10, dtype=np.float32)
+    loaded = []
+
+    def load(start, stop):
+        loaded.append((start, stop))
+        return samples[start:stop]
+
+    iterator = SweepDataChunkIterator(load, len(samples), chunkLength=4)
+
+    assert iterator.maxshape == (10,)
+    assert iterator.recommended_data_shape() == (10,)
+    assert iterator.dtype == np.float32
+    assert convertDataset(iterator, compression=False) is iterator
+    assert loaded == []
+
+    chunks = list(iterator)
+
+    assert loaded == [(0, 4), (4, 8), (8, 10)]
+    for chunk, (start, stop) in zip(chunks, loaded):
+        assert chunk.selection == np.s_[start:stop]
+        np.testing.assert_array_equal(chunk.data, samples[start:stop])
+
+    assert len(list(SweepDataChunkIterator(load, len(samples)))) == 1
+
+
+def write_abf(tmpdir):
+    abf_file = str(tmpdir.join("sweeps.abf"))
+    sweeps = np.random.RandomState(0).normal(0, 50, (3, 1000))
+    pyabf.abfWriter.writeABF1(sweeps, abf_file, 20000, units="mV")
+
+    return abf_file
+
+
+def read_chunks(iterator):
+    return np.concatenate([chunk.data for chunk in iterator])
+
+
+def test_map_abf_data(tmpdir):
+    abf_file = write_abf(tmpdir)
+
+    abf = pyabf.ABF(abf_file)
+    mapped_abf = pyabf.ABF(abf_file, loadData=False)
+    mapped_abf.data = mapABFData(mapped_abf)
+
+    for sweep in range(abf.sweepCount):
+        abf.setSweep(sweep)
+        mapped_abf.setSweep(sweep)
+
+        assert isinstance(mapped_abf.sweepY, np.memmap)
+
+        data = scaleABFSamples(mapped_abf, 0, mapped_abf.sweepY)
+        assert data.dtype == np.float32
+        np.testing.assert_array_equal(data, abf.sweepY)
+
+
+def test_streamed_data_matches_loaded_data(tmpdir):
+    abf_file = write_abf(tmpdir)
+    scale_factor = 1e-3
+
+    abf = pyabf.ABF(abf_file)
+    mapped_abf = pyabf.ABF(abf_file, loadData=False)
+    mapped_abf.data = mapABFData(mapped_abf)
+
+    for sweep in range(abf.sweepCount):
+        for channel in range(abf.channelCount):
+            abf.setSweep(sweep, channel=channel, absoluteTime=True)
+            mapped_abf.setSweep(sweep, channel=channel, absoluteTime=True)
+
+            stimulus = convertDataset(abf.sweepC * scale_factor, compression=False)
+            acquisition = convertDataset(abf.sweepY, compression=False)
+
+            streamed_stimulus = SweepDataChunkIterator(
+                ABFConverter._stimulusLoader(mapped_abf, sweep, channel, scale_factor),
+                len(mapped_abf.sweepC), chunkLength=300)
+            streamed_acquisition = SweepDataChunkIterator(
+                ABFConverter._acquisitionLoader(mapped_abf, channel, mapped_abf.sweepY),
+                len(mapped_abf.sweepY), chunkLength=300)
+
+            assert streamed_stimulus.dtype == stimulus.dtype
+            assert streamed_acquisition.dtype == acquisition.dtype
+            np.testing.assert_array_equal(read_chunks(streamed_stimulus), stimulus)
+            np.testing.assert_array_equal(read_chunks(streamed_acquisition), acquisition)
@@ -0,0 +1,153 @@
+import io
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ipfx.x_to_nwb.DatConverter import DatConverter
+from ipfx.x_to_nwb.hr_bundle import Bundle
+from ipfx.x_to_nwb.hr_nodes import AmplifierFile, BundleHeader, BundleItem, Pulsed, StimulusTemplate
+
+
+def make_bundle_file(file_name, samples, pul=None):
+    """Write a DAT2 bundle with a .dat item holding `samples` and an optional .pul item"""
+
+    header_size = BundleHeader.size()
+    data = samples.tobytes()
+
+    items = BundleItem._le_struct.pack(0, header_size + len(data), b".dat")
+    if pul is not None:
+        items += BundleItem._le_struct.pack(header_size + len(data), len(pul), b".pul")
+        data += pul
+    items += bytes(BundleItem.size() * 12 - len(items))
+    header = BundleHeader._le_struct.pack(b"DAT2", b"v2x90.2", 0.0, 2, True, b"", items)
+
+    with open(file_name, "wb") as fh:
+        fh.write(header + data)
+
+    return header_size
+
+
+def make_tree(root, endian, size_change=0, children=3, seed=0):
+    """Tree file contents of `root` with random records, which are `size_change` bytes larger than ours"""
+
+    rng = np.random.RandomState(seed)
+    record_types = [root] + root.rectypes[1:]
+    level_sizes = [rectype.size() + size_change for rectype in record_types]
+
+    contents = [b"eerT" if endian == "<" else b"Tree", struct.pack(endian + "i", len(level_sizes))]
+    contents += [struct.pack(endian + "i", size) for size in level_sizes]
+
+    def add_node(level):
+        nchild = children if level + 1 < len(level_sizes) else 0
+        contents.append(rng.bytes(level_sizes[level]))
+        contents.append(struct.pack(endian + "i", nchild))
+        for _ in range(nchild):
+            add_node(level + 1)
+
+    add_node(0)
+    return b"".join(contents)
+
+
+def assert_trees_equal(expected, node):
+    assert type(node) == type(expected)
+    assert node.level == expected.level
+    # repr also compares NaNs and signed zeros of the random records
+    assert repr(node.get_fields()) == repr(expected.get_fields())
+    assert str(node) == str(expected)
+    assert len(node) == len(expected)
+
+    for expected_child, child in zip(expected, node):
+        assert_trees_equal(expected_child, child)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+@pytest.mark.parametrize("data_format", ["int16", "int32"])
+@pytest.mark.parametrize("zero_data", [0.0, -1e-11])
+def test_raw_data(tmpdir, use_mmap, data_format, zero_data):
+    file_name = str(tmpdir.join("data.dat"))
+    samples = np.random.RandomState(0).randint(-2000, 2000, 300000).astype(data_format)
+    offset = make_bundle_file(file_name, samples)
+
+    trace = SimpleNamespace(Data=offset, DataPoints=len(samples), DataFormat=data_format,
+                            DataKind={"IsLittleEndian": True}, DataScaler=3.1e-12, ZeroData=zero_data)
+
+    bundle = Bundle(file_name, use_mmap=use_mmap)
+
+    raw = bundle.data.getRaw(trace)
+    np.testing.assert_array_equal(raw, samples)
+    assert raw.flags.writeable == (not use_mmap)
+    del raw
+
+    expected = samples * trace.DataScaler + trace.ZeroData
+    np.testing.assert_array_equal(bundle.data.getScaled(trace), expected)
+
+    data = bundle.data.getScaled(trace, np.float32)
+    assert data.dtype == np.float32
+    np.testing.assert_array_equal(data, expected.astype(np.float32))
+
+    bundle.close()
+
+
+@pytest.mark.parametrize("root", [Pulsed, StimulusTemplate, AmplifierFile])
+@pytest.mark.parametrize("endian", ["<", ">"])
+@pytest.mark.parametrize("size_change", [-8, 0, 8])
+def test_tree_from_buffer(root, endian, size_change):
+    data = make_tree(root, endian, size_change)
+
+    expected = root(io.BytesIO(data[4:]), endian)
+    tree = root.frombuffer(data, 4, endian)
+
+    assert_trees_equal(expected, tree)
+
+
+def test_bundle_lazy_tree(tmpdir):
+    file_name = str(tmpdir.join("data.dat"))
+    make_bundle_file(file_name, np.zeros(10, dtype=np.int16), pul=make_tree(Pulsed, "<"))
+
+    expected = Bundle(file_name).pul
+    bundle = Bundle(file_name, use_mmap=True, lazy_tree=True)
+
+    trace = bundle.pul[0][1][2][0]
+    assert "DataScaler" not in trace.__dict__
+    assert trace.DataScaler == expected[0][1][2][0].DataScaler
+    assert "DataScaler" in trace.__dict__
+
+    assert_trees_equal(expected, bundle.pul)
+    bundle.close()
+
+
+def test_dat_converter_closes_bundle_on_error(tmpdir, monkeypatch):
+    file_name = str(tmpdir.join("data.dat"))
+    make_bundle_file(file_name, np.zeros(10, dtype=np.int16), pul=make_tree(Pulsed, "<"))
+
+    closed = []
+    close = Bundle.close
+
+    def record_close(bundle):
+        close(bundle)
+        closed.append(bundle.mmap is None and bundle.fh is None)
+
+    monkeypatch.setattr(Bundle, "close", record_close)
+
+    with pytest.raises(ValueError, match="amp tree"):
+        DatConverter(file_name, str(tmpdir.join("data.nwb")))
+
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_bundle_context_closes(tmpdir, use_mmap):
+    file_name = str(tmpdir.join("data.dat"))
+    samples = np.arange(10, dtype=np.int16)
+    offset = make_bundle_file(file_name, samples)
+
+    trace = SimpleNamespace(Data=offset, DataPoints=len(samples), DataFormat="int16",
+                            DataKind={"IsLittleEndian": True}, DataScaler=1.0, ZeroData=0.0)
+
+    with Bundle(file_name, use_mmap=use_mmap) as bundle:
+        np.testing.assert_array_equal(bundle.data.getScaled(trace), samples)
+
+    assert bundle.mmap is None
+    assert bundle.fh is None
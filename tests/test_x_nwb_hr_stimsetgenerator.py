@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import scipy.signal
+
+from ipfx.x_to_nwb.hr_stimsetgenerator import StimSetGenerator
+
+
+class Node(list):
+    """Stand-in for a TreeNode with the given children and fields"""
+
+    def __init__(self, children=(), **fields):
+        super().__init__(children)
+        self.__dict__.update(fields)
+
+
+def make_segment(segmentClass, duration, voltage, durationInc=0.0, voltageInc=0.0):
+    return Node(Class=segmentClass, Duration=duration, VoltageSource="Constant", Voltage=voltage,
+                DurationIncMode="Inc", DeltaTFactor=1.0, DeltaTIncrement=durationInc,
+                VoltageIncMode="Inc", DeltaVFactor=1.0, DeltaVIncrement=voltageInc)
+
+
+def make_bundle(segments, numberSweeps, sampleInterval=1e-3):
+    channelRec = Node(segments, AdcChannel=2, Holding=0.0,
+                      StimToDacID={"UseStimScale": True, "UseRelative": False},
+                      Square_PosAmpl=0.05, Square_NegAmpl=0.0, Square_Cycle=0.004, Square_DurFactor=0.0,
+                      Square_BaseIncr=0.0, Square_Kind="Common Frequency",
+                      Chirp_StartFreq=1.0, Chirp_EndFreq=50.0, Chirp_Kind="Linear", Chirp_Amplitude=0.04)
+    stimRec = Node([channelRec], NumberSweeps=numberSweeps, ActualDacChannels=1, SampleInterval=sampleInterval)
+
+    return Node(pgf=Node([stimRec]))
+
+
+def fetch(bundle):
+    return StimSetGenerator(bundle).fetch(Node(StimCount=1), Node(AdcChannel=2))
+
+
+def test_fetch_with_delta_modes():
+    bundle = make_bundle([make_segment("Constant", 0.005, -0.07, voltageInc=0.01),
+                          make_segment("Ramp", 0.01, 0.02, durationInc=0.002, voltageInc=0.005),
+                          make_segment("Chirpwave", 0.02, 0.0)], numberSweeps=3)
+
+    stimset = fetch(bundle)
+
+    assert len(stimset) == 3
+    for sweep, data in enumerate(stimset):
+        rampPoints = 10 + 2 * sweep
+        x = np.linspace(0, 0.02, 20)
+        expected = np.concatenate([np.full(5, (-0.07 + 0.01 * sweep) * 1e3),
+                                   np.linspace(0.0, (0.02 + 0.005 * sweep) * 1e3, rampPoints),
+                                   0.02e3 * scipy.signal.chirp(x, f0=1.0, f1=50.0, t1=0.02,
+                                                               method="linear", phi=-90)])
+        np.testing.assert_allclose(data, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("duration,numPoints", [(0.010, 10), (0.0125, 12)])
+def test_fetch_square(duration, numPoints):
+    bundle = make_bundle([make_segment("Squarewave", duration, 0.0),
+                          make_segment("Constant", 0.002, 0.01)], numberSweeps=2)
+
+    stimset = fetch(bundle)
+
+    cycles = np.tile([50.0, 50.0, -50.0, -50.0], 4)[:numPoints]
+    expected = np.concatenate([cycles, [10.0, 10.0]])
+
+    assert len(stimset) == 2
+    for data in stimset:
+        np.testing.assert_array_equal(data, expected)